@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Conformance and performance checks for every `VectorBackend` on the data/ corpus.
+
+Each backend is loaded into a temporary location with the same chunks and
+embeddings, then checked for the behaviour `VectorStore` relies on: counts,
+get by ID and by page, add vs. upsert semantics, delete, filtered search,
+score ordering and reopening from disk. Write throughput, search latency
+(unfiltered and book-filtered) and top-k overlap with exact float32 search
+are reported alongside.
+
+By default chunks are embedded with a hashing vectorizer over the BM25
+tokens, so no model is needed; `--model` uses EMBEDDING_MODEL instead.
+Exits with status 1 if any backend fails a check.
+
+Usage:
+    python benchmarks/backend_conformance.py
+    python benchmarks/backend_conformance.py --backends numpy --limit 5000 --model
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services.document_processor import DocumentProcessor
+from services.lexical_index import tokenize
+from services.partitions import build_where, chunk_book, iter_collection
+from services.vector_backends import ChromaBackend, NumpyBackend, matches_where
+from benchmarks.concurrency_benchmark import percentile
+
+DIMENSIONS = 384
+
+
+def hashed_embeddings(texts):
+    vectors = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            digest = zlib.crc32(token.encode("utf-8"))
+            vectors[row, digest % DIMENSIONS] += 1.0 if digest & 1 << 31 else -1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def model_embeddings(texts):
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(Config.EMBEDDING_MODEL, device="cpu")
+    return model.encode(texts, batch_size=64, normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+
+def load_corpus(data_dir: str, limit: int):
+    processor = DocumentProcessor(chunk_size=Config.CHUNK_SIZE, chunk_overlap=Config.CHUNK_OVERLAP)
+    chunks = {}
+    for doc in processor.iter_all_data(data_dir):
+        chunks.setdefault(DocumentProcessor.chunk_id(doc), doc)
+        if limit and len(chunks) >= limit:
+            break
+    ids = list(chunks)
+    return ids, [chunks[i].page_content for i in ids], [chunks[i].metadata for i in ids]
+
+
+def open_backend(name: str, work_dir: str):
+    if name == "chroma":
+        client = chromadb.PersistentClient(path=str(Path(work_dir) / "chroma"), settings=Settings(anonymized_telemetry=False))
+        return ChromaBackend(client, "conformance")
+    if name == "numpy":
+        return NumpyBackend(str(Path(work_dir) / "numpy"), dimensions=DIMENSIONS)
+    raise ValueError(f"Unknown backend: {name}")
+
+
+def latency_stats(latencies):
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+class Checks:
+    def __init__(self):
+        self.results = {}
+
+    def check(self, name: str, passed: bool, detail=None):
+        self.results[name] = "ok" if passed else f"FAILED: {detail}"
+
+    @property
+    def failed(self):
+        return [name for name, result in self.results.items() if result != "ok"]
+
+
+def run_backend(name, work_dir, ids, texts, metadatas, vectors, queries, truth, books, args):
+    backend = open_backend(name, work_dir)
+    checks = Checks()
+    rng = np.random.default_rng(1)
+    report = {}
+
+    start = time.perf_counter()
+    for i in range(0, len(ids), args.batch_size):
+        backend.add(ids[i:i + args.batch_size], vectors[i:i + args.batch_size],
+                    texts[i:i + args.batch_size], metadatas[i:i + args.batch_size])
+    write_s = time.perf_counter() - start
+    start = time.perf_counter()
+    backend.persist()
+    report["write"] = {
+        "chunks_per_s": round(len(ids) / write_s, 1),
+        "persist_s": round(time.perf_counter() - start, 3),
+    }
+    checks.check("count_after_add", backend.count() == len(ids), backend.count())
+
+    sample = [ids[i] for i in rng.choice(len(ids), min(50, len(ids)), replace=False)]
+    position = {chunk_id: i for i, chunk_id in enumerate(ids)}
+    found = backend.get(ids=sample, include=["documents", "metadatas"])
+    checks.check("get_by_ids", sorted(found["ids"]) == sorted(sample) and all(
+        content == texts[position[chunk_id]] and metadata == metadatas[position[chunk_id]]
+        for chunk_id, content, metadata in zip(found["ids"], found["documents"], found["metadatas"])
+    ), f"{len(found['ids'])}/{len(sample)} ids")
+
+    paged = [chunk_id for page in iter_collection(backend, include=[], page_size=997) for chunk_id in page["ids"]]
+    checks.check("paged_get_covers_all", len(paged) == len(set(paged)) == len(ids), len(paged))
+
+    book = books[0]
+    where = build_where(book)
+    found = backend.get(where=where, include=["metadatas"])
+    expected = sum(chunk_book(metadata) == book for metadata in metadatas)
+    checks.check("get_where", len(found["ids"]) == expected, f"{len(found['ids'])} != {expected}")
+
+    target = sample[0]
+    backend.add([target], vectors[position[target]:position[target] + 1], ["replaced by add"], [metadatas[position[target]]])
+    checks.check("add_keeps_existing", backend.get(ids=[target])["documents"] == [texts[position[target]]])
+    backend.upsert([target], vectors[position[target]:position[target] + 1], ["replaced by upsert"], [metadatas[position[target]]])
+    checks.check("upsert_replaces", backend.get(ids=[target])["documents"] == ["replaced by upsert"]
+                 and backend.count() == len(ids))
+
+    hits = backend.search(vectors[position[sample[1]]], args.k)
+    scores = [score for _, score in hits]
+    checks.check("self_match_first", bool(hits) and scores[0] >= 0.999, scores[:1])
+    checks.check("scores_descending", scores == sorted(scores, reverse=True) and all(-1.001 <= s <= 1.001 for s in scores), scores)
+
+    filters = [build_where(book), build_where(books[-1]), {"$or": [build_where(books[0]), build_where(books[-1])]}]
+    chapter = next((metadata.get("chapter") for metadata in metadatas if chunk_book(metadata) == book and metadata.get("chapter")), None)
+    if chapter:
+        filters.append(build_where(book, chapter))
+    bad = [
+        where for where in filters
+        for query in queries[:10]
+        for doc, _ in backend.search(query, args.k, where)
+        if not matches_where(doc.metadata, where)
+    ]
+    checks.check("filtered_search_matches_where", not bad, bad[:1])
+
+    latencies, overlaps = [], []
+    for query, expected_ids in zip(queries, truth):
+        start = time.perf_counter()
+        hits = backend.search(query, args.k)
+        latencies.append(time.perf_counter() - start)
+        returned = {DocumentProcessor.chunk_id(doc) for doc, _ in hits}
+        overlaps.append(len(returned & expected_ids) / len(expected_ids))
+    report["search"] = {**latency_stats(latencies), "overlap_with_exact": round(float(np.mean(overlaps)), 3)}
+
+    latencies = []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        backend.search(query, args.k, build_where(books[i % len(books)]))
+        latencies.append(time.perf_counter() - start)
+    report["filtered_search"] = latency_stats(latencies)
+
+    latencies = []
+    for i in range(0, len(queries)):
+        batch = [ids[j] for j in rng.choice(len(ids), args.k, replace=False)]
+        start = time.perf_counter()
+        backend.get(ids=batch)
+        latencies.append(time.perf_counter() - start)
+    report["get_by_ids"] = latency_stats(latencies)
+
+    deleted = sample[2:12]
+    backend.delete(deleted)
+    backend.persist()
+    checks.check("delete", backend.count() == len(ids) - len(deleted) and not backend.get(ids=deleted)["ids"],
+                 backend.count())
+    hits = backend.search(vectors[position[deleted[0]]], args.k)
+    checks.check("deleted_not_searchable", deleted[0] not in {DocumentProcessor.chunk_id(doc) for doc, _ in hits})
+
+    start = time.perf_counter()
+    reopened = open_backend(name, work_dir)
+    report["reopen_s"] = round(time.perf_counter() - start, 3)
+    checks.check("reopen_count", reopened.count() == len(ids) - len(deleted), reopened.count())
+    checks.check("reopen_keeps_upsert", reopened.get(ids=[target])["documents"] == ["replaced by upsert"])
+
+    report["checks"] = checks.results
+    return report, checks.failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="chroma,numpy")
+    parser.add_argument("--data", default=str(project_root / "data"))
+    parser.add_argument("--limit", type=int, default=0, help="max chunks to load (0 = whole corpus)")
+    parser.add_argument("--model", action="store_true", help="embed with EMBEDDING_MODEL instead of hashing")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=Config.TOP_K_RETRIEVAL)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    ids, texts, metadatas = load_corpus(args.data, args.limit)
+    start = time.perf_counter()
+    vectors = model_embeddings(texts) if args.model else hashed_embeddings(texts)
+    embed_s = time.perf_counter() - start
+    books = sorted({chunk_book(metadata) for metadata in metadatas} - {None})
+
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(ids), args.queries, replace=False)]
+    queries = queries + rng.normal(0, 0.02, queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = [set(ids[row] for row in np.argsort(vectors @ query)[::-1][:args.k]) for query in queries]
+
+    results, failures = {}, {}
+    for name in args.backends.split(","):
+        work_dir = tempfile.mkdtemp(prefix=f"backend_{name}_")
+        try:
+            results[name], failed = run_backend(name, work_dir, ids, texts, metadatas, vectors, queries, truth, books, args)
+            if failed:
+                failures[name] = failed
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps({
+        "chunks": len(ids),
+        "books": len(books),
+        "embeddings": Config.EMBEDDING_MODEL if args.model else "hashed",
+        "embed_s": round(embed_s, 2),
+        "k": args.k,
+        "queries": args.queries,
+        "backends": results,
+        "failures": failures,
+    }, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
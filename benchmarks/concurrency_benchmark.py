@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for RAGPipeline.process_query with stubbed backends.
+
+Runs the same workload twice: once with every blocking backend call executed
+inline on the event loop (the old behaviour) and once through the executor
+pools in `services.executors`. Reports p50/p99 latency and throughput.
+
+Usage:
+    python benchmarks/concurrency_benchmark.py --clients 50 --requests 4
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from models.database import QueryRequest
+from services import executors
+from benchmarks.stubs import build_stub_pipeline
+
+
+async def _run_inline(func, *args, **kwargs):
+    return func(*args, **kwargs)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_load(pipeline, clients: int, requests_per_client: int):
+    latencies = []
+
+    async def client(client_id: int):
+        for i in range(requests_per_client):
+            request = QueryRequest(query=f"what is dharma ({client_id}-{i})", mode="expert")
+            start = time.perf_counter()
+            await pipeline.process_query(request, user_id=str(client_id))
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=4, help="requests per client")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--translate-latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    # A fresh pipeline per run, so the second one does not start with warm caches.
+    # The batchers keep their own runner, so the inline one is passed explicitly.
+    pooled_run_io, pooled_run_inference = executors.run_io, executors.run_inference
+    executors.run_io = executors.run_inference = _run_inline
+    try:
+        pipeline = build_stub_pipeline(
+            llm_latency=args.llm_latency, translate_latency=args.translate_latency, runner=_run_inline
+        )
+        before = await run_load(pipeline, args.clients, args.requests)
+    finally:
+        executors.run_io, executors.run_inference = pooled_run_io, pooled_run_inference
+
+    pipeline = build_stub_pipeline(llm_latency=args.llm_latency, translate_latency=args.translate_latency)
+    after = await run_load(pipeline, args.clients, args.requests)
+    executors.shutdown_executors()
+
+    print(json.dumps({
+        "clients": args.clients,
+        "inference_pool_size": Config.INFERENCE_POOL_SIZE,
+        "io_pool_size": Config.IO_POOL_SIZE,
+        "before_inline": before,
+        "after_pooled": after,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
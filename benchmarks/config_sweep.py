@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality vs. latency and index size over a grid of CHUNK_SIZE,
+CHUNK_OVERLAP, TOP_K_RETRIEVAL and TOP_K_RERANK, as a gate for config changes.
+
+For every (chunk size, overlap) pair the corpus in data/ is chunked and
+indexed into its own store under --work-dir, the same way
+knowledge_base_loader.py does it (VectorStore.add_documents, then the BM25
+index). An index is reused on later runs while its settings, the models and
+the data files are unchanged.
+
+Chunk embeddings are cached on disk by model and chunk text. A chunk that
+comes out the same under several chunkings is embedded once. This is common
+for verses shorter than the chunk size. The cache also carries over to later
+sweeps.
+
+For every top-k pair the labeled queries (see retrieval_benchmark.py) go
+through VectorStore.search_and_rerank with the query caches off. Each config
+reports recall@k, MRR, p50/p99 latency and index size. The cheapest config
+that meets --min-recall / --min-mrr is recommended, by p50 latency and then
+index size. The script exits with status 1 when the current Config is in the
+grid and misses the bar, or when no config meets it.
+
+With matplotlib installed, recall and MRR are plotted against p50 latency and
+against index size (--plot).
+
+Usage:
+    python benchmarks/config_sweep.py
+    python benchmarks/config_sweep.py --chunk-sizes 500 700 1000 --chunk-overlaps 70 140 \\
+        --top-k-retrieval 10 15 25 --top-k-rerank 3 5 --min-recall 0.8 --plot sweep.png
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services import executors
+from services.document_processor import DocumentProcessor
+from services.ingestion import file_checksum, list_data_files
+from services.vector_store import VectorStore
+from benchmarks.concurrency_benchmark import percentile
+from benchmarks.retrieval_benchmark import first_hit, load_labeled_queries
+
+
+class ChunkEmbeddingCache:
+    """
+    Chunk embeddings on disk, keyed by a hash of the chunk text, for one model.
+    New vectors are kept in memory until `save()`.
+    """
+
+    def __init__(self, path: str, model_name: str):
+        slug = hashlib.sha1(f"{model_name}|{Config.INFERENCE_BACKEND}".encode("utf-8")).hexdigest()[:12]
+        self.path = os.path.join(path, slug)
+        self.rows = {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.pending_vectors = []
+        self.hits = self.misses = 0
+        keys_path = os.path.join(self.path, "keys.json")
+        if os.path.exists(keys_path):
+            with open(keys_path, encoding="utf-8") as f:
+                self.rows = {key: row for row, key in enumerate(json.load(f))}
+            self.vectors = np.load(os.path.join(self.path, "vectors.npy"))
+
+    @staticmethod
+    def key(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return self.vectors[row] if row < len(self.vectors) else self.pending_vectors[row - len(self.vectors)]
+
+    def put(self, key: str, vector):
+        self.rows[key] = len(self.vectors) + len(self.pending_vectors)
+        self.pending_vectors.append(np.asarray(vector, dtype=np.float32))
+
+    def save(self):
+        if not self.pending_vectors:
+            return
+        pending = np.vstack(self.pending_vectors)
+        self.vectors = np.vstack([self.vectors, pending]) if len(self.vectors) else pending
+        self.pending_vectors = []
+        os.makedirs(self.path, exist_ok=True)
+        np.save(os.path.join(self.path, "vectors.npy"), self.vectors)
+        with open(os.path.join(self.path, "keys.json"), "w", encoding="utf-8") as f:
+            json.dump(sorted(self.rows, key=self.rows.get), f)
+
+
+class CachedEmbeddings:
+    """Wraps the embedding model during indexing; only chunks missing from the cache are encoded."""
+
+    def __init__(self, model, cache: ChunkEmbeddingCache):
+        self.model = model
+        self.cache = cache
+
+    def embed_documents(self, texts):
+        keys = [self.cache.key(text) for text in texts]
+        missing = {key: text for key, text in zip(keys, texts) if self.cache.get(key) is None}
+        self.cache.hits += len(texts) - len(missing)
+        self.cache.misses += len(missing)
+        if missing:
+            for key, vector in zip(missing, self.model.embed_documents(list(missing.values()))):
+                self.cache.put(key, vector)
+        return [self.cache.get(key).tolist() for key in keys]
+
+
+def directory_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return round(total / (1024 * 1024), 2)
+
+
+def data_fingerprint(data_dir: str) -> dict:
+    return {os.path.basename(path): file_checksum(path) for path in list_data_files(data_dir)}
+
+
+async def open_index(args, chunk_size: int, chunk_overlap: int, cache: ChunkEmbeddingCache, fingerprint: dict):
+    """VectorStore over the index for one chunking, built unless an up-to-date one exists."""
+    index_dir = os.path.join(args.work_dir, f"index_{chunk_size}_{chunk_overlap}")
+    manifest = {
+        "chunk_size": chunk_size, "chunk_overlap": chunk_overlap, "max_chunks": args.max_chunks,
+        "embedding_model": Config.EMBEDDING_MODEL, "inference_backend": Config.INFERENCE_BACKEND,
+        "vector_backend": Config.VECTOR_BACKEND, "data": fingerprint,
+    }
+    manifest_path = os.path.join(index_dir, "sweep_manifest.json")
+    reuse = False
+    if os.path.exists(manifest_path) and not args.rebuild:
+        with open(manifest_path, encoding="utf-8") as f:
+            reuse = json.load(f) == manifest
+    if not reuse:
+        shutil.rmtree(index_dir, ignore_errors=True)
+        os.makedirs(index_dir)
+
+    Config.CHROMA_DB_PATH = index_dir
+    vector_store = VectorStore()
+    await vector_store.initialize_vectorstore()
+    build = {"reused": reuse}
+    if not reuse:
+        hits, misses = cache.hits, cache.misses
+        processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        chunks = processor.iter_all_data(args.data)
+        if args.max_chunks:
+            chunks = itertools.islice(chunks, args.max_chunks)
+        model, start = vector_store.embedding_model, time.perf_counter()
+        vector_store.embedding_model = CachedEmbeddings(model, cache)
+        try:
+            await vector_store.add_documents(chunks)
+        finally:
+            vector_store.embedding_model = model
+        vector_store.build_lexical_index()
+        cache.save()
+        build.update({
+            "build_s": round(time.perf_counter() - start, 2),
+            "embeddings_cached": cache.hits - hits,
+            "embeddings_computed": cache.misses - misses,
+        })
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    build.update({"chunks": vector_store.backend.count(), "index_mb": directory_mb(index_dir)})
+    return vector_store, build
+
+
+async def evaluate(vector_store, labeled, top_k_retrieval: int, top_k_rerank: int, ks, repeat: int):
+    Config.TOP_K_RETRIEVAL, Config.TOP_K_RERANK = top_k_retrieval, top_k_rerank
+    ranks, latencies = [], []
+    for item in labeled:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = await vector_store.search_and_rerank(item["query"])
+            latencies.append(time.perf_counter() - start)
+        ranks.append(first_hit(results, item["relevant"]))
+    hits = [rank for rank in ranks if rank]
+    return {
+        **{f"recall@{k}": round(sum(1 for rank in hits if rank <= k) / len(ranks), 3) for k in ks},
+        "mrr": round(sum(1 / rank for rank in hits) / len(ranks), 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def passes(row: dict, args) -> bool:
+    return row[f"recall@{args.gate_k}"] >= args.min_recall and row["mrr"] >= args.min_mrr
+
+
+def plot(rows, args):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping the plot", file=sys.stderr)
+        return None
+
+    metrics = (f"recall@{args.gate_k}", "mrr")
+    figure, axes = plt.subplots(len(metrics), 2, figsize=(12, 5 * len(metrics)), squeeze=False)
+    for line, metric in enumerate(metrics):
+        for column, cost in enumerate(("p50_ms", "index_mb")):
+            ax = axes[line][column]
+            ax.scatter([row[cost] for row in rows], [row[metric] for row in rows],
+                       c=["tab:green" if row["passes"] else "tab:red" for row in rows])
+            for row in rows:
+                ax.annotate(row["name"], (row[cost], row[metric]), fontsize=7, xytext=(3, 3), textcoords="offset points")
+            ax.set_xlabel("p50 query latency (ms)" if cost == "p50_ms" else "index size (MB)")
+            ax.set_ylabel(metric)
+            ax.grid(alpha=0.3)
+    figure.suptitle("chunk size/overlap/top-k retrieval/top-k rerank (green: meets the bar)")
+    figure.tight_layout()
+    figure.savefig(args.plot, dpi=120)
+    return args.plot
+
+
+async def run(args):
+    labeled = load_labeled_queries(args.queries)
+    ks = sorted(set(args.k) | {args.gate_k})
+    fingerprint = data_fingerprint(args.data)
+    current = (Config.CHUNK_SIZE, Config.CHUNK_OVERLAP, Config.TOP_K_RETRIEVAL, Config.TOP_K_RERANK)
+    cache = ChunkEmbeddingCache(os.path.join(args.work_dir, "embeddings"), Config.EMBEDDING_MODEL)
+    indexes, rows = {}, []
+    for chunk_size, chunk_overlap in itertools.product(args.chunk_sizes, args.chunk_overlaps):
+        if chunk_overlap >= chunk_size:
+            continue
+        vector_store, build = await open_index(args, chunk_size, chunk_overlap, cache, fingerprint)
+        # Time retrieval, not the query caches
+        vector_store.embedding_cache.max_bytes = 0
+        vector_store.rerank_cache = None
+        await vector_store.search_and_rerank("warm up")
+        indexes[f"{chunk_size}/{chunk_overlap}"] = build
+        for top_k_retrieval, top_k_rerank in itertools.product(args.top_k_retrieval, args.top_k_rerank):
+            if top_k_rerank > top_k_retrieval:
+                continue
+            row = {
+                "name": f"{chunk_size}/{chunk_overlap}/{top_k_retrieval}/{top_k_rerank}",
+                "chunk_size": chunk_size, "chunk_overlap": chunk_overlap,
+                "top_k_retrieval": top_k_retrieval, "top_k_rerank": top_k_rerank,
+                **await evaluate(vector_store, labeled, top_k_retrieval, top_k_rerank, ks, args.repeat),
+                "chunks": build["chunks"], "index_mb": build["index_mb"],
+            }
+            row["passes"] = passes(row, args)
+            row["current"] = (chunk_size, chunk_overlap, top_k_retrieval, top_k_rerank) == current
+            rows.append(row)
+    executors.shutdown_executors()
+    Config.CHUNK_SIZE, Config.CHUNK_OVERLAP, Config.TOP_K_RETRIEVAL, Config.TOP_K_RERANK = current
+
+    passing = sorted((row for row in rows if row["passes"]), key=lambda row: (row["p50_ms"], row["index_mb"]))
+    current_row = next((row for row in rows if row["current"]), None)
+    return {
+        "queries": len(labeled),
+        "embedding_model": Config.EMBEDDING_MODEL,
+        "reranker_model": Config.RERANKER_MODEL,
+        "hybrid_search": Config.HYBRID_SEARCH_ENABLED,
+        "bar": {f"recall@{args.gate_k}": args.min_recall, "mrr": args.min_mrr},
+        "embedding_cache": {"hits": cache.hits, "misses": cache.misses, "entries": len(cache.rows)},
+        "indexes": indexes,
+        "results": rows,
+        "recommended": passing[0]["name"] if passing else None,
+        "current": current_row["name"] if current_row else None,
+        "current_passes": current_row["passes"] if current_row else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[500, Config.CHUNK_SIZE, 1000])
+    parser.add_argument("--chunk-overlaps", type=int, nargs="+", default=[70, Config.CHUNK_OVERLAP])
+    parser.add_argument("--top-k-retrieval", type=int, nargs="+", default=[10, Config.TOP_K_RETRIEVAL, 25])
+    parser.add_argument("--top-k-rerank", type=int, nargs="+", default=[Config.TOP_K_RERANK, 5])
+    parser.add_argument("--queries", default=str(project_root / "benchmarks" / "labeled_queries.jsonl"))
+    parser.add_argument("--data", default=str(project_root / "data"))
+    parser.add_argument("--work-dir", default=str(project_root / "sweep_indexes"),
+                        help="indexes and the chunk embedding cache")
+    parser.add_argument("--rebuild", action="store_true", help="rebuild indexes even if they are up to date")
+    parser.add_argument("--max-chunks", type=int, default=0, help="index only the first N chunks (smoke tests)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per query")
+    parser.add_argument("--min-recall", type=float, default=0.0)
+    parser.add_argument("--gate-k", type=int, default=Config.TOP_K_RERANK, help="k of the recall in the bar")
+    parser.add_argument("--min-mrr", type=float, default=0.0)
+    parser.add_argument("--plot", help="write recall/MRR vs. latency and index size to this image")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.plot:
+        report["plot"] = plot(report["results"], args)
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+    if report["recommended"] is None or report["current_passes"] is False:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
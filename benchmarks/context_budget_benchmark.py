@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Prompt size and end-to-end latency under the context builder's token budget.
+
+The labeled workload is replayed through the real RAGPipeline on the corpus,
+with Groq, Google Translate and MongoDB replaced by the seeded stand-ins of
+e2e_benchmark.py, once per setting in --budgets:
+
+  * "off": no context builder; every reranked passage goes in whole;
+  * 0: low-score passages trimmed and chunk overlap removed, no budget;
+  * N: as 0, then query-relevant sentences kept to fit N tokens.
+
+Caches are off, so every request is retrieved and generated. The stand-in
+LLM takes --prefill-ms-per-1k longer for every thousand prompt tokens, on top
+of its sampled latency, to model prompt processing time.
+
+For each setting the JSON report gives context and prompt tokens (mean, p50,
+p95), passages per prompt, build time, how often a labeled relevant passage
+that retrieval found is still in the context, and request and generation
+latency. Tokens saved and latency changes are relative to "off".
+
+Usage:
+    python benchmarks/context_budget_benchmark.py
+    python benchmarks/context_budget_benchmark.py --budgets off 0 512 256 --prefill-ms-per-1k 300
+    python benchmarks/context_budget_benchmark.py --top-k-rerank 8
+    CONTEXT_TOKENIZER=hf-internal-testing/llama-tokenizer python benchmarks/context_budget_benchmark.py
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services import executors
+from benchmarks.stubs import LatencyDistribution, StubTranslator
+from benchmarks.e2e_benchmark import Replay, StageRecorder, build_pipeline, summarize, token_summary
+from benchmarks.retrieval_benchmark import first_hit, load_labeled_queries
+
+
+def relevant_kept(workload, replay: Replay, contexts: dict) -> dict:
+    """Of the labeled queries whose relevant passage was retrieved, the share still holding it in the prompt."""
+    found = kept = 0
+    for item in workload:
+        if not item.get("relevant"):
+            continue
+        retrieved = replay.retrieved.get((item["query"], item.get("book"), item.get("chapter")), [])
+        if first_hit(retrieved, item["relevant"]):
+            found += 1
+            kept += bool(first_hit(contexts.get(item["query"], []), item["relevant"]))
+    return {"retrieved": found, "kept": kept, "kept_rate": round(kept / found, 3) if found else None}
+
+
+def change_pct(value, baseline):
+    return round((value - baseline) / baseline * 100, 2) if baseline else None
+
+
+async def run(args):
+    workload = load_labeled_queries(args.workload)
+    items = [item for _ in range(args.repeat) for item in workload]
+
+    args.no_cache = True
+    if args.top_k_rerank:
+        Config.TOP_K_RERANK = args.top_k_rerank
+        Config.HYBRID_CANDIDATES = max(Config.HYBRID_CANDIDATES, args.top_k_rerank)
+    pipeline = build_pipeline(args)
+    await pipeline.initialize()
+    if not pipeline.vector_store.backend.count():
+        sys.exit("The vector store is empty; run knowledge_base_loader.py first")
+    recorder = StageRecorder()
+    recorder.install()
+
+    builder, llm = pipeline.context_builder, pipeline.llm_service.groq_client
+    build = builder.build
+    contexts, context_tokens = {}, []
+
+    def recording_build(query, docs):
+        passages = build(query, docs)
+        contexts[query] = passages
+        context_tokens.append(builder.context_tokens(passages))
+        return passages
+
+    builder.build = recording_build
+    if args.score_margin is not None:
+        builder.score_margin = args.score_margin
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="monk_context_") as audio_dir:
+        replay = Replay(pipeline, audio_dir)
+        await replay.run_item({"query": "warm up", "mode": "expert"})
+
+        for setting in args.budgets:
+            Config.CONTEXT_BUILDER_ENABLED = setting != "off"
+            builder.budget = 0 if setting == "off" else int(setting)
+            for key in builder.counters:
+                builder.counters[key] = 0
+            replay.latencies.clear()
+            replay.retrieved.clear()
+            contexts.clear()
+            context_tokens.clear()
+            llm.prompt_tokens.clear()
+            recorder.clear()
+
+            # Every setting draws the same stand-in latencies
+            StubTranslator.latency = LatencyDistribution.parse(args.translate_latency, args.seed)
+            llm.latency = LatencyDistribution.parse(args.llm_latency, args.seed + 2)
+            shuffled = list(items)
+            random.Random(args.seed).shuffle(shuffled)
+            start = time.perf_counter()
+            await replay.closed_loop(shuffled, args.concurrency)
+            elapsed = time.perf_counter() - start
+
+            stats = builder.stats()
+            results[setting] = {
+                "context_tokens": token_summary(context_tokens),
+                "prompt_tokens": token_summary(llm.prompt_tokens),
+                "passages_per_prompt": round(sum(len(c) for c in contexts.values()) / len(contexts), 2) if contexts else None,
+                "compressed_rate": round(stats["compressed"] / stats["builds"], 3) if stats["builds"] else None,
+                "trimmed_by_score": stats["trimmed_by_score"],
+                "duplicates": stats["duplicates"],
+                "overlap_chars": stats["overlap_chars"],
+                "mean_build_ms": stats["mean_build_ms"],
+                "relevant": relevant_kept(workload, replay, contexts),
+                "errors": replay.errors,
+                "throughput_rps": round(len(replay.latencies["query"]) / elapsed, 2),
+                "query": summarize(replay.latencies["query"]),
+                "generation": summarize(recorder.samples["generation"]),
+            }
+    executors.shutdown_executors()
+
+    if "off" in results:
+        off = results["off"]
+        for setting, result in results.items():
+            if setting == "off":
+                continue
+            result["vs_off"] = {
+                "prompt_tokens_saved": round(off["prompt_tokens"]["mean"] - result["prompt_tokens"]["mean"], 1),
+                "prompt_tokens_change_pct": change_pct(result["prompt_tokens"]["mean"], off["prompt_tokens"]["mean"]),
+                "query_p50_change_pct": change_pct(result["query"]["p50_ms"], off["query"]["p50_ms"]),
+                "query_p99_change_pct": change_pct(result["query"]["p99_ms"], off["query"]["p99_ms"]),
+                "generation_p50_change_pct": change_pct(result["generation"]["p50_ms"], off["generation"]["p50_ms"]),
+            }
+
+    return {
+        "workload": {"file": args.workload, "items": len(workload), "repeat": args.repeat, "seed": args.seed},
+        "config": {
+            "tokenizer": Config.CONTEXT_TOKENIZER or "estimate", "score_margin": builder.score_margin,
+            "chunk_size": Config.CHUNK_SIZE, "chunk_overlap": Config.CHUNK_OVERLAP,
+            "top_k_rerank": Config.TOP_K_RERANK, "hybrid_search": Config.HYBRID_SEARCH_ENABLED,
+            "llm_latency": args.llm_latency, "prefill_ms_per_1k": args.prefill_ms_per_1k,
+            "concurrency": args.concurrency,
+        },
+        "settings": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", default=str(project_root / "benchmarks" / "labeled_queries.jsonl"))
+    parser.add_argument("--budgets", nargs="+", default=["off", "0", "1536", "768", "512", "384", "256"])
+    parser.add_argument("--score-margin", type=float, help="override CONTEXT_SCORE_MARGIN")
+    parser.add_argument("--top-k-rerank", type=int, help="override TOP_K_RERANK, the passages retrieval hands over")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", default="lognormal:0.6,0.35")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=200.0,
+                        help="extra LLM latency per thousand prompt tokens")
+    parser.add_argument("--translate-latency", default="lognormal:0.25,0.3")
+    parser.add_argument("--transcribe-latency", default="uniform:0.3,0.8")
+    parser.add_argument("--mongo-latency", default="uniform:0.002,0.01")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Offline end-to-end benchmark of RAGPipeline on the real corpus.
+
+Retrieval is real: the embedder, cross-encoder, vector store and lexical
+index built from data/ by knowledge_base_loader.py. Everything outside the
+process is replaced by the deterministic stand-ins in benchmarks/stubs.py:
+
+  * Groq chat completions, streaming and Whisper, where the answer is
+    built from the retrieved context and a transcription is the text of
+    the uploaded file;
+  * Google Translate;
+  * MongoDB, as an in-memory database behind the real ChatService.
+
+Each stand-in sleeps for a latency drawn from a seeded distribution
+("fixed:S", "uniform:LO,HI", "normal:MEAN,SD" or "lognormal:MEDIAN,SIGMA").
+With --prefill-ms-per-1k, the LLM stand-in also takes longer on longer prompts.
+
+The workload is a JSONL file with one request per line:
+    {"query": ..., "mode": "expert" | "beginner", "book": ..., "chapter": ...,
+     "voice": false, "stream": false, "relevant": [spec, ...]}
+Only "query" is required, so benchmarks/labeled_queries.jsonl works as it is.
+Lines with "relevant" are scored for recall@k and MRR on the reranked
+passages handed to the context builder (see retrieval_benchmark.py for the
+spec format).
+
+Requests are replayed by --concurrency closed-loop clients or, with --rate,
+as an open-loop Poisson arrival process. The JSON report holds throughput,
+request latency by kind, per-stage latency percentiles from services.metrics,
+prompt sizes and context builder figures, RSS memory, and retrieval quality.
+With --baseline, it also holds the relative change of the main figures
+against an earlier report.
+
+Usage:
+    python benchmarks/e2e_benchmark.py
+    python benchmarks/e2e_benchmark.py --concurrency 16 --repeat 3 --output e2e.json
+    python benchmarks/e2e_benchmark.py --rate 5 --llm-latency lognormal:0.8,0.4 --baseline e2e.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from bson import ObjectId
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from database.connection import mongodb
+from models.database import QueryRequest
+from services import executors
+from services.metrics import STAGE_SECONDS, metrics
+from benchmarks.stubs import InMemoryDatabase, LatencyDistribution, StubGroqClient, StubTranslator
+from benchmarks.concurrency_benchmark import percentile
+from benchmarks.retrieval_benchmark import first_hit, load_labeled_queries
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+    except (OSError, ValueError):
+        return 0.0
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(latencies) -> dict:
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def token_summary(counts) -> dict:
+    if not counts:
+        return {"count": 0}
+    return {
+        "count": len(counts),
+        "mean": round(sum(counts) / len(counts), 1),
+        "p50": percentile(counts, 50),
+        "p95": percentile(counts, 95),
+    }
+
+
+class StageRecorder:
+    """Keeps every stage duration that services.metrics observes, for exact percentiles."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.observe = metrics.observe
+
+    def __call__(self, name, value, **labels):
+        if name == STAGE_SECONDS:
+            self.samples[labels["stage"]].append(value)
+        self.observe(name, value, **labels)
+
+    def install(self):
+        metrics.enabled = True
+        metrics.observe = self
+
+    def clear(self):
+        self.samples.clear()
+        metrics.reset()
+
+
+def build_pipeline(args):
+    """The real RAGPipeline with Groq, Google Translate and MongoDB replaced by seeded stand-ins."""
+    import services.llm_service as llm_module
+    from services.rag_pipeline import RAGPipeline
+
+    seeds = iter(range(args.seed, args.seed + 4))
+    StubTranslator.latency = LatencyDistribution.parse(args.translate_latency, next(seeds))
+    llm_module.GoogleTranslator = StubTranslator
+    mongodb.database = InMemoryDatabase(LatencyDistribution.parse(args.mongo_latency, next(seeds)))
+
+    pipeline = RAGPipeline()
+    pipeline.llm_service.groq_client = StubGroqClient(
+        LatencyDistribution.parse(args.llm_latency, next(seeds)),
+        transcribe_latency=LatencyDistribution.parse(args.transcribe_latency, next(seeds)),
+        prefill_ms_per_1k=args.prefill_ms_per_1k,
+    )
+    if args.no_cache:
+        pipeline.answer_cache = None
+        pipeline.vector_store.embedding_cache.max_bytes = 0
+        pipeline.vector_store.rerank_cache = None
+    return pipeline
+
+
+class Replay:
+    """Runs workload items through the pipeline, recording latency and the context each query got."""
+
+    def __init__(self, pipeline, audio_dir: str):
+        self.pipeline = pipeline
+        self.audio_dir = audio_dir
+        self.user_id = str(ObjectId())
+        self.latencies = defaultdict(list)
+        self.first_token = []
+        self.errors = 0
+        self.retrieved = {}
+        search_and_rerank = pipeline.vector_store.search_and_rerank
+
+        async def recording_search(query, book=None, chapter=None):
+            docs = await search_and_rerank(query, book, chapter)
+            self.retrieved[(query, book, chapter)] = docs
+            return docs
+
+        pipeline.vector_store.search_and_rerank = recording_search
+
+    async def run_item(self, item: dict):
+        request = QueryRequest(
+            query=item["query"], mode=item.get("mode", "expert"),
+            book=item.get("book"), chapter=item.get("chapter")
+        )
+        kind = "voice" if item.get("voice") else "stream" if item.get("stream") else "query"
+        start = time.perf_counter()
+        try:
+            if kind == "voice":
+                # The stand-in transcriber returns the file's text; process_voice_query deletes the file
+                fd, path = tempfile.mkstemp(suffix=".wav", dir=self.audio_dir)
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(item["query"])
+                await self.pipeline.process_voice_query(path, request.mode, self.user_id)
+            elif kind == "stream":
+                first = None
+                async for event in self.pipeline.stream_query(request, self.user_id):
+                    if first is None and event["event"] == "token":
+                        first = time.perf_counter() - start
+                self.first_token.append(first or time.perf_counter() - start)
+            else:
+                await self.pipeline.process_query(request, self.user_id)
+        except Exception:
+            self.errors += 1
+            return
+        self.latencies[kind].append(time.perf_counter() - start)
+
+    async def closed_loop(self, items, concurrency: int):
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        async def client():
+            while not queue.empty():
+                await self.run_item(queue.get_nowait())
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+
+    async def open_loop(self, items, rate: float, seed: int):
+        rng, tasks = random.Random(seed), []
+        for item in items:
+            tasks.append(asyncio.create_task(self.run_item(item)))
+            await asyncio.sleep(rng.expovariate(rate))
+        await asyncio.gather(*tasks)
+
+
+def retrieval_quality(replay: Replay, workload, ks) -> dict:
+    labeled = {
+        (item["query"], item.get("book"), item.get("chapter")): item["relevant"]
+        for item in workload if item.get("relevant")
+    }
+    ranks = [first_hit(replay.retrieved.get(key, []), relevant) for key, relevant in labeled.items()]
+    if not ranks:
+        return {"labeled_queries": 0}
+    hits = [rank for rank in ranks if rank]
+    return {
+        "labeled_queries": len(ranks),
+        # Answer-cache and verse-lookup hits skip retrieval and count as misses
+        "scored_queries": sum(1 for key in labeled if key in replay.retrieved),
+        **{f"recall@{k}": round(sum(1 for rank in hits if rank <= k) / len(ranks), 3) for k in ks},
+        "mrr": round(sum(1 / rank for rank in hits) / len(ranks), 3),
+    }
+
+
+def compare(report: dict, baseline: dict) -> dict:
+    """Relative change (%) of throughput, request latency and recall against a previous report."""
+    def pick(source):
+        figures = {"throughput_rps": source["throughput_rps"]}
+        for kind, summary in source["requests"].items():
+            for key in ("p50_ms", "p99_ms"):
+                if key in summary:
+                    figures[f"{kind}.{key}"] = summary[key]
+        figures.update({key: value for key, value in source["retrieval"].items() if key.startswith(("recall@", "mrr"))})
+        return figures
+
+    current, previous = pick(report), pick(baseline)
+    return {
+        key: {"baseline": previous[key], "current": value,
+              "change_pct": round((value - previous[key]) / previous[key] * 100, 2) if previous[key] else None}
+        for key, value in current.items() if key in previous
+    }
+
+
+async def run(args):
+    workload = load_labeled_queries(args.workload)
+    items = [item for _ in range(args.repeat) for item in workload]
+    random.Random(args.seed).shuffle(items)
+
+    rss_start = rss_mb()
+    model_start = time.perf_counter()
+    pipeline = build_pipeline(args)
+    await pipeline.initialize()
+    if not pipeline.vector_store.backend.count():
+        sys.exit("The vector store is empty; run knowledge_base_loader.py first")
+    recorder = StageRecorder()
+    recorder.install()
+    load_s = time.perf_counter() - model_start
+    rss_loaded = rss_mb()
+
+    with tempfile.TemporaryDirectory(prefix="monk_e2e_") as audio_dir:
+        replay = Replay(pipeline, audio_dir)
+        await replay.run_item({"query": "warm up", "mode": "expert"})
+        replay.latencies.clear()
+        replay.retrieved.clear()
+        recorder.clear()
+        pipeline.llm_service.groq_client.prompt_tokens.clear()
+
+        start = time.perf_counter()
+        if args.rate:
+            await replay.open_loop(items, args.rate, args.seed)
+        else:
+            await replay.closed_loop(items, args.concurrency)
+        elapsed = time.perf_counter() - start
+    executors.shutdown_executors()
+
+    completed = sum(len(latencies) for latencies in replay.latencies.values())
+    report = {
+        "workload": {"file": args.workload, "items": len(workload), "repeat": args.repeat, "seed": args.seed},
+        "load": {"rate_rps": args.rate} if args.rate else {"concurrency": args.concurrency},
+        "stand_ins": {
+            "llm_latency": args.llm_latency, "translate_latency": args.translate_latency,
+            "transcribe_latency": args.transcribe_latency, "mongo_latency": args.mongo_latency,
+            "prefill_ms_per_1k": args.prefill_ms_per_1k,
+        },
+        "config": {
+            "embedding_model": Config.EMBEDDING_MODEL, "reranker_model": Config.RERANKER_MODEL,
+            "inference_backend": Config.INFERENCE_BACKEND, "vector_backend": Config.VECTOR_BACKEND,
+            "hybrid_search": Config.HYBRID_SEARCH_ENABLED, "top_k_retrieval": Config.TOP_K_RETRIEVAL,
+            "top_k_rerank": Config.TOP_K_RERANK, "caches": not args.no_cache,
+            "context_builder": Config.CONTEXT_BUILDER_ENABLED, "context_token_budget": Config.CONTEXT_TOKEN_BUDGET,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "completed": completed,
+        "errors": replay.errors,
+        "throughput_rps": round(completed / elapsed, 2),
+        "requests": {
+            "all": summarize([l for latencies in replay.latencies.values() for l in latencies]),
+            **{kind: summarize(latencies) for kind, latencies in sorted(replay.latencies.items())},
+        },
+        "stages": {stage: summarize(samples) for stage, samples in sorted(recorder.samples.items())},
+        "prompt_tokens": token_summary(pipeline.llm_service.groq_client.prompt_tokens),
+        "context": pipeline.context_builder.stats(),
+        "memory": {
+            "rss_start_mb": rss_start, "rss_loaded_mb": rss_loaded, "rss_end_mb": rss_mb(),
+            "peak_rss_mb": peak_rss_mb(), "load_s": round(load_s, 2),
+        },
+        "retrieval": retrieval_quality(replay, workload, args.k),
+    }
+    if replay.first_token:
+        report["requests"]["stream_first_token"] = summarize(replay.first_token)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", default=str(project_root / "benchmarks" / "labeled_queries.jsonl"))
+    parser.add_argument("--repeat", type=int, default=1, help="times the workload is replayed (shuffled)")
+    parser.add_argument("--concurrency", type=int, default=8, help="closed-loop clients")
+    parser.add_argument("--rate", type=float, default=0.0, help="open-loop arrivals per second instead of clients")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency", default="lognormal:0.6,0.35")
+    parser.add_argument("--translate-latency", default="lognormal:0.25,0.3")
+    parser.add_argument("--transcribe-latency", default="uniform:0.3,0.8")
+    parser.add_argument("--mongo-latency", default="uniform:0.002,0.01")
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0.0,
+                        help="extra LLM latency per thousand prompt tokens")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--no-cache", action="store_true", help="disable the answer, embedding and rerank caches")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["vs_baseline"] = compare(report, json.load(f))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Resilience benchmark for services/groq_client.py against the local mock
+Groq API in benchmarks/mock_groq_server.py.
+
+The mock server is started in a subprocess with the given fault rates
+(429s, 503s, slow responses and, with --rpm, a per-model quota). The same
+burst of --requests chat completions, --concurrency at a time, is then sent
+by a fresh AsyncGroqClient under each scenario:
+
+  * no_retries: one attempt, no hedging (what a bare SDK call gives);
+  * retries: up to GROQ_MAX_RETRIES retries with jittered backoff;
+  * retries_hedged: retries plus a hedged request after --hedge-after seconds;
+  * client_quota: as retries_hedged with the client's requests-per-minute
+    bucket set to the server quota (only with --rpm);
+  * stream: streamed completions with retries.
+
+For each scenario the JSON report gives the success rate, latency
+percentiles of the successful calls, the client's counters (retries,
+rate_limited, hedges, hedge_wins, quota_wait_s, quota_rejected) and what the
+server saw. Calls rejected by --quota-max-wait count as failures.
+
+Usage:
+    python benchmarks/groq_client_benchmark.py
+    python benchmarks/groq_client_benchmark.py --requests 400 --rate-limit-rate 0.2 --slow-rate 0.1
+    python benchmarks/groq_client_benchmark.py --rpm 300 --scenarios retries_hedged client_quota
+"""
+
+import argparse
+import asyncio
+import json
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services.groq_client import AsyncGroqClient, GroqQuotaExceeded
+from benchmarks.concurrency_benchmark import percentile
+
+SCENARIOS = {
+    "no_retries": {"GROQ_MAX_RETRIES": 0, "GROQ_HEDGE_AFTER": 0, "GROQ_REQUESTS_PER_MINUTE": 0},
+    "retries": {"GROQ_HEDGE_AFTER": 0, "GROQ_REQUESTS_PER_MINUTE": 0},
+    "retries_hedged": {"GROQ_REQUESTS_PER_MINUTE": 0},
+    "client_quota": {},
+    "stream": {"GROQ_REQUESTS_PER_MINUTE": 0},
+}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, port: int) -> subprocess.Popen:
+    command = [
+        sys.executable, str(project_root / "benchmarks" / "mock_groq_server.py"), "--port", str(port),
+        "--latency", str(args.latency), "--rate-limit-rate", str(args.rate_limit_rate),
+        "--error-rate", str(args.error_rate), "--slow-rate", str(args.slow_rate), "--slow-s", str(args.slow_s),
+        "--retry-after", str(args.retry_after), "--rpm", str(args.rpm), "--seed", str(args.seed),
+    ]
+    server = subprocess.Popen(command)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/stats", timeout=1.0)
+            return server
+        except httpx.TransportError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Mock Groq server did not start")
+
+
+async def run_scenario(name: str, args, server_url: str) -> dict:
+    overrides = {
+        "GROQ_MAX_RETRIES": args.max_retries, "GROQ_HEDGE_AFTER": args.hedge_after,
+        "GROQ_MODEL_CONCURRENCY": args.model_concurrency, "GROQ_REQUESTS_PER_MINUTE": args.rpm,
+        "GROQ_TOKENS_PER_MINUTE": 0, "GROQ_QUOTA_SHARES": 1, "GROQ_QUOTA_MAX_WAIT": args.quota_max_wait,
+        **SCENARIOS[name],
+    }
+    for key, value in overrides.items():
+        setattr(Config, key, value)
+
+    client = AsyncGroqClient(api_key="mock", base_url=f"{server_url}/openai/v1")
+    async with httpx.AsyncClient(base_url=server_url) as control:
+        await control.post("/stats/reset")
+
+    gate = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+
+    async def call(index: int):
+        nonlocal failures
+        messages = [{"role": "user", "content": f"What does the Gita say about duty? ({index})"}]
+        async with gate:
+            start = time.perf_counter()
+            try:
+                if name == "stream":
+                    async for _ in client.stream_chat_completion(messages, args.model, max_tokens=256):
+                        pass
+                else:
+                    await client.chat_completion(messages, args.model, max_tokens=256)
+            except (httpx.HTTPError, GroqQuotaExceeded):
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    async with httpx.AsyncClient(base_url=server_url) as control:
+        server = (await control.get("/stats")).json()
+    stats = client.stats()
+    stats.pop("in_flight")
+    await client.aclose()
+
+    return {
+        "success_rate": round(len(latencies) / args.requests, 4),
+        "failures": failures,
+        "wall_s": round(elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "client": stats,
+        "server": server,
+    }
+
+
+async def run(args, server_url: str) -> dict:
+    scenarios = args.scenarios or [name for name in SCENARIOS if name != "client_quota" or args.rpm]
+    return {name: await run_scenario(name, args, server_url) for name in scenarios}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=6,
+                        help="calls in flight from the callers' side; below --model-concurrency leaves room to hedge")
+    parser.add_argument("--model", default=Config.LLM_MODEL)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS))
+    parser.add_argument("--max-retries", type=int, default=3)
+    parser.add_argument("--hedge-after", type=float, default=1.0)
+    parser.add_argument("--quota-max-wait", type=float, default=0.0,
+                        help="GROQ_QUOTA_MAX_WAIT for the client; 0 queues every call")
+    parser.add_argument("--model-concurrency", type=int, default=Config.GROQ_MODEL_CONCURRENCY)
+    parser.add_argument("--latency", type=float, default=0.2, help="mock server response time")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.03)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-s", type=float, default=3.0)
+    parser.add_argument("--retry-after", type=float, default=0.3)
+    parser.add_argument("--rpm", type=int, default=0, help="server-side quota per model, 0 for none")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    port = free_port()
+    server = start_server(args, port)
+    try:
+        report = asyncio.run(run(args, f"http://127.0.0.1:{port}"))
+    finally:
+        server.terminate()
+        server.wait()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Query throughput with embedding and reranking in the API process
+(INFERENCE_MODE=local) vs. in the inference sidecar over a Unix socket
+(INFERENCE_MODE=sidecar).
+
+Each of --processes API-like processes runs --clients concurrent clients.
+Each request embeds its query and reranks --pairs (query, chunk) pairs
+the way VectorStore does: through local MicroBatchers in local mode, and with
+the client's async calls on the event loop in sidecar mode. It then does --handler-ms of
+pure-Python work on the event loop, standing in for request handling that
+competes with inference for the GIL. In local mode every process loads its
+own models. In sidecar mode a single `services.inference_server` process
+serves them all and batches across processes. Its batch stats are reported.
+
+Usage:
+    python benchmarks/inference_sidecar_benchmark.py
+    python benchmarks/inference_sidecar_benchmark.py --processes 4 --clients 16 --requests 20 --handler-ms 5
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services import executors, model_registry
+from services.batching import MicroBatcher
+from services.document_processor import DocumentProcessor
+from services.inference_client import InferenceClient
+from benchmarks.concurrency_benchmark import percentile
+from benchmarks.retrieval_benchmark import load_labeled_queries
+
+
+def load_workload(queries_path: str, data_dir: str, pairs: int):
+    queries = [item["query"] for item in load_labeled_queries(queries_path)]
+    processor = DocumentProcessor(chunk_size=Config.CHUNK_SIZE, chunk_overlap=Config.CHUNK_OVERLAP)
+    passages = []
+    for doc in processor.iter_all_data(data_dir):
+        passages.append(doc.page_content)
+        if len(passages) >= pairs * 4:
+            break
+    return queries, passages
+
+
+def busy(ms: float):
+    end = time.perf_counter() + ms / 1000
+    while time.perf_counter() < end:
+        pass
+
+
+async def run_clients(mode: str, socket_path: str, args, queries, passages, barrier):
+    if mode == "sidecar":
+        # As in VectorStore: async calls on the loop, batched by the sidecar rather than in the process
+        sidecar = InferenceClient(socket_path)
+        embed, rerank = sidecar.aembed, sidecar.apredict
+    else:
+        embedder, reranker = model_registry.load_local_embedding_model(), model_registry.load_local_reranker()
+        embedder.embed_documents(["warm up"])
+        reranker.predict([("warm up", "warm up")])
+        embed = MicroBatcher(embedder.embed_documents, Config.EMBED_MAX_BATCH_SIZE, Config.EMBED_BATCH_WAIT_MS).submit
+        rerank = MicroBatcher(
+            lambda pairs: [float(s) for s in reranker.predict(pairs, batch_size=max(len(pairs), 1))],
+            Config.RERANK_MAX_BATCH_SIZE, Config.RERANK_BATCH_WAIT_MS
+        ).submit
+    latencies = []
+    # Start every process's clients together, after the local models have loaded
+    barrier.wait()
+    started = time.time()
+
+    async def client(client_id: int):
+        for i in range(args.requests):
+            query = f"{queries[(client_id + i) % len(queries)]} ({os.getpid()}-{client_id}-{i})"
+            start = time.perf_counter()
+            await embed([query])
+            offset = (client_id * 7 + i) % max(len(passages) - args.pairs, 1)
+            await rerank([(query, passage) for passage in passages[offset:offset + args.pairs]])
+            busy(args.handler_ms)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(client(c) for c in range(args.clients)))
+    if mode == "sidecar":
+        await sidecar.aclose()
+    executors.shutdown_executors(wait=False)
+    return latencies, started, time.time()
+
+
+def api_process(mode, socket_path, args, queries, passages, barrier, results):
+    results.put(asyncio.run(run_clients(mode, socket_path, args, queries, passages, barrier)))
+
+
+def run_mode(mode: str, socket_path: str, args, queries, passages):
+    spawn = multiprocessing.get_context("spawn")
+    barrier, results = spawn.Barrier(args.processes), spawn.Queue()
+    processes = [
+        spawn.Process(target=api_process, args=(mode, socket_path, args, queries, passages, barrier, results))
+        for _ in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    runs = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    latencies = [latency for run, _, _ in runs for latency in run]
+    elapsed = max(end for _, _, end in runs) - min(start for _, start, _ in runs)
+    return {
+        "requests": len(latencies),
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def start_sidecar(socket_path: str, timeout: float):
+    sidecar = subprocess.Popen(
+        [sys.executable, "-m", "services.inference_server", "--socket", socket_path],
+        cwd=project_root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    client, start = InferenceClient(socket_path), time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            client.http.get("/health")
+            return sidecar, client
+        except Exception:
+            if sidecar.poll() is not None:
+                raise RuntimeError("inference server exited during startup")
+            time.sleep(0.2)
+    sidecar.terminate()
+    raise RuntimeError("inference server did not start in time")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=2, help="API-like processes")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent clients per process")
+    parser.add_argument("--requests", type=int, default=10, help="requests per client")
+    parser.add_argument("--pairs", type=int, default=Config.TOP_K_RETRIEVAL, help="rerank pairs per request")
+    parser.add_argument("--handler-ms", type=float, default=2.0, help="pure-Python work per request")
+    parser.add_argument("--modes", nargs="+", default=["local", "sidecar"], choices=["local", "sidecar"])
+    parser.add_argument("--queries", default=str(project_root / "benchmarks" / "labeled_queries.jsonl"))
+    parser.add_argument("--data", default=str(project_root / "data"))
+    args = parser.parse_args()
+
+    queries, passages = load_workload(args.queries, args.data, args.pairs)
+    report = {"processes": args.processes, "clients": args.clients, "pairs": args.pairs, "handler_ms": args.handler_ms}
+    for mode in args.modes:
+        if mode == "local":
+            report["local"] = run_mode("local", "", args, queries, passages)
+            continue
+        socket_path = os.path.join(tempfile.mkdtemp(prefix="monk_sidecar_"), "inference.sock")
+        sidecar, client = start_sidecar(socket_path, timeout=300)
+        try:
+            report["sidecar"] = run_mode("sidecar", socket_path, args, queries, passages)
+            server_stats = client.stats()
+            report["sidecar"]["server_embed_batching"] = server_stats["embed_batching"]
+            report["sidecar"]["server_rerank_batching"] = server_stats["rerank_batching"]
+        finally:
+            client.close()
+            sidecar.terminate()
+            sidecar.wait(timeout=30)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Overhead of the per-stage latency metrics in `services.metrics`.
+
+Two measurements:
+
+  * span: the cost of one `metrics.span()` around an empty block, enabled vs.
+    disabled, in nanoseconds;
+  * pipeline: RAGPipeline.process_query with stubbed backends (see
+    benchmarks/stubs.py) under concurrent load, with metrics disabled and
+    enabled. Each round is run --rounds times in alternating order. The best
+    throughput and lowest p50/p99 of each setting are reported.
+
+The Prometheus output of the last enabled round is checked to contain every
+stage that the stub pipeline exercises.
+
+Usage:
+    python benchmarks/metrics_overhead_benchmark.py
+    python benchmarks/metrics_overhead_benchmark.py --clients 50 --requests 4 --rounds 5
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from services import executors
+from services.metrics import Metrics, STAGE_SECONDS, metrics
+from benchmarks.stubs import build_stub_pipeline
+from benchmarks.concurrency_benchmark import run_load
+
+EXPECTED_STAGES = ("embed", "dense_search", "rerank", "generation", "translation", "persistence", "mongo_write")
+
+
+def span_cost_ns(enabled: bool, iterations: int) -> float:
+    recorder = Metrics(enabled=enabled)
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        with recorder.span("bench"):
+            pass
+    return (time.perf_counter_ns() - start) / iterations
+
+
+async def run_pipeline(args):
+    pipeline = build_stub_pipeline(llm_latency=args.llm_latency, translate_latency=args.translate_latency)
+    # Warm the executors and batchers so the first round is not penalised
+    await run_load(pipeline, args.clients, 1)
+
+    runs = {"disabled": [], "enabled": []}
+    for round_index in range(args.rounds):
+        order = ("disabled", "enabled") if round_index % 2 == 0 else ("enabled", "disabled")
+        for setting in order:
+            metrics.enabled = setting == "enabled"
+            metrics.reset()
+            # Same queries every round; embed them again rather than hit the embedding cache
+            pipeline.vector_store.embedding_cache.clear()
+            runs[setting].append(await run_load(pipeline, args.clients, args.requests))
+            if metrics.enabled:
+                exposition = metrics.render()
+    executors.shutdown_executors()
+
+    summary = {
+        setting: {
+            "throughput_rps": max(run["throughput_rps"] for run in results),
+            "p50_ms": min(run["p50_ms"] for run in results),
+            "p99_ms": min(run["p99_ms"] for run in results),
+        }
+        for setting, results in runs.items()
+    }
+    disabled, enabled = summary["disabled"], summary["enabled"]
+    summary["throughput_change_pct"] = round(
+        (enabled["throughput_rps"] - disabled["throughput_rps"]) / disabled["throughput_rps"] * 100, 2
+    )
+    summary["p50_delta_ms"] = round(enabled["p50_ms"] - disabled["p50_ms"], 1)
+    summary["p99_delta_ms"] = round(enabled["p99_ms"] - disabled["p99_ms"], 1)
+    summary["missing_stages"] = [
+        stage for stage in EXPECTED_STAGES if f'{STAGE_SECONDS}_count{{mode="expert",stage="{stage}"}}' not in exposition
+    ]
+    summary["exposition_lines"] = exposition.count("\n")
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=4, help="requests per client")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--iterations", type=int, default=200000, help="spans timed in the microbenchmark")
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--translate-latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    report = {
+        "span_ns": {
+            "disabled": round(span_cost_ns(False, args.iterations), 1),
+            "enabled": round(span_cost_ns(True, args.iterations), 1),
+        },
+        "pipeline": asyncio.run(run_pipeline(args)),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
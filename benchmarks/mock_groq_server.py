@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for Groq's OpenAI-compatible API, for exercising
+services/groq_client.py against the faults the real service shows under load.
+
+Serves, under /openai/v1:
+  * POST /chat/completions, plain or streamed as server-sent events;
+  * POST /audio/transcriptions, answering with the uploaded file's text.
+
+Faults are drawn from a seeded RNG per request:
+  * --rate-limit-rate: 429 with a Retry-After of --retry-after seconds;
+  * --error-rate: 503;
+  * --slow-rate: the response takes --slow-s instead of --latency;
+  * --rpm: a per-model requests-per-minute quota that refills continuously;
+    requests over it get a 429 whose Retry-After is the time until the next
+    request would be allowed.
+
+GET /stats returns what the server has seen, and POST /stats/reset clears it.
+
+Usage:
+    python benchmarks/mock_groq_server.py --port 8765
+    python benchmarks/mock_groq_server.py --rate-limit-rate 0.1 --slow-rate 0.05 --slow-s 5 --rpm 600
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+app = FastAPI(title="Mock Groq API")
+settings = argparse.Namespace(
+    latency=0.2, token_ms=5.0, rate_limit_rate=0.0, error_rate=0.0,
+    slow_rate=0.0, slow_s=5.0, retry_after=0.5, rpm=0, seed=0
+)
+rng = random.Random(0)
+seen = Counter()
+quotas = {}
+
+
+def fault(model: str):
+    """The error response this request gets, if any; also counts it."""
+    seen["requests"] += 1
+    if settings.rpm:
+        now = time.monotonic()
+        allowance, updated = quotas.get(model, (settings.rpm, now))
+        allowance = min(settings.rpm, allowance + (now - updated) * settings.rpm / 60)
+        if allowance < 1:
+            quotas[model] = (allowance, now)
+            seen["quota_429"] += 1
+            retry_after = (1 - allowance) * 60 / settings.rpm
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "requests"}},
+                status_code=429, headers={"retry-after": f"{retry_after:.2f}"}
+            )
+        quotas[model] = (allowance - 1, now)
+    roll = rng.random()
+    if roll < settings.rate_limit_rate:
+        seen["injected_429"] += 1
+        return JSONResponse(
+            {"error": {"message": "Rate limit reached", "type": "tokens"}},
+            status_code=429, headers={"retry-after": str(settings.retry_after)}
+        )
+    if roll < settings.rate_limit_rate + settings.error_rate:
+        seen["injected_503"] += 1
+        return JSONResponse({"error": {"message": "Service unavailable"}}, status_code=503)
+    return None
+
+
+def latency() -> float:
+    if rng.random() < settings.slow_rate:
+        seen["slow"] += 1
+        return settings.slow_s
+    return settings.latency
+
+
+def answer_words(messages) -> list:
+    prompt = messages[-1]["content"] if messages else ""
+    return f"Mock answer to: {prompt[:80]}".split()
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "")
+    rejected = fault(model)
+    if rejected is not None:
+        return rejected
+    delay, words = latency(), answer_words(body.get("messages", []))
+
+    if not body.get("stream"):
+        await asyncio.sleep(delay)
+        seen["completed"] += 1
+        return {
+            "id": f"chatcmpl-{seen['requests']}",
+            "object": "chat.completion",
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)},
+                         "finish_reason": "stop"}],
+        }
+
+    async def events():
+        await asyncio.sleep(delay)
+        for index, word in enumerate(words):
+            chunk = {"choices": [{"index": 0, "delta": {"content": word if index == 0 else f" {word}"}}]}
+            yield f"data: {json.dumps(chunk)}\n\n"
+            await asyncio.sleep(settings.token_ms / 1000)
+        seen["completed"] += 1
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/openai/v1/audio/transcriptions")
+async def transcriptions(file: UploadFile = File(...), model: str = Form(...),
+                         response_format: str = Form("json")):
+    rejected = fault(model)
+    if rejected is not None:
+        return rejected
+    text = (await file.read()).decode("utf-8", errors="replace")
+    await asyncio.sleep(latency())
+    seen["completed"] += 1
+    if response_format == "text":
+        return PlainTextResponse(text)
+    return {"text": text}
+
+
+@app.get("/stats")
+async def stats():
+    return dict(seen)
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    seen.clear()
+    quotas.clear()
+    return {"status": "reset"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before a normal response")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="gap between streamed words")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-s", type=float, default=5.0)
+    parser.add_argument("--retry-after", type=float, default=0.5)
+    parser.add_argument("--rpm", type=int, default=0, help="per-model requests per minute, 0 for no quota")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for name in vars(settings):
+        setattr(settings, name, getattr(args, name))
+    rng.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
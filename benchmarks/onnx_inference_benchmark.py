@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Accuracy parity and latency/throughput of the ONNX Runtime inference backend
+(INFERENCE_BACKEND=onnx, fp32 and dynamic int8) against the torch models.
+
+Parity, per ONNX variant:
+  * embedder: cosine similarity to the torch embedding of each corpus chunk
+    and labeled query, and overlap of each query's top-10 chunks;
+  * cross-encoder: max absolute score difference on (query, chunk) pairs,
+    top-1 agreement (up to --tie) and top-3 overlap of each query's reranked
+    candidates.
+A variant fails when its minimum cosine is below --min-cosine or its top-1
+rerank agreement is below --min-top1; the script then exits with status 1.
+
+Latency is measured per call at each batch size and thread count; throughput
+is items per second at the largest batch size.
+
+Usage:
+    python benchmarks/onnx_inference_benchmark.py
+    python benchmarks/onnx_inference_benchmark.py --texts 512 --threads 1 4 --batch-sizes 1 16 64 --export
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services.document_processor import DocumentProcessor
+from services.onnx_inference import OnnxCrossEncoder, OnnxEmbedder, export_model, model_dir
+from benchmarks.concurrency_benchmark import percentile
+from benchmarks.retrieval_benchmark import load_labeled_queries
+
+
+def load_texts(data_dir: str, count: int):
+    processor = DocumentProcessor(chunk_size=Config.CHUNK_SIZE, chunk_overlap=Config.CHUNK_OVERLAP)
+    texts = []
+    for doc in processor.iter_all_data(data_dir):
+        texts.append(doc.page_content)
+        if len(texts) >= count:
+            break
+    return texts
+
+
+def time_calls(call, items, batch_size, repeat):
+    latencies = []
+    for _ in range(repeat):
+        for i in range(0, len(items), batch_size):
+            start = time.perf_counter()
+            call(items[i:i + batch_size])
+            latencies.append(time.perf_counter() - start)
+    total = sum(latencies)
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "items_per_s": round(len(items) * repeat / total, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=str(project_root / "data"))
+    parser.add_argument("--queries", default=str(project_root / "benchmarks" / "labeled_queries.jsonl"))
+    parser.add_argument("--texts", type=int, default=256, help="corpus chunks to embed")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 0], help="intra-op threads (0 = runtime default)")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32])
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-top1", type=float, default=0.8)
+    parser.add_argument("--tie", type=float, default=1e-3, help="rerank score difference treated as a tie")
+    parser.add_argument("--export", action="store_true", help="re-export the ONNX models first")
+    args = parser.parse_args()
+
+    import torch
+    from sentence_transformers import CrossEncoder, SentenceTransformer
+
+    for model_name, kind in ((Config.EMBEDDING_MODEL, "embedder"), (Config.RERANKER_MODEL, "reranker")):
+        if args.export or not (Path(model_dir(model_name, kind)) / "meta.json").exists():
+            export_model(model_name, kind)
+
+    texts = load_texts(args.data, args.texts)
+    queries = [item["query"] for item in load_labeled_queries(args.queries)]
+    torch_embedder = SentenceTransformer(Config.EMBEDDING_MODEL, device="cpu")
+    torch_reranker = CrossEncoder(Config.RERANKER_MODEL, device="cpu")
+
+    reference_texts = torch_embedder.encode(texts, batch_size=32, convert_to_numpy=True)
+    reference_queries = torch_embedder.encode(queries, batch_size=32, convert_to_numpy=True)
+    neighbours = np.argsort(-(reference_queries @ reference_texts.T), axis=1)
+    reference_top10 = neighbours[:, :10]
+    pairs = [[(query, texts[j]) for j in neighbours[i, :Config.TOP_K_RETRIEVAL]] for i, query in enumerate(queries)]
+    reference_scores = [torch_reranker.predict(query_pairs) for query_pairs in pairs]
+
+    def cosine(a, b):
+        a = a / np.linalg.norm(a, axis=1, keepdims=True)
+        b = b / np.linalg.norm(b, axis=1, keepdims=True)
+        return (a * b).sum(axis=1)
+
+    parity, failures = {}, []
+    for quantized in (False, True):
+        name = "int8" if quantized else "fp32"
+        embedder = OnnxEmbedder.load_or_export(Config.EMBEDDING_MODEL, quantized=quantized)
+        reranker = OnnxCrossEncoder.load_or_export(Config.RERANKER_MODEL, quantized=quantized)
+        cosines = np.concatenate([
+            cosine(embedder.encode(texts), reference_texts), cosine(embedder.encode(queries), reference_queries)
+        ])
+        top10 = np.argsort(-(embedder.encode(queries) @ embedder.encode(texts).T), axis=1)[:, :10]
+        scores = [reranker.predict(query_pairs) for query_pairs in pairs]
+        # Agreement counts near-ties: the ONNX top-1 must score within --tie of the torch top-1 under torch
+        top1 = np.mean([b[np.argmax(a)] >= b.max() - args.tie for a, b in zip(scores, reference_scores)])
+        parity[name] = {
+            "embedding_cosine_mean": round(float(cosines.mean()), 5),
+            "embedding_cosine_min": round(float(cosines.min()), 5),
+            "retrieval_top10_overlap": round(float(np.mean([len(set(a) & set(b)) / 10 for a, b in zip(top10, reference_top10)])), 3),
+            "rerank_max_abs_diff": round(float(max(np.abs(a - b).max() for a, b in zip(scores, reference_scores))), 5),
+            "rerank_top1_agreement": round(float(top1), 3),
+            "rerank_top3_overlap": round(float(np.mean([
+                len(set(np.argsort(-a)[:3]) & set(np.argsort(-b)[:3])) / 3 for a, b in zip(scores, reference_scores)
+            ])), 3),
+        }
+        if cosines.min() < args.min_cosine or top1 < args.min_top1:
+            failures.append(name)
+
+    performance = []
+    rerank_pairs = [pair for query_pairs in pairs for pair in query_pairs]
+    for threads in args.threads:
+        torch.set_num_threads(threads or torch.get_num_threads())
+        variants = {
+            "torch": (lambda batch: torch_embedder.encode(batch, batch_size=len(batch), convert_to_numpy=True),
+                      lambda batch: torch_reranker.predict(batch, batch_size=len(batch))),
+        }
+        for quantized in (False, True):
+            embedder = OnnxEmbedder.load_or_export(Config.EMBEDDING_MODEL, quantized=quantized, intra_op_threads=threads)
+            reranker = OnnxCrossEncoder.load_or_export(Config.RERANKER_MODEL, quantized=quantized, intra_op_threads=threads)
+            variants["onnx_int8" if quantized else "onnx_fp32"] = (
+                lambda batch, model=embedder: model.encode(batch, batch_size=len(batch)),
+                lambda batch, model=reranker: model.predict(batch, batch_size=len(batch)),
+            )
+        for name, (embed, rerank) in variants.items():
+            embed(texts[:8])
+            rerank(rerank_pairs[:8])
+            for batch_size in args.batch_sizes:
+                performance.append({
+                    "backend": name,
+                    "threads": threads or "default",
+                    "batch_size": batch_size,
+                    "embed": time_calls(embed, texts, batch_size, args.repeat),
+                    "rerank": time_calls(rerank, rerank_pairs, batch_size, args.repeat),
+                })
+
+    print(json.dumps({
+        "embedding_model": Config.EMBEDDING_MODEL,
+        "reranker_model": Config.RERANKER_MODEL,
+        "texts": len(texts),
+        "queries": len(queries),
+        "rerank_pairs": len(rerank_pairs),
+        "parity": parity,
+        "performance": performance,
+        "failures": failures,
+    }, indent=2, ensure_ascii=False))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
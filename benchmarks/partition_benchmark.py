@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Latency of book-scoped vector search: a `where` filter over the global
+collection vs. the per-book partition collections built with
+PARTITION_BY_BOOK=true. Unfiltered global search is included as a baseline.
+
+Query vectors are stored chunk embeddings of each book plus a little noise,
+so no embedding model is needed. `overlap` is the fraction of the filtered
+global top-k that the partition search also returns.
+
+Usage:
+    python benchmarks/partition_benchmark.py
+    python benchmarks/partition_benchmark.py --build --queries 100 --k 15
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services.partitions import build_where, chunk_book, iter_collection, list_partitions, partition_name, rebuild_partitions
+from benchmarks.concurrency_benchmark import percentile
+
+
+def book_sizes(collection):
+    sizes = {}
+    for page in iter_collection(collection, include=["metadatas"]):
+        for metadata in page["metadatas"]:
+            book = chunk_book(metadata)
+            if book:
+                sizes[book] = sizes.get(book, 0) + 1
+    return sizes
+
+
+def sample_queries(collection, book: str, count: int, noise: float, rng) -> np.ndarray:
+    page = collection.get(where=build_where(book), limit=count, include=["embeddings"])
+    vectors = np.asarray(page["embeddings"], dtype=np.float32)
+    vectors += rng.normal(0, noise, vectors.shape).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def time_queries(collection, queries: np.ndarray, k: int, where=None):
+    latencies, results = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        found = collection.query(query_embeddings=[vector.tolist()], n_results=k, where=where, include=[])
+        latencies.append(time.perf_counter() - start)
+        results.append(found["ids"][0])
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(float(np.mean(latencies)) * 1000, 2),
+    }, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=50, help="queries per book")
+    parser.add_argument("--k", type=int, default=Config.TOP_K_RETRIEVAL)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--build", action="store_true", help="(re)build the partitions first")
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_collection(Config.COLLECTION_NAME)
+    if args.build:
+        rebuild_partitions(client, collection)
+    partitions = set(list_partitions(client))
+    if not partitions:
+        sys.exit("No per-book partitions found; rerun with --build or load with PARTITION_BY_BOOK=true")
+
+    rng = np.random.default_rng(0)
+    total = collection.count()
+    report = []
+    for book, size in sorted(book_sizes(collection).items(), key=lambda item: -item[1]):
+        name = partition_name(book)
+        if name not in partitions:
+            continue
+        partition = client.get_collection(name)
+        queries = sample_queries(collection, book, args.queries, args.noise, rng)
+
+        global_stats, _ = time_queries(collection, queries, args.k)
+        filtered_stats, filtered_ids = time_queries(collection, queries, args.k, where=build_where(book))
+        partition_stats, partition_ids = time_queries(partition, queries, args.k)
+        overlap = np.mean([
+            len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(filtered_ids, partition_ids)
+        ])
+        report.append({
+            "book": book,
+            "vectors_in_scope": size,
+            "scope_fraction": round(size / total, 3),
+            "global_unfiltered": global_stats,
+            "global_filtered": filtered_stats,
+            "partition": partition_stats,
+            "speedup_vs_filtered": round(filtered_stats["p50_ms"] / max(partition_stats["p50_ms"], 1e-6), 2),
+            "overlap": round(float(overlap), 3),
+        })
+
+    print(json.dumps({
+        "collection": Config.COLLECTION_NAME,
+        "total_vectors": total,
+        "queries_per_book": args.queries,
+        "k": args.k,
+        "books": report,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
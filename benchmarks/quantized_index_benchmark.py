@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Memory footprint, load time, latency and recall of the in-process quantized
+index (VECTOR_BACKEND=quantized) against the Chroma HNSW search.
+
+Every variant (int8 / float16, exact scan / IVF) is built from the
+embeddings already stored in the collection into a temporary directory.
+Query vectors are stored chunk embeddings plus a little noise, so no
+embedding model is needed. Recall@k is measured against an exact float32
+brute-force search over the same vectors.
+
+`rss_mb` is the growth of the process RSS after opening the index and
+running every query, i.e. the pages that were actually touched.
+
+Usage:
+    python benchmarks/quantized_index_benchmark.py
+    python benchmarks/quantized_index_benchmark.py --queries 200 --k 15 --ivf-lists 128
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services.quantized_index import QuantizedIndex
+from benchmarks.concurrency_benchmark import percentile
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def latency_stats(latencies):
+    return {
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def recall(found, truth) -> float:
+    return round(float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(found, truth)])), 3)
+
+
+def run_variant(path: str, queries: np.ndarray, truth, k: int, nprobe: int):
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    index = QuantizedIndex.load(path)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    report = {"load_ms": round(load_ms, 2)}
+    for rescore in (False, True):
+        latencies, found = [], []
+        for vector in queries:
+            start = time.perf_counter()
+            hits = index.search(vector, k, nprobe=nprobe, rescore=rescore)
+            latencies.append(time.perf_counter() - start)
+            found.append([index.ids[row] for row, _ in hits])
+        report["rescored" if rescore else "quantized_only"] = {**latency_stats(latencies), "recall": recall(found, truth)}
+    report["rss_mb"] = round(rss_mb() - rss_before, 1)
+    report["disk_mb"] = {
+        name: round(size / 2**20, 2) for name, size in index.disk_bytes().items() if name.endswith((".npy", ".jsonl"))
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=Config.TOP_K_RETRIEVAL)
+    parser.add_argument("--noise", type=float, default=0.02)
+    parser.add_argument("--ivf-lists", type=int, default=0, help="IVF lists for the IVF variants (default: 4*sqrt(n))")
+    parser.add_argument("--nprobe", type=int, default=Config.QUANTIZED_INDEX_NPROBE)
+    args = parser.parse_args()
+
+    client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH, settings=Settings(anonymized_telemetry=False))
+    collection = client.get_collection(Config.COLLECTION_NAME)
+    work_dir = tempfile.mkdtemp(prefix="quantized_index_")
+    try:
+        records = list(QuantizedIndex.iter_collection(collection))
+        ids = [record[0] for record in records]
+        matrix = np.asarray([record[1] for record in records], dtype=np.float32)
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        rng = np.random.default_rng(0)
+        queries = matrix[rng.choice(len(matrix), args.queries, replace=False)]
+        queries = queries + rng.normal(0, args.noise, queries.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        truth = [[ids[row] for row in np.argsort(matrix @ query)[::-1][:args.k]] for query in queries]
+        float32_mb = round(matrix.nbytes / 2**20, 2)
+        del matrix
+
+        latencies, found = [], []
+        for vector in queries:
+            start = time.perf_counter()
+            result = collection.query(query_embeddings=[vector.tolist()], n_results=args.k, include=[])
+            latencies.append(time.perf_counter() - start)
+            found.append(result["ids"][0])
+        chroma = {**latency_stats(latencies), "recall": recall(found, truth)}
+
+        ivf_lists = args.ivf_lists or int(4 * np.sqrt(len(ids)))
+        variants = {}
+        for dtype in ("int8", "float16"):
+            for lists in (0, ivf_lists):
+                name = f"{dtype}_{'ivf' + str(lists) if lists else 'exact'}"
+                path = str(Path(work_dir) / name)
+                meta = QuantizedIndex.build(records, path, dtype=dtype, ivf_lists=lists, keep_float32=True)
+                variants[name] = {"build_s": meta["build_s"], **run_variant(path, queries, truth, args.k, args.nprobe)}
+
+        print(json.dumps({
+            "collection": Config.COLLECTION_NAME,
+            "vectors": len(ids),
+            "queries": args.queries,
+            "k": args.k,
+            "nprobe": args.nprobe,
+            "float32_matrix_mb": float32_mb,
+            "chroma_hnsw": chroma,
+            "quantized": variants,
+        }, indent=2))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Rerank score cache and adaptive reranking (RERANK_ADAPTIVE) against the
+real collection and cross-encoder.
+
+For every labeled query the candidates are retrieved once, then reranked:
+  * in full, with the cache disabled (the reference ranking);
+  * adaptively for each (skip gap, shortlist margin) setting, reporting the
+    skip and shortlist rates, cross-encoder pairs avoided, latency and the
+    agreement with full rerank: top-1 match and overlap of the top-k sets;
+  * in full twice with the cache enabled, reporting the hit rate and the
+    latency of the second (cached) pass.
+
+Label recall@k (see retrieval_benchmark.py) is reported for each variant.
+
+Usage:
+    python benchmarks/rerank_adaptive_benchmark.py
+    python benchmarks/rerank_adaptive_benchmark.py --gaps 0.05 0.1 0.2 --margins 0 0.05 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services import executors
+from services.rerank_cache import RerankCache
+from services.vector_store import VectorStore
+from benchmarks.concurrency_benchmark import percentile
+from benchmarks.retrieval_benchmark import first_hit, load_labeled_queries
+
+
+def result_ids(results):
+    return [(item["metadata"].get("source_file"), item["content"]) for item in results]
+
+
+async def rerank_pass(vector_store, items, dense_scores):
+    latencies, outputs = [], []
+    for query, candidates, scores in items:
+        start = time.perf_counter()
+        outputs.append(await vector_store.rerank_documents(query, candidates, Config.TOP_K_RERANK, scores if dense_scores else None))
+        latencies.append(time.perf_counter() - start)
+    return outputs, latencies
+
+
+def summarize(outputs, latencies, labeled, reference=None):
+    ranks = [first_hit(output, item["relevant"]) for output, item in zip(outputs, labeled)]
+    summary = {
+        f"label_recall@{Config.TOP_K_RERANK}": round(sum(1 for rank in ranks if rank) / len(ranks), 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+    }
+    if reference is not None:
+        pairs = [(result_ids(a), result_ids(b)) for a, b in zip(outputs, reference)]
+        summary["top1_agreement"] = round(sum(a[:1] == b[:1] for a, b in pairs) / len(pairs), 3)
+        summary["overlap_with_full"] = round(sum(len(set(a) & set(b)) / max(len(set(b)), 1) for a, b in pairs) / len(pairs), 3)
+    return summary
+
+
+def reset_counters(vector_store):
+    for name in vector_store.rerank_counters:
+        vector_store.rerank_counters[name] = 0
+    vector_store.rerank_latencies.clear()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=str(project_root / "benchmarks" / "labeled_queries.jsonl"))
+    parser.add_argument("--gaps", type=float, nargs="+", default=[0.05, 0.1, 0.15, 0.25])
+    parser.add_argument("--margins", type=float, nargs="+", default=[0.0, 0.05, 0.1])
+    args = parser.parse_args()
+
+    labeled = load_labeled_queries(args.queries)
+    vector_store = VectorStore()
+    await vector_store.initialize_vectorstore()
+    vector_store.rerank_cache = None
+
+    items = []
+    for item in labeled:
+        candidates, scores = await vector_store.retrieve_candidates(item["query"])
+        items.append((item["query"], candidates, scores))
+    await vector_store.rerank_documents("warm up", items[0][1])
+
+    full_outputs, full_latencies = await rerank_pass(vector_store, items, dense_scores=False)
+    full = summarize(full_outputs, full_latencies, labeled)
+    full["pairs_per_query"] = round(sum(len(candidates) for _, candidates, _ in items) / len(items), 1)
+
+    adaptive = []
+    for gap in args.gaps:
+        for margin in args.margins:
+            Config.RERANK_SKIP_GAP, Config.RERANK_SHORTLIST_MARGIN = gap, margin
+            reset_counters(vector_store)
+            outputs, latencies = await rerank_pass(vector_store, items, dense_scores=True)
+            stats = vector_store.rerank_stats()
+            adaptive.append({
+                "skip_gap": gap,
+                "shortlist_margin": margin,
+                "skip_rate": stats["skip_rate"],
+                "shortlist_rate": stats["shortlist_rate"],
+                "pairs_avoided": stats["pairs_avoided"],
+                **summarize(outputs, latencies, labeled, reference=full_outputs),
+            })
+
+    vector_store.rerank_cache = RerankCache()
+    reset_counters(vector_store)
+    await rerank_pass(vector_store, items, dense_scores=False)
+    outputs, latencies = await rerank_pass(vector_store, items, dense_scores=False)
+    cached = {**summarize(outputs, latencies, labeled, reference=full_outputs), **vector_store.rerank_cache.stats()}
+    executors.shutdown_executors()
+
+    print(json.dumps({
+        "queries": len(labeled),
+        "reranker_model": Config.RERANKER_MODEL,
+        "hybrid_search": Config.HYBRID_SEARCH_ENABLED,
+        "top_k_rerank": Config.TOP_K_RERANK,
+        "full_rerank": full,
+        "adaptive": adaptive,
+        "cached_second_pass": cached,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
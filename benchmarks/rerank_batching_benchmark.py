@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Rerank throughput under synthetic concurrency: one predict call per request
+vs. the MicroBatcher used by VectorStore.rerank_documents.
+
+By default the cross-encoder is a stub with a fixed per-call overhead plus a
+per-pair cost; pass --real to load Config.RERANKER_MODEL instead.
+
+Usage:
+    python benchmarks/rerank_batching_benchmark.py --clients 32 --requests 10
+    python benchmarks/rerank_batching_benchmark.py --real --wait-ms 8
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services import executors
+from services.batching import MicroBatcher
+from benchmarks.stubs import StubCrossEncoder, sample_documents
+from benchmarks.concurrency_benchmark import percentile
+
+
+async def run_load(score_pairs, clients: int, requests_per_client: int, pairs_per_request: int):
+    passages = [doc.page_content for doc in sample_documents(pairs_per_request)]
+    latencies = []
+
+    async def client(client_id: int):
+        for i in range(requests_per_client):
+            pairs = [(f"question {client_id}-{i}", passage) for passage in passages]
+            start = time.perf_counter()
+            await score_pairs(pairs)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(c) for c in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "pairs_per_second": round(len(latencies) * pairs_per_request / elapsed, 1),
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=10, help="rerank calls per client")
+    parser.add_argument("--pairs", type=int, default=Config.TOP_K_RETRIEVAL, help="pairs per rerank call")
+    parser.add_argument("--max-batch", type=int, default=Config.RERANK_MAX_BATCH_SIZE)
+    parser.add_argument("--wait-ms", type=float, default=Config.RERANK_BATCH_WAIT_MS)
+    parser.add_argument("--call-overhead-ms", type=float, default=20.0, help="stub only")
+    parser.add_argument("--per-pair-ms", type=float, default=0.5, help="stub only")
+    parser.add_argument("--real", action="store_true", help="use the real cross-encoder")
+    args = parser.parse_args()
+
+    if args.real:
+        from sentence_transformers import CrossEncoder
+        reranker = CrossEncoder(Config.RERANKER_MODEL)
+    else:
+        reranker = StubCrossEncoder(args.call_overhead_ms / 1000, args.per_pair_ms / 1000)
+
+    def predict(pairs):
+        return [float(score) for score in reranker.predict(pairs, batch_size=max(len(pairs), 1))]
+
+    async def unbatched(pairs):
+        return await executors.run_inference(predict, pairs)
+
+    batcher = MicroBatcher(predict, args.max_batch, args.wait_ms, name="rerank")
+
+    await unbatched([("warm", "up")])
+    before = await run_load(unbatched, args.clients, args.requests, args.pairs)
+    after = await run_load(batcher.submit, args.clients, args.requests, args.pairs)
+    executors.shutdown_executors()
+
+    print(json.dumps({
+        "backend": Config.RERANKER_MODEL if args.real else "stub",
+        "clients": args.clients,
+        "inference_pool_size": Config.INFERENCE_POOL_SIZE,
+        "unbatched": before,
+        "micro_batched": {**after, "batcher": batcher.stats()},
+        "speedup": round(after["pairs_per_second"] / before["pairs_per_second"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
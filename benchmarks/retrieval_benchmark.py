@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Recall@k and latency of dense, BM25 and hybrid (RRF-fused) retrieval against
+the real collection built by knowledge_base_loader.py.
+
+Each line of the labeled query file is {"query": ..., "relevant": [spec, ...]}
+where a spec matches a chunk when every key in spec["metadata"] equals the
+chunk's metadata and, if given, spec["contains"] appears in its text. A query
+counts as a hit at k if any of its first k candidates matches any spec.
+
+Usage:
+    python benchmarks/retrieval_benchmark.py
+    python benchmarks/retrieval_benchmark.py --k 1 5 15 --repeat 5 --rerank
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.append(str(project_root))
+
+from config.config import Config
+from services import executors
+from services.lexical_index import LexicalIndex
+from services.vector_store import VectorStore
+from benchmarks.concurrency_benchmark import percentile
+
+
+def load_labeled_queries(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def matches(doc, spec) -> bool:
+    metadata = doc.metadata if hasattr(doc, "metadata") else doc["metadata"]
+    content = doc.page_content if hasattr(doc, "page_content") else doc["content"]
+    if any(metadata.get(key) != value for key, value in spec.get("metadata", {}).items()):
+        return False
+    return spec.get("contains", "").lower() in content.lower()
+
+
+def first_hit(candidates, relevant) -> int:
+    """1-based rank of the first relevant candidate, or 0 if none"""
+    for rank, doc in enumerate(candidates, start=1):
+        if any(matches(doc, spec) for spec in relevant):
+            return rank
+    return 0
+
+
+async def evaluate(name, retrieve, labeled, ks, repeat):
+    ranks, latencies = [], []
+    for item in labeled:
+        for attempt in range(repeat):
+            start = time.perf_counter()
+            candidates = await retrieve(item["query"])
+            latencies.append(time.perf_counter() - start)
+        ranks.append(first_hit(candidates, item["relevant"]))
+
+    hits = [rank for rank in ranks if rank]
+    return {
+        "method": name,
+        **{f"recall@{k}": round(sum(1 for rank in hits if rank <= k) / len(ranks), 3) for k in ks},
+        "mrr": round(sum(1 / rank for rank in hits) / len(ranks), 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=str(project_root / "benchmarks" / "labeled_queries.jsonl"))
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10, 15])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per query (embedding and rerank caches disabled)")
+    parser.add_argument("--rerank", action="store_true", help="also score the reranked top results")
+    args = parser.parse_args()
+
+    labeled = load_labeled_queries(args.queries)
+
+    start = time.perf_counter()
+    index = LexicalIndex.load()
+    load_ms = round((time.perf_counter() - start) * 1000, 2)
+    if index is None:
+        sys.exit("No lexical index found; run knowledge_base_loader.py first")
+
+    vector_store = VectorStore()
+    await vector_store.initialize_vectorstore()
+    # Time the encoder on every run instead of measuring cache hits
+    vector_store.embedding_cache.max_bytes = 0
+    vector_store.rerank_cache = None
+    depth = max(args.k)
+
+    async def dense(query):
+        return await vector_store.similarity_search(query, depth)
+
+    async def lexical(query):
+        return await vector_store.lexical_search(query, depth)
+
+    async def hybrid(query):
+        return await vector_store.hybrid_search(query)
+
+    await dense("warm up")
+    results = [
+        await evaluate("dense", dense, labeled, args.k, args.repeat),
+        await evaluate("bm25", lexical, labeled, args.k, args.repeat),
+        await evaluate("hybrid_rrf", hybrid, labeled, args.k, args.repeat),
+    ]
+    if args.rerank:
+        async def dense_reranked(query):
+            return await vector_store.rerank_documents(query, await dense(query), Config.TOP_K_RERANK)
+
+        results.append(await evaluate("dense+rerank", dense_reranked, labeled, args.k, args.repeat))
+        results.append(await evaluate("hybrid+rerank", vector_store.search_and_rerank, labeled, args.k, args.repeat))
+    executors.shutdown_executors()
+
+    print(json.dumps({
+        "queries": len(labeled),
+        "embedding_model": Config.EMBEDDING_MODEL,
+        "top_k_retrieval": Config.TOP_K_RETRIEVAL,
+        "lexical_top_k": Config.LEXICAL_TOP_K,
+        "hybrid_candidates": Config.HYBRID_CANDIDATES,
+        "rrf_k": Config.RRF_K,
+        "lexical_index": {**index.stats(), "load_ms": load_ms},
+        "results": results,
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
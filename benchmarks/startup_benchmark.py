@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Import cost and time-to-ready of the API in eager and lazy startup modes.
+
+Imports: runs `python -X importtime -c "import <module>"` for `main` (what
+uvicorn pays before it can bind) and `services.rag_pipeline` (what the
+warm-up task imports), and reports wall time, the module's cumulative
+import time and the packages with the most self time.
+
+Serving (`--serve`): starts `uvicorn main:app` with LAZY_STARTUP=false and
+=true and polls `/system/live` and `/system/ready`, reporting the time from
+process start to the first live and ready responses and the per-component
+load times from `/system/ready`. Needs MongoDB at MONGODB_URL and the
+configured models; without MongoDB the lazy server stays live but never
+ready, and the eager server never binds.
+
+Usage:
+    python benchmarks/startup_benchmark.py
+    python benchmarks/startup_benchmark.py --serve --timeout 300
+"""
+
+import argparse
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+project_root = Path(__file__).resolve().parent.parent
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def measure_imports(module: str, top: int):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root, capture_output=True, text=True
+    )
+    wall_s = time.perf_counter() - start
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1]}
+    cumulative_us, self_by_package = 0, defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cum_us, _, name = match.groups()
+        self_by_package[name.split(".")[0]] += int(self_us)
+        if name == module:
+            cumulative_us = int(cum_us)
+    heaviest = sorted(self_by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "wall_s": round(wall_s, 3),
+        "cumulative_import_s": round(cumulative_us / 1e6, 3),
+        "heaviest_packages_s": {name: round(us / 1e6, 3) for name, us in heaviest},
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_serving(lazy: bool, timeout: float):
+    port = free_port()
+    env = {**os.environ, "LAZY_STARTUP": "true" if lazy else "false"}
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    report = {"time_to_live_s": None, "time_to_ready_s": None}
+    readiness = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=2.0) as client:
+            while time.perf_counter() - start < timeout and server.poll() is None:
+                try:
+                    if report["time_to_live_s"] is None and client.get("/system/live").status_code == 200:
+                        report["time_to_live_s"] = round(time.perf_counter() - start, 3)
+                    if report["time_to_live_s"] is not None:
+                        response = client.get("/system/ready")
+                        readiness = response.json()
+                        if response.status_code == 200:
+                            report["time_to_ready_s"] = round(time.perf_counter() - start, 3)
+                            break
+                        statuses = [component["status"] for component in readiness["components"].values()]
+                        if "failed" in statuses and "loading" not in statuses:
+                            break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.05)
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    if server.returncode not in (None, 0, -15) and report["time_to_live_s"] is None:
+        report["exit_code"] = server.returncode
+    if readiness:
+        report["components"] = readiness["components"]
+        report["server_time_to_ready_s"] = readiness["time_to_ready_s"]
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=10, help="packages to list by self import time")
+    parser.add_argument("--serve", action="store_true", help="also start the API and measure time-to-ready")
+    parser.add_argument("--timeout", type=float, default=180.0)
+    args = parser.parse_args()
+
+    report = {"imports": {module: measure_imports(module, args.top) for module in ("main", "services.rag_pipeline")}}
+    if args.serve:
+        report["serving"] = {
+            "eager": measure_serving(lazy=False, timeout=args.timeout),
+            "lazy": measure_serving(lazy=True, timeout=args.timeout),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
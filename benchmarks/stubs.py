@@ -0,0 +1,363 @@
+"""
+Stand-ins for the external backends used by the RAG pipeline.
+
+Each stub waits the same way the real client does: the Groq stub awaits
+like the async HTTP client, the others block in a synchronous call that
+releases the GIL. The benchmarks measure how the pipeline schedules work
+rather than how fast Groq or the models are.
+
+Latencies are either a fixed number of seconds or a `LatencyDistribution`
+such as "lognormal:0.6,0.35", drawn from a seeded generator so that runs
+are repeatable.
+"""
+
+import asyncio
+import copy
+import random
+import re
+import threading
+import time
+import zlib
+from collections import deque
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+from bson import ObjectId
+
+from langchain.docstore.document import Document
+from config.config import Config
+from models.database import ChatMessage
+from services.llm_service import LLMService
+from services.groq_client import AsyncGroqClient
+from services.vector_store import VectorStore
+from services.embedding_cache import EmbeddingCache
+from services.batching import MicroBatcher
+from services.context_builder import ContextBuilder
+from services.rag_pipeline import RAGPipeline
+
+
+class LatencyDistribution:
+    """
+    Seeded latency generator, parsed from "fixed:S", "uniform:LO,HI",
+    "normal:MEAN,SD" or "lognormal:MEDIAN,SIGMA" (seconds). A bare number is fixed.
+    Safe to sample from several threads.
+    """
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(self, kind: str = "fixed", params=(0.0,), seed: int = 0):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}', expected one of {self.KINDS}")
+        self.kind = kind
+        self.params = tuple(float(p) for p in params)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def parse(cls, spec: Union[str, float, "LatencyDistribution"], seed: int = 0) -> "LatencyDistribution":
+        if isinstance(spec, LatencyDistribution):
+            return spec
+        if isinstance(spec, (int, float)):
+            return cls("fixed", (spec,), seed)
+        kind, _, params = str(spec).partition(":")
+        if not params:
+            return cls("fixed", (kind,), seed)
+        return cls(kind, params.split(","), seed)
+
+    def sample(self) -> float:
+        with self.lock:
+            if self.kind == "fixed":
+                return self.params[0]
+            if self.kind == "uniform":
+                return self.rng.uniform(*self.params)
+            if self.kind == "normal":
+                return max(0.0, self.rng.gauss(*self.params))
+            median, sigma = self.params
+            return self.rng.lognormvariate(np.log(median), sigma)
+
+    def describe(self) -> str:
+        return f"{self.kind}:{','.join(f'{p:g}' for p in self.params)}"
+
+
+def sample_latency(latency: Union[float, LatencyDistribution]) -> float:
+    return latency.sample() if isinstance(latency, LatencyDistribution) else latency
+
+
+class StubGroqClient:
+    """
+    Mimics `services.groq_client.AsyncGroqClient` for chat completions (plain
+    and streamed) and Whisper transcriptions. The answer is built from the
+    prompt's context, so it is deterministic and varies with what retrieval
+    returned. A transcription is the text content of the uploaded file.
+
+    Answer generation takes `prefill_ms_per_1k` longer for every thousand
+    prompt tokens, and the prompt sizes are kept in `prompt_tokens`.
+    """
+
+    def __init__(self, latency: Union[float, LatencyDistribution],
+                 transcribe_latency: Optional[Union[float, LatencyDistribution]] = None,
+                 prefill_ms_per_1k: float = 0.0):
+        self.latency = latency
+        self.transcribe_latency = latency if transcribe_latency is None else transcribe_latency
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.prompt_tokens = []
+
+    @staticmethod
+    def _answer(messages) -> str:
+        prompt = messages[-1]["content"]
+        sources = re.findall(r"^Source: (.+)$", prompt, flags=re.MULTILINE)
+        passages = re.findall(r"^Content: (.+)$", prompt, flags=re.MULTILINE)
+        if not passages:
+            return "Dharma is one's righteous duty, as taught in the Bhagavad Gita."
+        cited = "; ".join(dict.fromkeys(source.strip() for source in sources[:3]))
+        return f"According to {cited}: {passages[0][:400].strip()}"
+
+    def _content(self, messages, model) -> str:
+        return self._answer(messages) if model == Config.LLM_MODEL else "Dharma, Karma, Atman"
+
+    def _latency(self, messages, model) -> float:
+        latency = sample_latency(self.latency)
+        if model != Config.LLM_MODEL:
+            return latency
+        tokens = AsyncGroqClient.estimate_tokens(messages, 0)
+        self.prompt_tokens.append(tokens)
+        return latency + tokens * self.prefill_ms_per_1k / 1e6
+
+    async def chat_completion(self, messages, model, **kwargs) -> str:
+        await asyncio.sleep(self._latency(messages, model))
+        return self._content(messages, model)
+
+    async def stream_chat_completion(self, messages, model, **kwargs):
+        await asyncio.sleep(self._latency(messages, model))
+        for word in re.findall(r"\S+\s*", self._content(messages, model)):
+            yield word
+
+    async def transcribe(self, audio: bytes, filename: str, model: str) -> str:
+        await asyncio.sleep(sample_latency(self.transcribe_latency))
+        return audio.decode("utf-8", errors="ignore").strip() or "what is dharma"
+
+    def stats(self):
+        return {}
+
+    async def aclose(self):
+        pass
+
+
+class StubTranslator:
+    """Mimics `deep_translator.GoogleTranslator`."""
+
+    latency: Union[float, LatencyDistribution] = 0.0
+
+    def __init__(self, source: str = "auto", target: str = "hi"):
+        self.target = target
+
+    def translate(self, text: str) -> str:
+        time.sleep(sample_latency(self.latency))
+        return f"[{self.target}] {text}"
+
+
+class StubEmbeddings:
+    """Mimics `HuggingFaceEmbeddings`; returns a deterministic 384-dim vector per text."""
+
+    def __init__(self, latency: float, dimensions: int = 384):
+        self.latency = latency
+        self.dimensions = dimensions
+
+    def _vector(self, text: str) -> List[float]:
+        rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+        vector = rng.standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._vector(text)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+
+class StubVectorBackend:
+    """Mimics a `VectorBackend`; the sleep stands in for the vector search."""
+
+    name = "stub"
+
+    def __init__(self, latency: float, documents: List[Document]):
+        self.latency = latency
+        self.documents = documents
+
+    def search(self, embedding, k: int, where=None):
+        time.sleep(self.latency)
+        return [(doc, 1.0 / (rank + 1)) for rank, doc in enumerate(self.documents[:k])]
+
+    def count(self) -> int:
+        return len(self.documents)
+
+    def stats(self):
+        return {"backend": self.name, "count": self.count()}
+
+
+class StubCrossEncoder:
+    """Mimics `sentence_transformers.CrossEncoder`."""
+
+    def __init__(self, latency: float, per_pair_latency: float = 0.0):
+        self.latency = latency
+        self.per_pair_latency = per_pair_latency
+
+    def predict(self, pairs, batch_size: int = 32):
+        # Fixed per-call overhead plus a smaller cost per pair, like a real forward pass
+        time.sleep(self.latency + self.per_pair_latency * len(pairs))
+        return [1.0 / (i % 15 + 1) for i in range(len(pairs))]
+
+
+class InMemoryChatService:
+    """Drop-in for `ChatService` that keeps sessions in a dict."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sessions = {}
+
+    async def create_chat_session(self, user_id: str, title: str = "New Chat", session_id: Optional[str] = None):
+        await asyncio.sleep(self.latency)
+        session_id = session_id or str(ObjectId())
+        self.sessions[session_id] = []
+        return SimpleNamespace(id=session_id, title=title)
+
+    async def add_message_to_session(self, session_id: str, user_id: str, message: ChatMessage) -> bool:
+        await asyncio.sleep(self.latency)
+        self.sessions.setdefault(session_id, []).append(message)
+        return True
+
+    def generate_session_title(self, first_message: str) -> str:
+        return first_message[:50] or "New Chat"
+
+
+class InMemoryCollection:
+    """
+    The subset of a Motor collection that `ChatService` writes with:
+    `insert_one`, `find_one` and `update_one` with `$set` / `$push`, matching
+    on equality. Documents are deep-copied in and out, as BSON encoding would.
+    """
+
+    def __init__(self, latency: Union[float, LatencyDistribution] = 0.0):
+        self.latency = latency
+        self.documents: Dict[Any, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _matches(document: Dict[str, Any], query: Dict[str, Any]) -> bool:
+        return all(document.get(key) == value for key, value in query.items())
+
+    def _find(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if "_id" in query:
+            document = self.documents.get(query["_id"])
+            return document if document is not None and self._matches(document, query) else None
+        return next((d for d in self.documents.values() if self._matches(d, query)), None)
+
+    async def insert_one(self, document: Dict[str, Any]):
+        await asyncio.sleep(sample_latency(self.latency))
+        document = copy.deepcopy(document)
+        document.setdefault("_id", ObjectId())
+        self.documents[document["_id"]] = document
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def find_one(self, query: Dict[str, Any]):
+        await asyncio.sleep(sample_latency(self.latency))
+        document = self._find(query)
+        return copy.deepcopy(document) if document is not None else None
+
+    async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]):
+        await asyncio.sleep(sample_latency(self.latency))
+        document = self._find(query)
+        if document is None:
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        for key, value in update.get("$set", {}).items():
+            document[key] = copy.deepcopy(value)
+        for key, value in update.get("$push", {}).items():
+            document.setdefault(key, []).append(copy.deepcopy(value))
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+
+class InMemoryDatabase:
+    """Stand-in for the Motor database returned by `get_database()`; collections are created on access."""
+
+    def __init__(self, latency: Union[float, LatencyDistribution] = 0.0):
+        self.latency = latency
+        self.collections: Dict[str, InMemoryCollection] = {}
+
+    def __getattr__(self, name: str) -> InMemoryCollection:
+        if name.startswith("_") or name in ("latency", "collections"):
+            raise AttributeError(name)
+        if name not in self.collections:
+            self.collections[name] = InMemoryCollection(self.latency)
+        return self.collections[name]
+
+    __getitem__ = __getattr__
+
+
+def sample_documents(n: int = 15) -> List[Document]:
+    return [
+        Document(
+            page_content=f"Passage {i} on dharma, karma and the duties of a householder.",
+            metadata={"book_name": "Bhagavad Gita", "chapter": f"Chapter {i % 18 + 1}"}
+        )
+        for i in range(n)
+    ]
+
+
+def build_stub_pipeline(
+    llm_latency: float = 0.3,
+    translate_latency: float = 0.15,
+    embed_latency: float = 0.01,
+    search_latency: float = 0.01,
+    rerank_latency: float = 0.03,
+    mongo_latency: float = 0.005,
+    runner=None,
+) -> RAGPipeline:
+    """
+    Build a `RAGPipeline` whose services are real but whose backends are stubs.
+    `runner` replaces `executors.run_inference` in the embed and rerank batchers.
+    """
+    import services.llm_service as llm_module
+
+    StubTranslator.latency = translate_latency
+    llm_module.GoogleTranslator = StubTranslator
+
+    llm_service = LLMService.__new__(LLMService)
+    llm_service.groq_client = StubGroqClient(llm_latency)
+
+    vector_store = VectorStore.__new__(VectorStore)
+    vector_store.embedding_model = StubEmbeddings(embed_latency)
+    vector_store.embedding_cache = EmbeddingCache()
+    vector_store.rerank_cache = None
+    vector_store.rerank_counters = {"queries": 0, "skipped": 0, "shortened": 0, "pairs_scored": 0,
+                                    "pairs_cached": 0, "pairs_avoided": 0, "score_seconds": 0.0}
+    vector_store.rerank_latencies = deque(maxlen=1000)
+    vector_store.embed_batcher = MicroBatcher(
+        vector_store._encode_queries, Config.EMBED_MAX_BATCH_SIZE, Config.EMBED_BATCH_WAIT_MS, "embed", runner
+    )
+    vector_store.backend = StubVectorBackend(search_latency, sample_documents())
+    vector_store.reranker = StubCrossEncoder(rerank_latency)
+    vector_store.rerank_batcher = MicroBatcher(
+        vector_store._predict_pairs, Config.RERANK_MAX_BATCH_SIZE, Config.RERANK_BATCH_WAIT_MS, "rerank", runner
+    )
+    vector_store.lexical_index = None
+    vector_store.lexical_index_mtime = None
+    vector_store.quantized_index = None
+    vector_store.quantized_index_mtime = None
+    vector_store.partition_stores = {}
+    vector_store.partition_names = set()
+    vector_store.partition_version = None
+
+    pipeline = RAGPipeline.__new__(RAGPipeline)
+    pipeline.vector_store = vector_store
+    pipeline.llm_service = llm_service
+    pipeline.chat_service = InMemoryChatService(mongo_latency)
+    pipeline.answer_cache = None
+    pipeline.context_builder = ContextBuilder()
+    pipeline.verse_index = None
+    pipeline.verse_index_version = None
+    pipeline.verse_index_lock = asyncio.Lock()
+    pipeline.route_counters = {"queries": 0, "verse_lookups": 0, "unresolved_references": 0, "ambiguous_references": 0}
+    pipeline.verse_lookup_latencies = deque(maxlen=1000)
+    pipeline.initialized = True
+    return pipeline
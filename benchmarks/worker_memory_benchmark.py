@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Memory per worker and per node for the pre-fork deployment (gunicorn.conf.py)
+with and without PRELOAD_MODELS, at several worker counts.
+
+For every combination a gunicorn server is started with LAZY_STARTUP=true,
+and `/system/ready` is polled until every worker reports its models loaded and
+warmed up. MongoDB is not required; its status is reported separately. Then
+/proc/<pid>/smaps_rollup is read for the master and each worker:
+
+  * rss: resident pages, counting shared pages in every process that maps them;
+  * pss: resident pages with shared ones split between their sharers, so the
+    PSS of all processes adds up to the memory the server really uses;
+  * uss: pages private to the process.
+
+`node_used_mb` is the drop in MemAvailable from before the server started.
+
+Usage:
+    python benchmarks/worker_memory_benchmark.py
+    python benchmarks/worker_memory_benchmark.py --workers 1 4 8 --modes preload per_worker --timeout 600
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+project_root = Path(__file__).resolve().parent.parent
+
+
+def meminfo_mb(field: str) -> float:
+    with open("/proc/meminfo") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def memory_mb(pid: int):
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": round(values.get("Rss", 0.0), 1),
+        "pss": round(values.get("Pss", 0.0), 1),
+        "uss": round(values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0), 1),
+    }
+
+
+def children(pid: int):
+    found = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name can contain spaces; the parent PID follows the closing parenthesis
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return found
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_workers(port: int, workers: int, timeout: float):
+    """PIDs of workers that reported every component except MongoDB ready, and the last MongoDB status."""
+    ready, mongo, start = set(), None, time.perf_counter()
+    while len(ready) < workers and time.perf_counter() - start < timeout:
+        try:
+            # A new connection per request, so the kernel spreads them over the workers
+            snapshot = httpx.get(f"http://127.0.0.1:{port}/system/ready", timeout=2.0).json()
+            components = snapshot["components"]
+            mongo = components["mongo"]["status"]
+            if all(component["status"] == "ready" for name, component in components.items() if name != "mongo"):
+                ready.add(snapshot["pid"])
+        except (httpx.TransportError, ValueError, KeyError):
+            pass
+        time.sleep(0.05)
+    return ready, mongo
+
+
+def run(mode: str, workers: int, timeout: float):
+    port = free_port()
+    env = {
+        **os.environ, "LAZY_STARTUP": "true", "WEB_WORKERS": str(workers),
+        "PRELOAD_MODELS": "true" if mode == "preload" else "false", "BIND": f"127.0.0.1:{port}",
+    }
+    available_before = meminfo_mb("MemAvailable")
+    start = time.perf_counter()
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=project_root, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        ready, mongo = wait_for_workers(port, workers, timeout)
+        time_to_ready = time.perf_counter() - start
+        worker_pids = children(master.pid)
+        report = {
+            "workers_ready": len(ready),
+            "time_to_ready_s": round(time_to_ready, 2) if len(ready) == workers else None,
+            "mongo": mongo,
+            "node_used_mb": round(available_before - meminfo_mb("MemAvailable"), 1),
+            "master": memory_mb(master.pid),
+        }
+        per_worker = [memory_mb(pid) for pid in worker_pids]
+        for key in ("rss", "pss", "uss"):
+            report[f"worker_{key}_mb"] = round(sum(m[key] for m in per_worker) / max(len(per_worker), 1), 1)
+        report["total_rss_mb"] = round(report["master"]["rss"] + sum(m["rss"] for m in per_worker), 1)
+        report["total_pss_mb"] = round(report["master"]["pss"] + sum(m["pss"] for m in per_worker), 1)
+        return report
+    finally:
+        master.send_signal(signal.SIGTERM)
+        try:
+            master.wait(timeout=60)
+        except subprocess.TimeoutExpired:
+            master.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--modes", nargs="+", default=["per_worker", "preload"], choices=["per_worker", "preload"])
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds to wait for all workers to warm up")
+    args = parser.parse_args()
+
+    results = {mode: {str(workers): run(mode, workers, args.timeout) for workers in args.workers} for mode in args.modes}
+    print(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
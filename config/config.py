@@ -59,6 +59,7 @@ class Config:
     
     # Vector Database
     CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
+    COLLECTION_NAME = "hindu_scriptures"
     
     # API Keys
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
@@ -85,4 +86,136 @@ class Config:
     CHUNK_SIZE = 700
     CHUNK_OVERLAP = 140
     TOP_K_RETRIEVAL = 15
-    TOP_K_RERANK = 3
\ No newline at end of file
+    TOP_K_RERANK = 3
+    
+    # Concurrency Settings
+    INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE", "2"))
+    IO_POOL_SIZE = int(os.getenv("IO_POOL_SIZE", "16"))
+    
+    # Post-generation branch timeouts (seconds)
+    TRANSLATION_TIMEOUT = float(os.getenv("TRANSLATION_TIMEOUT", "4"))
+    KEYWORDS_TIMEOUT = float(os.getenv("KEYWORDS_TIMEOUT", "4"))
+    PERSISTENCE_TIMEOUT = float(os.getenv("PERSISTENCE_TIMEOUT", "3"))
+    
+    # Answer Cache
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "86400"))
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.95"))
+    
+    # Query Embedding Cache
+    EMBEDDING_CACHE_MAX_BYTES = int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    
+    # Reranker Micro-batching
+    RERANK_MAX_BATCH_SIZE = int(os.getenv("RERANK_MAX_BATCH_SIZE", "64"))
+    RERANK_BATCH_WAIT_MS = float(os.getenv("RERANK_BATCH_WAIT_MS", "5"))
+    
+    # Query Embedding Micro-batching
+    EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "32"))
+    EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "3"))
+    
+    # Parallel Ingestion
+    INGEST_CHUNK_WORKERS = int(os.getenv("INGEST_CHUNK_WORKERS", str(min(4, os.cpu_count() or 1))))
+    INGEST_EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+    INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "512"))
+    INGEST_QUEUE_DEPTH = int(os.getenv("INGEST_QUEUE_DEPTH", "4"))
+    INGEST_SEGMENT_RECORDS = int(os.getenv("INGEST_SEGMENT_RECORDS", "2000"))
+    
+    # Hybrid Retrieval (BM25 + dense, fused with reciprocal rank fusion)
+    HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    LEXICAL_TOP_K = int(os.getenv("LEXICAL_TOP_K", "15"))
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "15"))
+    RRF_K = int(os.getenv("RRF_K", "60"))
+    BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+    BM25_B = float(os.getenv("BM25_B", "0.75"))
+    
+    # Verse Reference Lookup
+    VERSE_LOOKUP_ENABLED = os.getenv("VERSE_LOOKUP_ENABLED", "true").lower() == "true"
+    
+    # Scoped Retrieval
+    PARTITION_BY_BOOK = os.getenv("PARTITION_BY_BOOK", "false").lower() == "true"
+    LEXICAL_CHAPTER_OVERSAMPLE = int(os.getenv("LEXICAL_CHAPTER_OVERSAMPLE", "5"))
+    
+    # Vector Search Backend: "chroma", "numpy" (in-process exact search over a persisted float32 matrix),
+    # or "quantized" (Chroma storage, searched through the memory-mapped quantized index)
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+    QUANTIZED_INDEX_DTYPE = os.getenv("QUANTIZED_INDEX_DTYPE", "int8")
+    QUANTIZED_INDEX_IVF_LISTS = int(os.getenv("QUANTIZED_INDEX_IVF_LISTS", "0"))
+    QUANTIZED_INDEX_NPROBE = int(os.getenv("QUANTIZED_INDEX_NPROBE", "8"))
+    QUANTIZED_INDEX_RESCORE = os.getenv("QUANTIZED_INDEX_RESCORE", "true").lower() == "true"
+    QUANTIZED_RESCORE_FACTOR = int(os.getenv("QUANTIZED_RESCORE_FACTOR", "4"))
+    
+    # Rerank Score Cache and Adaptive Reranking
+    RERANK_CACHE_ENABLED = os.getenv("RERANK_CACHE_ENABLED", "true").lower() == "true"
+    RERANK_CACHE_MAX_ENTRIES = int(os.getenv("RERANK_CACHE_MAX_ENTRIES", "50000"))
+    RERANK_ADAPTIVE = os.getenv("RERANK_ADAPTIVE", "false").lower() == "true"
+    # Skip the cross-encoder when the top dense similarity leads the runner-up by at least this much
+    RERANK_SKIP_GAP = float(os.getenv("RERANK_SKIP_GAP", "0.15"))
+    # Otherwise only rerank candidates within this dense-similarity margin of the top one (0 = all)
+    RERANK_SHORTLIST_MARGIN = float(os.getenv("RERANK_SHORTLIST_MARGIN", "0.1"))
+    
+    # Inference Backend: "torch" (sentence-transformers) or "onnx" (ONNX Runtime, exported on first use)
+    INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")
+    ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "./onnx_models")
+    ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+    # 0 lets ONNX Runtime pick (one thread per physical core)
+    ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))
+    
+    # Startup: with LAZY_STARTUP the API binds immediately and loads models in a background
+    # warm-up task; /system/ready reports 503 until every component is loaded
+    LAZY_STARTUP = os.getenv("LAZY_STARTUP", "false").lower() == "true"
+    WARM_UP_INFERENCE = os.getenv("WARM_UP_INFERENCE", "true").lower() == "true"
+    # Backoff between MongoDB connection attempts during startup, doubling up to the max
+    STARTUP_RETRY_BASE = float(os.getenv("STARTUP_RETRY_BASE", "2"))
+    STARTUP_RETRY_MAX = float(os.getenv("STARTUP_RETRY_MAX", "60"))
+    
+    # Pre-fork deployment (gunicorn -c gunicorn.conf.py): load the models once in the master
+    # and share them copy-on-write with every worker
+    WEB_WORKERS = int(os.getenv("WEB_WORKERS", "4"))
+    PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "true").lower() == "true"
+    
+    # Inference Sidecar: "local" runs the models in the API process, "sidecar" sends embed and
+    # rerank calls to `python -m services.inference_server` over a Unix domain socket
+    INFERENCE_MODE = os.getenv("INFERENCE_MODE", "local")
+    INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET", "/tmp/monk_inference.sock")
+    INFERENCE_CLIENT_MAX_CONNECTIONS = int(os.getenv("INFERENCE_CLIENT_MAX_CONNECTIONS", "16"))
+    INFERENCE_CLIENT_TIMEOUT = float(os.getenv("INFERENCE_CLIENT_TIMEOUT", "30"))
+    
+    # Metrics: per-stage latency histograms, exported at /metrics in the Prometheus text format
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    
+    # Groq client: pooled async HTTP with per-model limits, retries and hedging
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+    GROQ_MAX_CONNECTIONS = int(os.getenv("GROQ_MAX_CONNECTIONS", "32"))
+    GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+    # Requests in flight per model
+    GROQ_MODEL_CONCURRENCY = int(os.getenv("GROQ_MODEL_CONCURRENCY", "8"))
+    # Per-model quota for the whole deployment; 0 disables a limit
+    GROQ_REQUESTS_PER_MINUTE = float(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+    GROQ_TOKENS_PER_MINUTE = float(os.getenv("GROQ_TOKENS_PER_MINUTE", "0"))
+    # The limiter runs in each process, so every process enforces 1/GROQ_QUOTA_SHARES of the
+    # quota; gunicorn.conf.py sets it to WEB_WORKERS. Raise it if other hosts share the API key.
+    GROQ_QUOTA_SHARES = int(os.getenv("GROQ_QUOTA_SHARES", "1"))
+    # A call that would wait longer than this for quota fails with 503 instead; 0 waits indefinitely
+    GROQ_QUOTA_MAX_WAIT = float(os.getenv("GROQ_QUOTA_MAX_WAIT", "10"))
+    GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+    # Full jitter: a retry waits uniform(0, min(max, base * 2 ** attempt)) seconds, or Retry-After if longer
+    GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "0.5"))
+    GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "8"))
+    # Send a second copy of a short completion still running after this many seconds; 0 disables
+    # hedging. Only calls with max_tokens up to GROQ_HEDGE_MAX_TOKENS are hedged, and never
+    # streams or transcriptions, since a hedge doubles the tokens spent.
+    GROQ_HEDGE_AFTER = float(os.getenv("GROQ_HEDGE_AFTER", "0"))
+    GROQ_HEDGE_MAX_TOKENS = int(os.getenv("GROQ_HEDGE_MAX_TOKENS", "256"))
+    
+    # Context builder: fits the reranked passages into a prompt token budget
+    CONTEXT_BUILDER_ENABLED = os.getenv("CONTEXT_BUILDER_ENABLED", "true").lower() == "true"
+    # Tokens of context (source lines included) per prompt; 0 only trims and dedupes.
+    # The largest config in benchmarks/config_sweep.py's default grid (CHUNK_SIZE 1000 x
+    # TOP_K_RERANK 5, about 1350 tokens with source lines) fits whole, so the retrieval
+    # that the sweep gates reaches the LLM uncompressed; sentences are only cut beyond that.
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1536"))
+    # Drop passages whose rerank score is this far below the top one's (0 keeps all)
+    CONTEXT_SCORE_MARGIN = float(os.getenv("CONTEXT_SCORE_MARGIN", "8"))
+    # Hugging Face tokenizer used to count tokens; empty estimates about 4 characters a token
+    CONTEXT_TOKENIZER = os.getenv("CONTEXT_TOKENIZER", "")
@@ -29,6 +29,11 @@ if not cookies.ready():
 # Constants
 # The new public URL for your deployed FastAPI backend
 API_BASE_URL = "https://the-monk-ai-backend.onrender.com" 
+# Books in the knowledge base, used to scope a search to one scripture
+SCRIPTURES = [
+    "Bhagavad Gita", "Manusmriti", "Rig Veda", "Sama Veda", "Yajur Veda",
+    "Agni Purana", "Brahma Purana", "Garuda Purana", "Vishnu Purana"
+]
 
 # Session state initialization
 if 'logged_in' not in st.session_state:
@@ -43,6 +48,8 @@ if 'current_session_id' not in st.session_state:
     st.session_state.current_session_id = None
 if 'user_mode' not in st.session_state:
     st.session_state.user_mode = "beginner"
+if 'book_filter' not in st.session_state:
+    st.session_state.book_filter = None
 
 # Custom CSS for responsive design and chat styling
 st.markdown("""
@@ -187,6 +194,45 @@ def make_authenticated_request(method, endpoint, data=None, files=None):
     
     return None
 
+def stream_authenticated_request(endpoint, data):
+    """POST to a Server-Sent Events endpoint and yield (event, data) pairs as they arrive."""
+    if not st.session_state.get('access_token'):
+        return
+
+    headers = {
+        "Authorization": f"Bearer {st.session_state.access_token}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+    }
+
+    try:
+        with requests.post(f"{API_BASE_URL}{endpoint}", headers=headers, json=data, stream=True) as response:
+            response.raise_for_status()
+            event_name, data_lines = "message", []
+            for line in response.iter_lines(decode_unicode=True):
+                if line is None:
+                    continue
+                if line == "":
+                    if data_lines:
+                        yield event_name, json.loads("\n".join(data_lines))
+                    event_name, data_lines = "message", []
+                elif line.startswith("event:"):
+                    event_name = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data_lines.append(line[len("data:"):].strip())
+
+    except requests.exceptions.HTTPError as e:
+        if e.response.status_code == 401:
+            st.error("Your session has expired. Please log in again.")
+            cookies['access_token'] = '' # Clear the invalid cookie
+            cookies.save()
+            st.session_state.clear()
+            st.rerun()
+        else:
+            st.error(f"API Error: {e.response.text}")
+    except requests.exceptions.RequestException as e:
+        st.error(f"Connection error: {e}")
+
 def login_page():
     """Enhanced Login/Register page"""
     st.markdown(
@@ -313,6 +359,11 @@ def chat_interface():
             format_func=lambda x: "🌱 Beginner" if x == "beginner" else "🧠 Expert"
         )
         st.session_state.user_mode = current_mode
+        st.session_state.book_filter = st.selectbox(
+            "📖 Scripture", [None] + SCRIPTURES,
+            key="book_selector",
+            format_func=lambda x: "All scriptures" if x is None else x
+        )
     
     if not st.session_state.chat_history:
         st.markdown("""
@@ -361,10 +412,11 @@ def process_query(input_data, input_type="text"):
         data = {
             "query": input_data,
             "mode": st.session_state.user_mode,
-            "session_id": st.session_state.current_session_id
+            "session_id": st.session_state.current_session_id,
+            "book": st.session_state.book_filter
         }
-        with st.spinner("🔮 Seeking wisdom from the ancient scriptures..."):
-            response = make_authenticated_request("POST", "/chat/query", data=data)
+        process_streamed_query(data)
+        return
     
     elif input_type == "voice":
         user_message_content = "[🎤 Voice message]"
@@ -406,6 +458,46 @@ def process_query(input_data, input_type="text"):
             st.rerun()
 
 
+def process_streamed_query(data):
+    """Render the answer token by token from /chat/query/stream"""
+    assistant_message = {
+        "role": "assistant",
+        "content": "",
+        "hindi_translation": "",
+        "citations": [],
+        "recommendations": [],
+        "keywords_explained": None,
+    }
+    completed = False
+    placeholder = st.empty()
+    placeholder.info("🔮 Seeking wisdom from the ancient scriptures...")
+
+    for event, payload in stream_authenticated_request("/chat/query/stream", data):
+        if event == "citations":
+            assistant_message["citations"] = payload["citations"]
+            assistant_message["recommendations"] = payload["recommendations"]
+        elif event == "token":
+            assistant_message["content"] += payload["text"]
+            placeholder.markdown(f'''<div style="display: flex; justify-content: flex-start; margin: 10px 0;"><div class="chat-message assistant-message"><strong>🕉️ The Monk AI:</strong><br>{assistant_message["content"]}</div></div>''', unsafe_allow_html=True)
+        elif event == "translation":
+            assistant_message["hindi_translation"] = payload["hindi_translation"]
+        elif event == "keywords":
+            assistant_message["keywords_explained"] = payload["keywords_explained"]
+        elif event == "done":
+            st.session_state.current_session_id = payload["session_id"] or st.session_state.current_session_id
+            completed = True
+        elif event == "error":
+            break
+
+    if completed:
+        assistant_message["timestamp"] = datetime.now().isoformat()
+        st.session_state.chat_history.append(assistant_message)
+    else:
+        st.session_state.chat_history.pop()
+        st.error("Failed to get a response from the Monk AI. Please try again.")
+    st.rerun()
+
+
 def display_chat_history():
     """Display enhanced chat messages"""
     for message in st.session_state.chat_history:
@@ -0,0 +1,43 @@
+# gunicorn.conf.py
+#
+# Pre-fork deployment: gunicorn -c gunicorn.conf.py main:app
+#
+# With PRELOAD_MODELS the master loads the embedder and cross-encoder once and
+# every worker shares the weights copy-on-write, so memory per worker is mostly
+# the Chroma client, indexes and caches. Each worker still runs its own lifespan
+# (MongoDB, Chroma, warm-up), which finds the models already loaded.
+
+import gc
+import os
+import sys
+from config.config import Config
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = Config.WEB_WORKERS
+# Each worker runs its own Groq limiter, so split the quota between them
+if "GROQ_QUOTA_SHARES" not in os.environ:
+    Config.GROQ_QUOTA_SHARES = workers
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 120
+
+# No collections in the master: freed objects would leave holes in pages the workers share
+gc.disable()
+
+
+def on_starting(server):
+    if Config.PRELOAD_MODELS:
+        from services.model_registry import preload_models
+        preload_models()
+    # Move everything loaded so far to the permanent generation, so collections in the
+    # workers never write to these objects' GC headers and un-share their pages
+    gc.freeze()
+    server.log.info(f"Froze {gc.get_freeze_count()} objects before forking {server.cfg.workers} workers")
+
+
+def post_fork(server, worker):
+    gc.enable()
+    if "torch" in sys.modules:
+        # Split the cores between workers instead of every worker using all of them
+        import torch
+        torch.set_num_threads(max(1, (os.cpu_count() or 1) // server.cfg.workers))
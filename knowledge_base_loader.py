@@ -6,9 +6,11 @@ Script to initialize the knowledge base with Hindu scriptures data.
 Run this script to process your CSV/TXT/JSONL files and populate the vector database.
 """
 
+import argparse
 import asyncio
 import os
 import sys
+import time
 import logging
 from pathlib import Path
 
@@ -18,6 +20,10 @@ sys.path.append(str(project_root))
 
 from services.document_processor import DocumentProcessor
 from services.vector_store import VectorStore
+from services.ingestion import IngestManifest, file_checksum, list_data_files, run_parallel_ingestion
+from services.verse_index import VerseIndex
+from services.quantized_index import QuantizedIndex
+from services.partitions import drop_partitions, rebuild_partitions
 from config.config import Config
 
 
@@ -28,7 +34,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def initialize_knowledge_base():
+async def initialize_knowledge_base(parallel: bool = False, rebuild: bool = False, incremental: bool = False,
+                                    chunk_workers: int = Config.INGEST_CHUNK_WORKERS,
+                                    embed_workers: int = Config.INGEST_EMBED_WORKERS):
     """Initialize the knowledge base with Hindu scriptures"""
     
     data_dir = project_root / "data"
@@ -47,28 +55,107 @@ async def initialize_knowledge_base():
     for file in data_files:
         logger.info(f"  - {file.name}")
     
+    if parallel:
+        try:
+            logger.info(f"Running pipelined ingestion ({chunk_workers} chunk workers, {embed_workers} embed workers)...")
+            report = await run_parallel_ingestion(
+                str(data_dir), chunk_workers=chunk_workers, embed_workers=embed_workers,
+                rebuild=rebuild, incremental=incremental
+            )
+            log_stage_report(report["stages"], report["total_s"])
+            logger.info(f"Statistics: {report}")
+            return True
+        except Exception as e:
+            logger.error(f"Error initializing knowledge base: {e}")
+            return False
+    
     try:
+        stages = {}
+        start = time.perf_counter()
         logger.info("Initializing document processor...")
         doc_processor = DocumentProcessor(
             chunk_size=Config.CHUNK_SIZE,
             chunk_overlap=Config.CHUNK_OVERLAP
         )
         
-        logger.info("Processing documents...")
-        documents = doc_processor.process_all_data(str(data_dir))
+        logger.info("Initializing vector store...")
+        vector_store = VectorStore()
+        await vector_store.initialize_vectorstore()
+        manifest = IngestManifest().load()
+        if not manifest.exists and not rebuild and vector_store.backend.count():
+            # Collections built before content-hashed IDs would end up holding every chunk twice
+            logger.warning("No ingest manifest found for a non-empty collection; doing a full rebuild")
+            rebuild = True
+        if rebuild:
+            manifest.files = {}
+            vector_store.backend.reset()
+            logger.info(f"Dropped existing {vector_store.backend.name} store for full rebuild")
         
-        if not documents:
+        # Every file is re-embedded here, but the manifest is kept current so that a
+        # later --parallel --incremental run only has to handle what changed since this one
+        entries = {}
+        
+        def iter_files():
+            for path in list_data_files(str(data_dir)):
+                jsonl_path = doc_processor.to_jsonl(path)
+                chunk_ids = []
+                entries[os.path.basename(path)] = {"sha256": file_checksum(path), "chunk_ids": chunk_ids}
+                for doc in doc_processor.iter_chunks(doc_processor.iter_jsonl_documents(jsonl_path)):
+                    chunk_ids.append(DocumentProcessor.chunk_id(doc))
+                    yield doc
+        
+        # read -> validate -> chunk -> batch -> embed/write, one batch in memory at a time
+        logger.info("Streaming documents into vector store...")
+        stage_start = time.perf_counter()
+        added = await vector_store.add_documents(iter_files())
+        stages["chunk_embed_write"] = {"items": added, "wall_s": round(time.perf_counter() - stage_start, 2)}
+        
+        if not added:
             logger.error("No documents were processed")
             return False
         
-        logger.info(f"Successfully processed {len(documents)} document chunks")
+        # Chunks of removed files, or ones that disappeared from a changed file
+        stale = set()
+        for name, entry in manifest.files.items():
+            stale.update(set(entry.get("chunk_ids", [])) - set(entries.get(name, {}).get("chunk_ids", [])))
+        stale = sorted(stale)
+        for i in range(0, len(stale), 5000):
+            vector_store.backend.delete(stale[i:i + 5000])
+        if stale:
+            vector_store.backend.persist()
+            logger.info(f"Deleted {len(stale)} stale chunks")
+        for entry in entries.values():
+            entry["chunk_ids"] = list(dict.fromkeys(entry["chunk_ids"]))
+        manifest.files = entries
+        manifest.save()
         
-        logger.info("Initializing vector store...")
-        vector_store = VectorStore()
-        await vector_store.initialize_vectorstore()
+        logger.info("Building lexical (BM25) index...")
+        stage_start = time.perf_counter()
+        lexical = vector_store.build_lexical_index()
+        stages["lexical_index"] = {"items": lexical["num_docs"], "wall_s": round(time.perf_counter() - stage_start, 2)}
+        
+        logger.info("Building verse reference index...")
+        stage_start = time.perf_counter()
+        verses = VerseIndex.build(str(data_dir))
+        stages["verse_index"] = {"items": verses["keys"], "wall_s": round(time.perf_counter() - stage_start, 2)}
+        
+        backend = vector_store.backend
+        if Config.PARTITION_BY_BOOK and backend.name == "chroma":
+            logger.info("Rebuilding per-book partitions...")
+            stage_start = time.perf_counter()
+            partitions = rebuild_partitions(vector_store.client, backend.collection)
+            stages["partitions"] = {"items": sum(partitions["chunks"].values()), "wall_s": round(time.perf_counter() - stage_start, 2)}
+        else:
+            drop_partitions(vector_store.client)
+        if Config.VECTOR_BACKEND == "quantized":
+            logger.info("Building quantized vector index...")
+            stage_start = time.perf_counter()
+            quantized = QuantizedIndex.build_from_collection(backend)
+            stages["quantized_index"] = {"items": quantized["count"], "wall_s": round(time.perf_counter() - stage_start, 2)}
+        # Derived indexes are in place now; tell running readers to reload them
+        vector_store.bump_collection_version()
         
-        logger.info("Adding documents to vector store...")
-        await vector_store.add_documents(documents)
+        log_stage_report(stages, round(time.perf_counter() - start, 2))
         
         stats = vector_store.get_collection_stats()
         logger.info("Knowledge base initialization completed!")
@@ -80,6 +167,21 @@ async def initialize_knowledge_base():
         logger.error(f"Error initializing knowledge base: {e}")
         return False
 
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (Linux reports KB, macOS bytes)"""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+def log_stage_report(stages: dict, total_s: float):
+    """Log per-stage ingestion timings"""
+    logger.info(f"Ingestion finished in {total_s}s (peak RSS {peak_rss_mb()} MB)")
+    for name, timing in stages.items():
+        logger.info(f"  - {name}: {timing}")
+
 def create_sample_data():
     """Create sample data files for testing"""
     data_dir = project_root / "data"
@@ -107,6 +209,17 @@ def create_sample_data():
 
 async def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Load the Hindu scriptures corpus into the vector database")
+    parser.add_argument("--parallel", action="store_true", help="pipelined multi-process ingestion")
+    parser.add_argument("--rebuild", action="store_true", help="drop the existing collection first")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only embed new or changed chunks and delete removed ones (requires --parallel)")
+    parser.add_argument("--chunk-workers", type=int, default=Config.INGEST_CHUNK_WORKERS)
+    parser.add_argument("--embed-workers", type=int, default=Config.INGEST_EMBED_WORKERS)
+    args = parser.parse_args()
+    if args.incremental and not args.parallel:
+        parser.error("--incremental requires --parallel; the serial loader always re-embeds the whole corpus")
+    
     logger.info("=" * 60)
     logger.info("The Monk AI - Knowledge Base Loader")
     logger.info("=" * 60)
@@ -125,7 +238,10 @@ async def main():
             return
     
     logger.info("\nStarting knowledge base initialization...")
-    success = await initialize_knowledge_base()
+    success = await initialize_knowledge_base(
+        parallel=args.parallel, rebuild=args.rebuild, incremental=args.incremental,
+        chunk_workers=args.chunk_workers, embed_workers=args.embed_workers
+    )
     
     if success:
         logger.info("\n" + "=" * 60)
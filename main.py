@@ -9,10 +9,13 @@ os.environ['TORCHVISION_USE_IMAGE_EXT'] = '0'
 
 from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import HTTPBearer
 from contextlib import asynccontextmanager
+import asyncio
 import tempfile
 import os
+import json
 import logging
 from datetime import timedelta
 # os.environ['PYTHONIOENCODING'] = 'utf-8'
@@ -26,9 +29,13 @@ from services.auth import (
     authenticate_user, create_user, create_access_token,
     get_current_active_user
 )
-from services.rag_pipeline import RAGPipeline
+# services.rag_pipeline (torch, sentence-transformers, chromadb) is imported by the warm-up task
 from services.chat_service import ChatService
-from database.connection import connect_to_mongo, close_mongo_connection
+from services.startup import StartupState, warm_up
+from database.connection import close_mongo_connection
+from services.executors import shutdown_executors
+from services.metrics import metrics
+from services.groq_client import GroqQuotaExceeded
 from config.config import Config
 
 # Setup logging
@@ -36,20 +43,36 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Global instances
-rag_pipeline = RAGPipeline()
+startup_state = StartupState()
 chat_service = ChatService()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting The Monk AI application...")
-    await connect_to_mongo()
-    await rag_pipeline.initialize()
-    logger.info("The Monk AI application started successfully!")
+    warm_up_task = None
+    if Config.LAZY_STARTUP:
+        # Bind right away; /system/ready turns 200 once the background warm-up finishes
+        warm_up_task = asyncio.create_task(warm_up(startup_state))
+        logger.info("The Monk AI application is live; loading models in the background")
+    else:
+        await warm_up(startup_state)
+        if startup_state.failed:
+            if startup_state.mongo_task:
+                startup_state.mongo_task.cancel()
+            raise RuntimeError(f"Startup failed: {startup_state.failed}")
+        logger.info("The Monk AI application started successfully!")
     yield
     # Shutdown
     logger.info("Shutting down The Monk AI application...")
+    for task in (warm_up_task, startup_state.mongo_task):
+        if task and not task.done():
+            task.cancel()
+    if startup_state.pipeline:
+        await startup_state.pipeline.llm_service.groq_client.aclose()
+        await startup_state.pipeline.vector_store.aclose()
     await close_mongo_connection()
+    shutdown_executors(wait=False)
 
 # Create FastAPI app
 app = FastAPI(
@@ -70,6 +93,25 @@ app.add_middleware(
 
 security = HTTPBearer()
 
+def get_rag_pipeline():
+    """The RAG pipeline, or 503 while the warm-up is still loading it"""
+    if not startup_state.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The Monk AI is still starting up",
+            headers={"Retry-After": "5"},
+        )
+    return startup_state.pipeline
+
+def quota_exceeded(e: GroqQuotaExceeded) -> HTTPException:
+    """503 for a query that would have queued too long for the Groq quota"""
+    logger.warning(str(e))
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="The Monk AI is busy, please try again shortly",
+        headers={"Retry-After": str(max(1, round(e.retry_after)))},
+    )
+
 # --- Authentication endpoints ---
 @app.post("/auth/register", response_model=dict)
 async def register(user_data: UserCreate):
@@ -110,21 +152,46 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 
 # --- Chat endpoints ---
 @app.post("/chat/query", response_model=QueryResponse)
-async def process_query(query_request: QueryRequest, current_user: User = Depends(get_current_active_user)):
+async def process_query(query_request: QueryRequest, current_user: User = Depends(get_current_active_user),
+                        rag_pipeline=Depends(get_rag_pipeline)):
     """Process a text query through the RAG pipeline"""
     try:
         response = await rag_pipeline.process_query(query_request, str(current_user.id))
         return response
+    except GroqQuotaExceeded as e:
+        raise quota_exceeded(e)
     except Exception as e:
         logger.error(f"Query processing error: {e}")
         raise HTTPException(status_code=500, detail="Failed to process query")
 
+@app.post("/chat/query/stream")
+async def stream_query(query_request: QueryRequest, current_user: User = Depends(get_current_active_user),
+                       rag_pipeline=Depends(get_rag_pipeline)):
+    """Process a text query and stream the answer as Server-Sent Events"""
+    async def event_stream():
+        try:
+            async for event in rag_pipeline.stream_query(query_request, str(current_user.id)):
+                yield f"event: {event['event']}\ndata: {json.dumps(event['data'], ensure_ascii=False)}\n\n"
+        except GroqQuotaExceeded as e:
+            logger.warning(str(e))
+            yield f"event: error\ndata: {json.dumps({'detail': 'The Monk AI is busy, please try again shortly', 'retry_after': e.retry_after})}\n\n"
+        except Exception as e:
+            logger.error(f"Streaming query error: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': 'Failed to process query'})}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/chat/voice-query", response_model=QueryResponse)
 async def process_voice_query(
     audio_file: UploadFile = File(...),
     mode: str = Form(default="beginner"),
     session_id: str = Form(default=None),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    rag_pipeline=Depends(get_rag_pipeline)
 ):
     """Process a voice query"""
     try:
@@ -135,6 +202,8 @@ async def process_voice_query(
         
         response = await rag_pipeline.process_voice_query(tmp_file_path, mode, str(current_user.id), session_id)
         return response
+    except GroqQuotaExceeded as e:
+        raise quota_exceeded(e)
     except Exception as e:
         logger.error(f"Voice query processing error: {e}")
         raise HTTPException(status_code=500, detail="Failed to process voice query")
@@ -166,7 +235,37 @@ async def delete_chat_session(session_id: str, current_user: User = Depends(get_
 # --- System endpoints ---
 @app.get("/system/health")
 async def health_check():
-    return {"status": "healthy"}
+    return {"status": "healthy", "ready": startup_state.ready}
+
+@app.get("/system/live")
+async def liveness():
+    """The process is up and serving requests, whether or not the models are loaded"""
+    return {"status": "alive", "uptime_s": startup_state.snapshot()["uptime_s"]}
+
+@app.get("/system/ready")
+async def readiness():
+    """200 once every startup component is loaded, 503 with per-component status until then"""
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if startup_state.ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content=startup_state.snapshot()
+    )
+
+@app.get("/system/stats")
+async def system_stats():
+    """Vector store and cache statistics"""
+    if not startup_state.ready:
+        return {"startup": startup_state.snapshot()}
+    rag_pipeline = startup_state.pipeline
+    return {
+        "vector_store": rag_pipeline.vector_store.get_collection_stats(),
+        **rag_pipeline.get_stats(),
+        "startup": startup_state.snapshot()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Per-stage and per-request latency histograms in the Prometheus text format, for this process"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 if __name__ == "__main__":
     import uvicorn
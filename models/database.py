@@ -88,6 +88,9 @@ class QueryRequest(BaseModel):
     mode: str = "beginner"
     session_id: Optional[str] = None
     is_voice: bool = False
+    # Optional retrieval scope, matched against chunk metadata (book_name or Veda, chapter)
+    book: Optional[str] = None
+    chapter: Optional[str] = None
 
 class QueryResponse(BaseModel):
     answer: str
@@ -96,6 +99,8 @@ class QueryResponse(BaseModel):
     recommendations: List[str]
     keywords_explained: Optional[Dict[str, str]] = None
     session_id: str
+    # Outcome of each post-generation branch: "completed", "timed_out", "failed", "skipped" or "cached"
+    branch_status: Optional[Dict[str, str]] = None
 
 class Token(BaseModel):
     access_token: str
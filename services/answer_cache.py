@@ -0,0 +1,128 @@
+# services/answer_cache.py
+
+import re
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class AnswerCache:
+    """
+    LRU + TTL cache of final answers, keyed by normalized query and mode.
+
+    A lookup first tries the exact normalized key, then falls back to the most
+    similar cached query in the same mode whose embedding cosine similarity is
+    above `similarity_threshold`. The whole cache is dropped whenever the
+    vector store reports a new collection version.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = Config.ANSWER_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = Config.ANSWER_CACHE_TTL,
+        similarity_threshold: float = Config.ANSWER_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self.collection_version = None
+        self.counters = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace."""
+        query = re.sub(r"[^\w\s]", " ", query.lower())
+        return " ".join(query.split())
+
+    def sync_version(self, collection_version: Any):
+        """Invalidate every entry if the underlying collection was reloaded."""
+        if collection_version != self.collection_version:
+            if self.entries:
+                logger.info("Vector store collection changed; clearing answer cache")
+                self.counters["invalidations"] += 1
+            self.entries.clear()
+            self.collection_version = collection_version
+
+    def get(self, query: str, mode: str, embedding: Optional[np.ndarray] = None) -> Optional[Dict[str, Any]]:
+        key = (self.normalize_query(query), mode)
+        self._expire()
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            self.counters["exact_hits"] += 1
+            return entry["payload"]
+
+        if embedding is not None and self.entries:
+            match_key, similarity = self._nearest(mode, embedding)
+            if match_key is not None and similarity >= self.similarity_threshold:
+                self.entries.move_to_end(match_key)
+                self.counters["semantic_hits"] += 1
+                logger.info(f"Semantic answer cache hit (cosine={similarity:.3f})")
+                return self.entries[match_key]["payload"]
+
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, query: str, mode: str, payload: Dict[str, Any], embedding: Optional[np.ndarray] = None):
+        key = (self.normalize_query(query), mode)
+        if embedding is not None:
+            embedding = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            embedding = embedding / norm if norm else embedding
+        self.entries[key] = {"payload": payload, "embedding": embedding, "created_at": time.monotonic()}
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.counters["exact_hits"] + self.counters["semantic_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            **self.counters,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+        }
+
+    def _nearest(self, mode: str, embedding: np.ndarray) -> Tuple[Optional[Tuple[str, str]], float]:
+        candidates = [
+            (key, entry["embedding"]) for key, entry in self.entries.items()
+            if key[1] == mode and entry["embedding"] is not None
+        ]
+        if not candidates:
+            return None, 0.0
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if not norm:
+            return None, 0.0
+        matrix = np.stack([vector for _, vector in candidates])
+        similarities = matrix @ (query / norm)
+        best = int(np.argmax(similarities))
+        return candidates[best][0], float(similarities[best])
+
+    def _expire(self):
+        now = time.monotonic()
+        # Entries are in LRU order, not insertion order, so scan them all
+        expired = [key for key, entry in self.entries.items() if now - entry["created_at"] > self.ttl_seconds]
+        for key in expired:
+            del self.entries[key]
+        self.counters["expirations"] += len(expired)
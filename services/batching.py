@@ -0,0 +1,137 @@
+# services/batching.py
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from services import executors
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Collects work items from concurrent requests into a single batched call.
+
+    Each `submit()` adds a request's items to the pending queue. The queue is
+    flushed when it reaches `max_batch_size` items or `max_wait_ms` after the
+    first item arrived, whichever comes first. The batch function runs once in
+    the inference pool and each caller gets back the slice of results that
+    matches its own items. A single request is never split across batches.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], Sequence[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "batcher",
+        runner: Callable[..., Awaitable[Any]] = None,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self.runner = runner or executors.run_inference
+        self.pending: List[Tuple[List[Any], asyncio.Future]] = []
+        self.pending_items = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.requests = 0
+        self.histogram = {bucket: 0 for bucket in self.histogram_buckets(max_batch_size)}
+
+    @staticmethod
+    def histogram_buckets(max_batch_size: int) -> List[int]:
+        """Power-of-two upper bounds up to (and including) the max batch size."""
+        buckets, bound = [], 1
+        while bound < max_batch_size:
+            buckets.append(bound)
+            bound *= 2
+        buckets.append(max_batch_size)
+        return buckets
+
+    def _record_batch_size(self, size: int):
+        for bucket in self.histogram:
+            if size <= bucket:
+                self.histogram[bucket] += 1
+                return
+        # Oversized single requests are not split, so they can exceed the max
+        self.histogram[max(self.histogram)] += 1
+
+    async def submit(self, items: List[Any]) -> List[Any]:
+        if not items:
+            return []
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((list(items), future))
+        self.pending_items += len(items)
+
+        if self.pending_items >= self.max_batch_size:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, loop)
+        return await future
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self.pending:
+            requests, count = [], 0
+            while self.pending and (not requests or count + len(self.pending[0][0]) <= self.max_batch_size):
+                items, future = self.pending.pop(0)
+                requests.append((items, future))
+                count += len(items)
+            self.pending_items -= count
+
+            task = loop.create_task(self._run(requests))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+            # Leftovers smaller than a full batch wait for more company
+            if self.pending and self.pending_items < self.max_batch_size:
+                self._timer = loop.call_later(self.max_wait, self._flush, loop)
+                break
+
+    async def _run(self, requests: List[Tuple[List[Any], asyncio.Future]]):
+        flat = [item for items, _ in requests for item in items]
+        self.batches += 1
+        self.items += len(flat)
+        self.requests += len(requests)
+        self._record_batch_size(len(flat))
+        try:
+            results = await self.runner(self.batch_fn, flat)
+        except Exception as e:
+            logger.error(f"Batched call in '{self.name}' failed: {e}")
+            for _, future in requests:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        offset = 0
+        for items, future in requests:
+            if not future.done():
+                future.set_result(list(results[offset:offset + len(items)]))
+            offset += len(items)
+
+    def cumulative_histogram(self) -> Dict[int, int]:
+        """Batches with size <= each bound, cumulative like a Prometheus histogram."""
+        cumulative, total = {}, 0
+        for bucket, count in self.histogram.items():
+            total += count
+            cumulative[bucket] = total
+        return cumulative
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "requests": self.requests,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "avg_requests_per_batch": round(self.requests / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batch_size_histogram": {f"le_{bucket}": count for bucket, count in self.cumulative_histogram().items()},
+        }
@@ -12,14 +12,16 @@ logger = logging.getLogger(__name__)
 class ChatService:
     """Service for handling chat session business logic."""
 
-    async def create_chat_session(self, user_id: str, title: str = "New Chat") -> ChatSession:
+    async def create_chat_session(self, user_id: str, title: str = "New Chat", session_id: Optional[str] = None) -> ChatSession:
         """
         Creates a new chat session for a user.
-        The title is generated from the first user message.
+        The title is generated from the first user message. A pre-generated
+        session_id lets callers use the ID before the insert has completed.
         """
         db = get_database()
         try:
             session_data = {
+                "_id": ObjectId(session_id) if session_id else ObjectId(),
                 "user_id": ObjectId(user_id),
                 "title": title,
                 "messages": [],
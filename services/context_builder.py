@@ -0,0 +1,221 @@
+# services/context_builder.py
+
+import re
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from config.config import Config
+from services.lexical_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Sentence ends, including the Devanagari danda and double danda used in verse text
+SENTENCE_END = re.compile(r"(?<=[.!?;।॥])\s+|\n+")
+# Shortest shared run of text treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 20
+GAP = " … "
+WORD = re.compile(r"\w")
+
+
+def format_passage(doc: Dict[str, Any]) -> str:
+    """One context passage as it appears in the prompt."""
+    metadata = doc['metadata']
+    return (f"Source: {metadata.get('book_name', 'Unknown')} - {metadata.get('chapter', '')} {metadata.get('section', '')}"
+            f"\nContent: {doc['content']}")
+
+
+def _load_tokenizer(name: str) -> Optional[Callable[[str], int]]:
+    if not name:
+        return None
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(name)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    except Exception as e:
+        logger.warning(f"Could not load tokenizer {name}, estimating tokens from length: {e}")
+        return None
+
+
+class ContextBuilder:
+    """
+    Fits the reranked passages into CONTEXT_TOKEN_BUDGET prompt tokens:
+
+    1. passages scoring more than CONTEXT_SCORE_MARGIN below the top one are dropped;
+    2. text repeated between chunks of the same book (the CHUNK_OVERLAP the
+       splitter leaves between neighbours) is kept only in the higher-ranked one,
+       and passages contained in another are dropped;
+    3. if the rest is still over budget, sentences are kept in order of how many
+       query terms they contain, then passage rank, and each passage shows only
+       its kept sentences, in their original order.
+
+    Tokens are counted with the CONTEXT_TOKENIZER Hugging Face tokenizer if one
+    is set, otherwise estimated at about 4 characters a token. Loading the
+    tokenizer and `build()` are blocking: the warm-up calls `load_tokenizer()`
+    and the pipeline runs `build()` in the inference pool.
+    """
+
+    def __init__(self, budget: int = Config.CONTEXT_TOKEN_BUDGET, score_margin: float = Config.CONTEXT_SCORE_MARGIN,
+                 tokenizer: str = Config.CONTEXT_TOKENIZER):
+        self.budget = budget
+        self.score_margin = score_margin
+        self.tokenizer_name = tokenizer
+        self.tokenizer: Optional[Callable[[str], int]] = None
+        self.tokenizer_loaded = False
+        self.tokenizer_lock = threading.Lock()
+        self.counters = {
+            "builds": 0, "compressed": 0, "tokens_in": 0, "tokens_out": 0, "passages_in": 0, "passages_out": 0,
+            "trimmed_by_score": 0, "duplicates": 0, "overlap_chars": 0, "build_seconds": 0.0,
+        }
+
+    def load_tokenizer(self):
+        """Load CONTEXT_TOKENIZER, which may download it; safe to call more than once."""
+        with self.tokenizer_lock:
+            if not self.tokenizer_loaded:
+                self.tokenizer = _load_tokenizer(self.tokenizer_name)
+                self.tokenizer_loaded = True
+
+    def count_tokens(self, text: str) -> int:
+        if not self.tokenizer_loaded:
+            self.load_tokenizer()
+        if self.tokenizer is not None:
+            return self.tokenizer(text)
+        return (len(text) + 3) // 4
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """The longest prefix of `text` that counts at most `max_tokens` tokens."""
+        if max_tokens <= 0:
+            return ""
+        low, high = 0, len(text)
+        # Token counts grow with the prefix, so search on its length
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self.count_tokens(text[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low].rstrip()
+
+    def context_tokens(self, docs: List[Dict[str, Any]]) -> int:
+        return self.count_tokens("\n\n".join(format_passage(doc) for doc in docs))
+
+    def build(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The passages to put in the prompt, best first; `content` may be shortened."""
+        if not Config.CONTEXT_BUILDER_ENABLED or not docs:
+            return docs
+        start = time.perf_counter()
+        tokens_in = self.context_tokens(docs)
+
+        passages = self._trim_by_score(docs)
+        passages = self._dedupe(passages)
+        if self.budget and self.context_tokens(passages) > self.budget:
+            self.counters["compressed"] += 1
+            passages = self._extract_sentences(query, passages)
+
+        self.counters["builds"] += 1
+        self.counters["tokens_in"] += tokens_in
+        self.counters["tokens_out"] += self.context_tokens(passages)
+        self.counters["passages_in"] += len(docs)
+        self.counters["passages_out"] += len(passages)
+        self.counters["build_seconds"] += time.perf_counter() - start
+        return passages
+
+    def _trim_by_score(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.score_margin:
+            return list(docs)
+        top = docs[0].get('score', 0.0)
+        kept = [docs[0]] + [doc for doc in docs[1:] if doc.get('score', 0.0) >= top - self.score_margin]
+        self.counters["trimmed_by_score"] += len(docs) - len(kept)
+        return kept
+
+    @staticmethod
+    def _overlap(head: str, tail: str) -> int:
+        """Length of the longest end of `head` that `tail` starts with (0 if under MIN_OVERLAP_CHARS)."""
+        probe = tail[:MIN_OVERLAP_CHARS]
+        if len(probe) < MIN_OVERLAP_CHARS:
+            return 0
+        # The splitter carries at most CHUNK_OVERLAP characters over, plus the separator it split on
+        position = head.find(probe, max(0, len(head) - 2 * Config.CHUNK_OVERLAP))
+        while position != -1:
+            if tail.startswith(head[position:]):
+                return len(head) - position
+            position = head.find(probe, position + 1)
+        return 0
+
+    def _dedupe(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        kept: List[Dict[str, Any]] = []
+        for doc in docs:
+            content = doc['content'].strip()
+            book = doc['metadata'].get('book_name')
+            for other in kept:
+                if other['metadata'].get('book_name') != book:
+                    continue
+                if content in other['content']:
+                    content = ""
+                    break
+                # `doc` ranks lower, so the shared text is cut from it, at whichever end it is
+                shared = self._overlap(other['content'], content)
+                if shared:
+                    content = content[shared:].lstrip()
+                else:
+                    shared = self._overlap(content, other['content'])
+                    content = content[:len(content) - shared].rstrip() if shared else content
+                self.counters["overlap_chars"] += shared
+            if not content:
+                self.counters["duplicates"] += 1
+                continue
+            kept.append({**doc, 'content': content} if content != doc['content'] else doc)
+        return kept
+
+    def _extract_sentences(self, query: str, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        terms = set(tokenize(query))
+        candidates: List[Tuple[Tuple[int, int, int], int, int, str]] = []
+        sentences: List[List[str]] = []
+        for rank, doc in enumerate(docs):
+            # The splitter starts a chunk with the separator it split on, e.g. a lone "."
+            parts = [part.strip() for part in SENTENCE_END.split(doc['content']) if WORD.search(part)]
+            sentences.append(parts)
+            for position, sentence in enumerate(parts):
+                matches = len(terms.intersection(tokenize(sentence)))
+                candidates.append(((-matches, rank, position), rank, position, sentence))
+        candidates.sort()
+
+        chosen: Dict[int, List[int]] = {}
+        used = 0
+        for _, rank, position, sentence in candidates:
+            # A passage's source line is paid for with its first sentence
+            cost = self.count_tokens(sentence) + 1
+            if rank not in chosen:
+                cost += self.count_tokens(format_passage({**docs[rank], 'content': ""})) + 1
+            if used + cost > self.budget:
+                continue
+            chosen.setdefault(rank, []).append(position)
+            used += cost
+
+        if not chosen:
+            # Not even one sentence fits: cut the best passage to the budget
+            top = docs[0]
+            allowance = self.budget - self.count_tokens(format_passage({**top, 'content': ""}))
+            return [{**top, 'content': self.truncate(top['content'], allowance)}]
+
+        passages = []
+        for rank in sorted(chosen):
+            positions = sorted(chosen[rank])
+            text = sentences[rank][positions[0]]
+            for previous, position in zip(positions, positions[1:]):
+                text += (" " if position == previous + 1 else GAP) + sentences[rank][position]
+            passages.append({**docs[rank], 'content': text})
+        return passages
+
+    def stats(self) -> Dict[str, Any]:
+        builds, tokens_in = self.counters["builds"], self.counters["tokens_in"]
+        saved = tokens_in - self.counters["tokens_out"]
+        return {
+            "enabled": Config.CONTEXT_BUILDER_ENABLED,
+            "budget": self.budget,
+            "tokenizer": self.tokenizer_name or "estimate",
+            **{key: value for key, value in self.counters.items() if key != "build_seconds"},
+            "tokens_saved": saved,
+            "saved_pct": round(saved / tokens_in * 100, 2) if tokens_in else 0.0,
+            "mean_build_ms": round(self.counters["build_seconds"] / builds * 1000, 3) if builds else None,
+        }
@@ -1,7 +1,9 @@
 # Data processing
 import json
+import hashlib
+import itertools
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
 import logging
@@ -88,19 +90,40 @@ class DocumentProcessor:
             logger.error(f"Error converting TXT to JSONL: {e}")
             raise
     
+    def iter_jsonl_documents(self, jsonl_file_path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Document]:
+        """
+        Lazily read and validate documents from a JSONL file, optionally only the
+        lines inside the byte range [start, end). Malformed records are skipped.
+        """
+        source_file = os.path.basename(jsonl_file_path)
+        skipped = 0
+        with open(jsonl_file_path, 'rb') as f:
+            f.seek(start)
+            while end is None or f.tell() < end:
+                raw = f.readline()
+                if not raw:
+                    break
+                line = raw.decode('utf-8').strip()
+                if not line:
+                    continue
+                try:
+                    data = json.loads(line)
+                    content, metadata = data['content'], data.get('metadata') or {}
+                    if not isinstance(content, str) or not isinstance(metadata, dict):
+                        raise ValueError("content must be a string and metadata an object")
+                except (ValueError, KeyError, TypeError) as e:
+                    skipped += 1
+                    logger.warning(f"Skipping malformed record in {jsonl_file_path}: {e}")
+                    continue
+                metadata.setdefault('source_file', source_file)
+                yield Document(page_content=content, metadata=metadata)
+        if skipped:
+            logger.warning(f"Skipped {skipped} malformed records in {jsonl_file_path}")
+    
     def load_jsonl_documents(self, jsonl_file_path: str) -> List[Document]:
         """Load documents from JSONL file"""
-        documents = []
         try:
-            with open(jsonl_file_path, 'r', encoding='utf-8') as f:
-                for line in f:
-                    data = json.loads(line.strip())
-                    doc = Document(
-                        page_content=data['content'],
-                        metadata=data['metadata']
-                    )
-                    documents.append(doc)
-            
+            documents = list(self.iter_jsonl_documents(jsonl_file_path))
             logger.info(f"Loaded {len(documents)} documents from {jsonl_file_path}")
             return documents
             
@@ -108,24 +131,21 @@ class DocumentProcessor:
             logger.error(f"Error loading JSONL documents: {e}")
             raise
     
+    def iter_chunks(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """Lazily split documents into chunks, preserving their metadata"""
+        for doc in documents:
+            chunks = self.text_splitter.split_text(doc.page_content)
+            for i, chunk in enumerate(chunks):
+                if chunk.strip():  # Only add non-empty chunks
+                    metadata = doc.metadata.copy()
+                    metadata['chunk_id'] = i
+                    metadata['total_chunks'] = len(chunks)
+                    yield Document(page_content=chunk, metadata=metadata)
+    
     def chunk_documents(self, documents: List[Document]) -> List[Document]:
         """Chunk documents for better retrieval"""
         try:
-            chunked_docs = []
-            for doc in documents:
-                chunks = self.text_splitter.split_text(doc.page_content)
-                for i, chunk in enumerate(chunks):
-                    if chunk.strip():  # Only add non-empty chunks
-                        metadata = doc.metadata.copy()
-                        metadata['chunk_id'] = i
-                        metadata['total_chunks'] = len(chunks)
-                        
-                        chunked_doc = Document(
-                            page_content=chunk,
-                            metadata=metadata
-                        )
-                        chunked_docs.append(chunked_doc)
-            
+            chunked_docs = list(self.iter_chunks(documents))
             logger.info(f"Created {len(chunked_docs)} chunks from {len(documents)} documents")
             return chunked_docs
             
@@ -133,34 +153,62 @@ class DocumentProcessor:
             logger.error(f"Error chunking documents: {e}")
             raise
     
+    @staticmethod
+    def batched(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+        """Group an iterable into lists of at most batch_size items"""
+        iterator = iter(items)
+        while True:
+            batch = list(itertools.islice(iterator, batch_size))
+            if not batch:
+                return
+            yield batch
+    
+    @staticmethod
+    def segment_offsets(jsonl_file_path: str, records_per_segment: int) -> Iterator[Tuple[int, int]]:
+        """Yield byte ranges covering at most records_per_segment lines each"""
+        with open(jsonl_file_path, 'rb') as f:
+            start, count = 0, 0
+            for line in iter(f.readline, b''):
+                count += 1
+                if count == records_per_segment:
+                    position = f.tell()
+                    yield start, position
+                    start, count = position, 0
+            if count:
+                yield start, f.tell()
+    
+    def to_jsonl(self, file_path: str) -> Optional[str]:
+        """Return a JSONL path for a supported data file, converting CSV/TXT first"""
+        if file_path.endswith('.csv'):
+            return self.csv_to_jsonl(file_path)
+        if file_path.endswith('.txt'):
+            return self.txt_to_jsonl(file_path)
+        if file_path.endswith('.jsonl'):
+            return file_path
+        return None
+    
+    @staticmethod
+    def chunk_id(doc: Document) -> str:
+        """Deterministic ID from source file, metadata and content, so re-indexing upserts instead of duplicating"""
+        source = doc.metadata.get('source_file', '')
+        metadata = json.dumps(doc.metadata, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha1(f"{source}\x1f{metadata}\x1f{doc.page_content}".encode('utf-8'))
+        return digest.hexdigest()
+    
+    def iter_all_data(self, data_directory: str) -> Iterator[Document]:
+        """Lazily read -> validate -> chunk every supported file in the directory"""
+        for filename in sorted(os.listdir(data_directory)):
+            jsonl_path = self.to_jsonl(os.path.join(data_directory, filename))
+            if jsonl_path:
+                yield from self.iter_chunks(self.iter_jsonl_documents(jsonl_path))
+    
     def process_all_data(self, data_directory: str) -> List[Document]:
         """Process all CSV and TXT files in directory"""
-        all_documents = []
-        
         try:
-            for filename in os.listdir(data_directory):
-                file_path = os.path.join(data_directory, filename)
-                
-                if filename.endswith('.csv'):
-                    jsonl_path = self.csv_to_jsonl(file_path)
-                    docs = self.load_jsonl_documents(jsonl_path)
-                    all_documents.extend(docs)
-                    
-                elif filename.endswith('.txt'):
-                    jsonl_path = self.txt_to_jsonl(file_path)
-                    docs = self.load_jsonl_documents(jsonl_path)
-                    all_documents.extend(docs)
-                    
-                elif filename.endswith('.jsonl'):
-                    docs = self.load_jsonl_documents(file_path)
-                    all_documents.extend(docs)
-            
-            # Chunk all documents
-            chunked_documents = self.chunk_documents(all_documents)
-            
+            chunked_documents = list(self.iter_all_data(data_directory))
             logger.info(f"Processed total {len(chunked_documents)} document chunks")
             return chunked_documents
             
         except Exception as e:
             logger.error(f"Error processing data directory: {e}")
-            raise
\ No newline at end of file
+            raise
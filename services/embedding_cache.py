@@ -0,0 +1,85 @@
+# services/embedding_cache.py
+
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+import numpy as np
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Thread-safe LRU cache of text -> float32 embedding, bounded by memory in bytes.
+
+    Entries are stored read-only so callers can share them without copying.
+    Alongside hit/miss counts it tracks the average encode time of misses,
+    which gives an estimate of the encoder time saved by hits.
+    """
+
+    def __init__(self, max_bytes: int = Config.EMBEDDING_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.encode_seconds = 0.0
+
+    @staticmethod
+    def _entry_size(key: str, vector: np.ndarray) -> int:
+        return vector.nbytes + len(key.encode("utf-8"))
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self.lock:
+            vector = self.entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: Any, encode_seconds: float = 0.0) -> np.ndarray:
+        """Store a vector and return the cached read-only float32 copy."""
+        vector = np.array(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        size = self._entry_size(key, vector)
+        with self.lock:
+            self.encode_seconds += encode_seconds
+            if size > self.max_bytes:
+                return vector
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= self._entry_size(key, previous)
+            self.entries[key] = vector
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                old_key, old_vector = self.entries.popitem(last=False)
+                self.current_bytes -= self._entry_size(old_key, old_vector)
+                self.evictions += 1
+        return vector
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            avg_encode = self.encode_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "avg_encode_ms": round(avg_encode * 1000, 3),
+                "encode_time_saved_s": round(self.hits * avg_encode, 3),
+            }
@@ -0,0 +1,62 @@
+# services/executors.py
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Two separate bounded pools: CPU-bound model inference (embedder, cross-encoder)
+# must not be starved by slow network calls (Google Translate, Google Search), and vice versa.
+_inference_pool: Optional[ThreadPoolExecutor] = None
+_io_pool: Optional[ThreadPoolExecutor] = None
+
+
+def get_inference_pool() -> ThreadPoolExecutor:
+    """Return the shared pool used for local model inference."""
+    global _inference_pool
+    if _inference_pool is None:
+        _inference_pool = ThreadPoolExecutor(
+            max_workers=Config.INFERENCE_POOL_SIZE,
+            thread_name_prefix="monk-inference"
+        )
+        logger.info(f"Inference pool started with {Config.INFERENCE_POOL_SIZE} workers")
+    return _inference_pool
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    """Return the shared pool used for blocking network calls."""
+    global _io_pool
+    if _io_pool is None:
+        _io_pool = ThreadPoolExecutor(
+            max_workers=Config.IO_POOL_SIZE,
+            thread_name_prefix="monk-io"
+        )
+        logger.info(f"I/O pool started with {Config.IO_POOL_SIZE} workers")
+    return _io_pool
+
+
+async def run_inference(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking model call in the inference pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_pool(), functools.partial(func, *args, **kwargs))
+
+
+async def run_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking network call in the I/O pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_io_pool(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executors(wait: bool = True):
+    """Shut down both pools; they are recreated lazily on next use."""
+    global _inference_pool, _io_pool
+    for pool in (_inference_pool, _io_pool):
+        if pool is not None:
+            pool.shutdown(wait=wait)
+    _inference_pool = None
+    _io_pool = None
+    logger.info("Executor pools shut down")
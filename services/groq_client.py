@@ -0,0 +1,356 @@
+# services/groq_client.py
+
+import json
+import time
+import random
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+import httpx
+from config.config import Config
+from services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Rate limited, overloaded or briefly unavailable; anything else is returned to the caller as is
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GroqQuotaExceeded(Exception):
+    """The client-side quota would not have room for a call within GROQ_QUOTA_MAX_WAIT."""
+
+    def __init__(self, model: str, retry_after: float):
+        super().__init__(f"Groq quota for {model} exhausted; retry in {retry_after:.1f}s")
+        self.model = model
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute / 60` units a second up to `per_minute`, like Groq's
+    per-minute quotas. A rate of 0 disables the bucket.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, amount: float) -> bool:
+        """Whether `amount` units could be taken right now, without taking them."""
+        if not self.rate:
+            return True
+        self._refill()
+        return self.tokens >= min(amount, self.capacity)
+
+    def take(self, amount: float):
+        """Take `amount` units without waiting; check `available()` first."""
+        if self.rate:
+            self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    async def acquire(self, amount: float, deadline: Optional[float] = None) -> float:
+        """
+        Wait until `amount` units are available and take them; returns the seconds waited.
+        Raises `asyncio.TimeoutError`, taking nothing, if they would not be available
+        by `deadline` (a `time.monotonic()` value).
+        """
+        if not self.rate:
+            return 0.0
+        amount, start = min(amount, self.capacity), time.monotonic()
+        # Callers queue on the lock, so they are served in arrival order
+        await asyncio.wait_for(self.lock.acquire(), timeout=None if deadline is None else deadline - start)
+        try:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return time.monotonic() - start
+                delay = (amount - self.tokens) / self.rate
+                if deadline is not None and time.monotonic() + delay > deadline:
+                    raise asyncio.TimeoutError
+                await asyncio.sleep(delay)
+        finally:
+            self.lock.release()
+
+    def drain(self):
+        """The server said we are over quota; stop everyone until the bucket refills."""
+        if self.rate:
+            self.tokens = min(self.tokens, 0.0)
+            self.updated = time.monotonic()
+
+
+class ModelLimits:
+    """
+    Concurrency and quota for one model; Groq rate limits are per model.
+
+    The limits live in this process. The per-minute quotas are split evenly
+    over GROQ_QUOTA_SHARES processes (the gunicorn worker count by default),
+    so together the workers stay inside the account's quota.
+    GROQ_MODEL_CONCURRENCY is per process.
+    """
+
+    def __init__(self):
+        shares = max(1, Config.GROQ_QUOTA_SHARES)
+        self.semaphore = asyncio.Semaphore(Config.GROQ_MODEL_CONCURRENCY)
+        self.requests = TokenBucket(Config.GROQ_REQUESTS_PER_MINUTE / shares)
+        self.tokens = TokenBucket(Config.GROQ_TOKENS_PER_MINUTE / shares)
+        self.in_flight = 0
+
+
+class AsyncGroqClient:
+    """
+    Groq's OpenAI-compatible API on one pooled `httpx.AsyncClient`:
+
+    * at most GROQ_MODEL_CONCURRENCY requests in flight per model;
+    * per-model token buckets for requests and tokens per minute, drained on a 429;
+      a call that would wait more than GROQ_QUOTA_MAX_WAIT for them raises
+      `GroqQuotaExceeded` instead;
+    * up to GROQ_MAX_RETRIES retries of 429s, 5xx and transport errors with full
+      jitter backoff, honouring `Retry-After`;
+    * if GROQ_HEDGE_AFTER is set, short completions (at most GROQ_HEDGE_MAX_TOKENS)
+      still running after that many seconds are hedged with a second request
+      when the quota has room; the first good response wins and the other is
+      cancelled. Streams and transcriptions are never hedged.
+
+    The HTTP client and the limits are created on first use, inside the event loop.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.api_key = api_key or Config.GROQ_API_KEY
+        self.base_url = base_url or Config.GROQ_BASE_URL
+        self.hedge_after = Config.GROQ_HEDGE_AFTER
+        self.hedge_max_tokens = Config.GROQ_HEDGE_MAX_TOKENS
+        self.max_retries = Config.GROQ_MAX_RETRIES
+        self.http: Optional[httpx.AsyncClient] = None
+        self.limits: Dict[str, ModelLimits] = {}
+        self.counters = {"requests": 0, "retries": 0, "rate_limited": 0, "errors": 0,
+                         "hedges": 0, "hedge_wins": 0, "quota_wait_s": 0.0,
+                         "quota_rejected": 0}
+
+    def _client(self) -> httpx.AsyncClient:
+        if self.http is None:
+            self.http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=httpx.Timeout(Config.GROQ_TIMEOUT, connect=10.0),
+                limits=httpx.Limits(max_connections=Config.GROQ_MAX_CONNECTIONS,
+                                    max_keepalive_connections=Config.GROQ_MAX_CONNECTIONS),
+            )
+        return self.http
+
+    def _limits(self, model: str) -> ModelLimits:
+        if model not in self.limits:
+            self.limits[model] = ModelLimits()
+        return self.limits[model]
+
+    @staticmethod
+    def estimate_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+        """Rough prompt size (about 4 characters a token) plus the completion budget."""
+        return sum(len(message["content"]) for message in messages) // 4 + max_tokens
+
+    def _rejected(self, limits: ModelLimits, response: httpx.Response) -> Optional[float]:
+        """Record a retryable status; returns the server's Retry-After, if any."""
+        if response.status_code == 429:
+            self.counters["rate_limited"] += 1
+            limits.requests.drain()
+        try:
+            return float(response.headers["retry-after"])
+        except (KeyError, ValueError):
+            return None
+
+    async def _backoff(self, model: str, attempt: int, reason: str, retry_after: Optional[float]):
+        delay = random.uniform(0, min(Config.GROQ_BACKOFF_MAX, Config.GROQ_BACKOFF_BASE * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        self.counters["retries"] += 1
+        metrics.inc("monk_groq_retries_total", model=model, reason=reason)
+        logger.warning(f"Groq call to {model} failed ({reason}), retry {attempt + 1} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    async def _acquire(self, model: str, limits: ModelLimits, tokens: int):
+        """Take quota for one call; fail fast rather than queue past GROQ_QUOTA_MAX_WAIT."""
+        start = time.monotonic()
+        max_wait = Config.GROQ_QUOTA_MAX_WAIT
+        deadline = start + max_wait if max_wait > 0 else None
+        try:
+            await limits.requests.acquire(1, deadline)
+            try:
+                await limits.tokens.acquire(tokens, deadline)
+            except asyncio.TimeoutError:
+                limits.requests.give_back(1)
+                raise
+        except asyncio.TimeoutError:
+            self.counters["quota_rejected"] += 1
+            raise GroqQuotaExceeded(model, max_wait)
+        finally:
+            self.counters["quota_wait_s"] += time.monotonic() - start
+
+    async def _post(self, limits: ModelLimits, path: str, sent: Optional[asyncio.Event] = None,
+                    **kwargs) -> httpx.Response:
+        async with limits.semaphore:
+            if sent is not None:
+                sent.set()
+            self.counters["requests"] += 1
+            limits.in_flight += 1
+            try:
+                return await self._client().post(path, **kwargs)
+            finally:
+                limits.in_flight -= 1
+
+    @staticmethod
+    def _failed(task: asyncio.Task) -> bool:
+        return task.exception() is not None or task.result().status_code in RETRY_STATUSES
+
+    async def _hedged(self, limits: ModelLimits, tokens: int, path: str, **kwargs) -> httpx.Response:
+        """Send the request and, if it is slow and the quota allows, a second copy; first good response wins."""
+        sent = asyncio.Event()
+        first = asyncio.create_task(self._post(limits, path, sent, **kwargs))
+        dispatched = asyncio.create_task(sent.wait())
+        pending = {first, dispatched}
+        try:
+            # Time the hedge from when the request went out, not from when it queued for a slot
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            dispatched.cancel()
+            pending = {first}
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_after)
+            # A hedge with no free slot would only queue behind other callers
+            if done or limits.semaphore.locked() or not (
+                limits.requests.available(1) and limits.tokens.available(tokens)
+            ):
+                return await first
+
+            limits.requests.take(1)
+            limits.tokens.take(tokens)
+            self.counters["hedges"] += 1
+            second = asyncio.create_task(self._post(limits, path, **kwargs))
+            pending = {first, second}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                good = [task for task in done if not self._failed(task)]
+                if good or not pending:
+                    # Both failed: the caller retries on the last failure
+                    winner = good[0] if good else done.pop()
+                    if winner is second and good:
+                        self.counters["hedge_wins"] += 1
+                    return winner.result()
+        finally:
+            # The loser, or both copies if the caller gave up (e.g. a branch timeout)
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+
+    async def _request(self, model: str, path: str, tokens: int, hedge: bool, **kwargs) -> httpx.Response:
+        limits = self._limits(model)
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(model, limits, tokens)
+            retry_after = None
+            try:
+                if hedge and self.hedge_after > 0:
+                    response = await self._hedged(limits, tokens, path, **kwargs)
+                else:
+                    response = await self._post(limits, path, **kwargs)
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return response
+                reason, retry_after = str(response.status_code), self._rejected(limits, response)
+                if attempt == self.max_retries:
+                    response.raise_for_status()
+            except httpx.TransportError as e:
+                reason = type(e).__name__
+                if attempt == self.max_retries:
+                    self.counters["errors"] += 1
+                    raise
+            except httpx.HTTPStatusError:
+                self.counters["errors"] += 1
+                raise
+            await self._backoff(model, attempt, reason, retry_after)
+
+    async def chat_completion(self, messages: List[Dict[str, str]], model: str, temperature: float = 0.1,
+                              max_tokens: int = 1024, hedge: bool = True) -> str:
+        """Text of the first choice of a chat completion. Only short completions are hedged."""
+        payload = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        hedge = hedge and max_tokens <= self.hedge_max_tokens
+        response = await self._request(
+            model, "/chat/completions", self.estimate_tokens(messages, max_tokens), hedge, json=payload
+        )
+        return response.json()["choices"][0]["message"]["content"]
+
+    async def stream_chat_completion(self, messages: List[Dict[str, str]], model: str, temperature: float = 0.1,
+                                     max_tokens: int = 1024) -> AsyncIterator[str]:
+        """
+        Text deltas of a streamed chat completion. A failure before the first
+        delta is retried like any other request; a stream is never hedged.
+        """
+        payload = {"model": model, "messages": messages, "temperature": temperature,
+                   "max_tokens": max_tokens, "stream": True}
+        limits, started = self._limits(model), False
+        for attempt in range(self.max_retries + 1):
+            await self._acquire(model, limits, self.estimate_tokens(messages, max_tokens))
+            retry_after = None
+            try:
+                async with limits.semaphore:
+                    self.counters["requests"] += 1
+                    limits.in_flight += 1
+                    try:
+                        async with self._client().stream("POST", "/chat/completions", json=payload) as response:
+                            if response.status_code not in RETRY_STATUSES:
+                                response.raise_for_status()
+                                async for line in response.aiter_lines():
+                                    if not line.startswith("data:"):
+                                        continue
+                                    data = line[len("data:"):].strip()
+                                    if data == "[DONE]":
+                                        return
+                                    choices = json.loads(data).get("choices") or [{}]
+                                    delta = choices[0].get("delta", {}).get("content")
+                                    if delta:
+                                        started = True
+                                        yield delta
+                                return
+                            reason, retry_after = str(response.status_code), self._rejected(limits, response)
+                            if attempt == self.max_retries:
+                                await response.aread()
+                                response.raise_for_status()
+                    finally:
+                        limits.in_flight -= 1
+            except httpx.TransportError as e:
+                reason = type(e).__name__
+                # Text already sent to the client cannot be taken back, so only retry before the first delta
+                if started or attempt == self.max_retries:
+                    self.counters["errors"] += 1
+                    raise
+            except httpx.HTTPStatusError:
+                self.counters["errors"] += 1
+                raise
+            await self._backoff(model, attempt, reason, retry_after)
+
+    async def transcribe(self, audio: bytes, filename: str, model: str) -> str:
+        """Whisper transcription of an audio file's bytes, as plain text. Never hedged: uploads are large and slow."""
+        response = await self._request(
+            model, "/audio/transcriptions", 0, False,
+            files={"file": (filename, audio)}, data={"model": model, "response_format": "text"}
+        )
+        return response.text.strip()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "quota_wait_s": round(self.counters["quota_wait_s"], 3),
+            "in_flight": {model: limits.in_flight for model, limits in self.limits.items()},
+        }
+
+    async def aclose(self):
+        if self.http is not None:
+            await self.http.aclose()
+            self.http = None
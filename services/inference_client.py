@@ -0,0 +1,107 @@
+# services/inference_client.py
+
+import base64
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import httpx
+import numpy as np
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def encode_matrix(matrix: np.ndarray) -> Dict[str, Any]:
+    """float32 matrix as base64, about a quarter of the size of JSON floats and much faster to parse"""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    return {"data": base64.b64encode(matrix.tobytes()).decode("ascii"), "shape": list(matrix.shape)}
+
+
+def decode_matrix(payload: Dict[str, Any]) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(payload["data"]), dtype=np.float32).reshape(payload["shape"])
+
+
+class InferenceClient:
+    """
+    Stands in for both the embedding model and the cross-encoder when
+    INFERENCE_MODE=sidecar, forwarding calls to the inference server over its
+    Unix socket.
+
+    The API calls `aembed()` and `apredict()` on the event loop, through a pooled
+    `httpx.AsyncClient` created on first use, so up to `max_connections` calls
+    are in flight per worker. The blocking `embed_documents()`/`predict()`
+    interface is kept for the loader and the warm-up, which run off the loop.
+    """
+
+    def __init__(self, socket_path: str = Config.INFERENCE_SOCKET,
+                 max_connections: int = Config.INFERENCE_CLIENT_MAX_CONNECTIONS,
+                 timeout: float = Config.INFERENCE_CLIENT_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        transport = httpx.HTTPTransport(uds=socket_path, retries=1, limits=self.limits)
+        self.http = httpx.Client(transport=transport, base_url="http://inference", timeout=timeout)
+        self.async_http: Optional[httpx.AsyncClient] = None
+        logger.info(f"Inference client using sidecar at {socket_path}")
+
+    def _async_client(self) -> httpx.AsyncClient:
+        if self.async_http is None:
+            transport = httpx.AsyncHTTPTransport(uds=self.socket_path, retries=1, limits=self.limits)
+            self.async_http = httpx.AsyncClient(transport=transport, base_url="http://inference", timeout=self.timeout)
+        return self.async_http
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = self.http.post(path, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Inference sidecar call {path} failed: {e}")
+            raise
+
+    async def _apost(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            response = await self._async_client().post(path, json=payload)
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"Inference sidecar call {path} failed: {e}")
+            raise
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return decode_matrix(self._post("/embed", {"texts": list(texts)})["embeddings"])
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed([text])[0].tolist()
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        scores = self._post("/rerank", {"pairs": [list(pair) for pair in pairs]})["scores"]
+        return np.asarray(scores, dtype=np.float32)
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return decode_matrix((await self._apost("/embed", {"texts": list(texts)}))["embeddings"])
+
+    async def apredict(self, pairs: Sequence[Tuple[str, str]]) -> np.ndarray:
+        if not pairs:
+            return np.zeros(0, dtype=np.float32)
+        scores = (await self._apost("/rerank", {"pairs": [list(pair) for pair in pairs]}))["scores"]
+        return np.asarray(scores, dtype=np.float32)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.http.get("/stats").json()
+
+    def close(self):
+        self.http.close()
+
+    async def aclose(self):
+        if self.async_http is not None:
+            await self.async_http.aclose()
+            self.async_http = None
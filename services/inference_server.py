@@ -0,0 +1,117 @@
+# services/inference_server.py
+#
+# Local inference sidecar: owns the embedder and cross-encoder and serves them
+# to every API worker on the node over a Unix domain socket.
+#
+#     python -m services.inference_server [--socket /tmp/monk_inference.sock]
+#
+# Requests from all workers go through one MicroBatcher per model, so
+# concurrent queries from different processes share a forward pass.
+
+import os
+import time
+import argparse
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+import numpy as np
+from fastapi import FastAPI
+from pydantic import BaseModel
+from config.config import Config
+from services import model_registry
+from services.batching import MicroBatcher
+from services.executors import shutdown_executors
+from services.inference_client import encode_matrix
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedRequest(BaseModel):
+    texts: List[str]
+
+
+class RerankRequest(BaseModel):
+    pairs: List[Tuple[str, str]]
+
+
+class InferenceServer:
+    def __init__(self):
+        self.embedding_model = None
+        self.reranker = None
+        self.embed_batcher = None
+        self.rerank_batcher = None
+        self.started = time.time()
+
+    def load(self):
+        # Always the local models, whatever INFERENCE_MODE the API workers use
+        self.embedding_model = model_registry.load_local_embedding_model()
+        self.reranker = model_registry.load_local_reranker()
+        self.embed_batcher = MicroBatcher(
+            self._embed, Config.EMBED_MAX_BATCH_SIZE, Config.EMBED_BATCH_WAIT_MS, name="sidecar_embed"
+        )
+        self.rerank_batcher = MicroBatcher(
+            self._predict, Config.RERANK_MAX_BATCH_SIZE, Config.RERANK_BATCH_WAIT_MS, name="sidecar_rerank"
+        )
+        self.embedding_model.embed_documents(["warm up"])
+        self.reranker.predict([("warm up", "warm up")])
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.embedding_model.embed_documents(texts), dtype=np.float32)
+
+    def _predict(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        return [float(score) for score in self.reranker.predict(pairs, batch_size=max(len(pairs), 1))]
+
+
+server = InferenceServer()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    server.load()
+    logger.info("Inference server ready")
+    yield
+    shutdown_executors(wait=False)
+
+
+app = FastAPI(title="The Monk AI inference server", lifespan=lifespan)
+
+
+@app.post("/embed")
+async def embed(request: EmbedRequest):
+    rows = await server.embed_batcher.submit(request.texts)
+    return {"embeddings": encode_matrix(np.vstack(rows) if rows else np.zeros((0, 0), dtype=np.float32))}
+
+
+@app.post("/rerank")
+async def rerank(request: RerankRequest):
+    return {"scores": await server.rerank_batcher.submit(request.pairs)}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "healthy", "pid": os.getpid()}
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "embedding_model": Config.EMBEDDING_MODEL,
+        "reranker_model": Config.RERANKER_MODEL,
+        "inference_backend": Config.INFERENCE_BACKEND,
+        "uptime_s": round(time.time() - server.started, 1),
+        "embed_batching": server.embed_batcher.stats(),
+        "rerank_batching": server.rerank_batcher.stats(),
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local inference sidecar for The Monk AI")
+    parser.add_argument("--socket", default=Config.INFERENCE_SOCKET)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    uvicorn.run(app, uds=args.socket, log_level="warning")
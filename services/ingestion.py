@@ -0,0 +1,370 @@
+# services/ingestion.py
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".csv", ".txt", ".jsonl")
+
+# Per-process sentence-transformers model, loaded once by the pool initializer
+_worker_model = None
+
+
+def chunk_segment(jsonl_path: str, start: int, end: int, chunk_size: int, chunk_overlap: int) -> Tuple[List[Tuple[str, str, Dict[str, Any]]], float]:
+    """
+    Read, validate and chunk the records in one byte range of a JSONL file.
+    Runs in a worker process; returns ([(chunk ID, text, metadata)], busy seconds).
+    """
+    from services.document_processor import DocumentProcessor
+
+    started = time.perf_counter()
+    processor = DocumentProcessor(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    # Identical records collapse onto one ID
+    chunks = {}
+    for doc in processor.iter_chunks(processor.iter_jsonl_documents(jsonl_path, start, end)):
+        chunks[processor.chunk_id(doc)] = (doc.page_content, doc.metadata)
+    return [(chunk_id, text, metadata) for chunk_id, (text, metadata) in chunks.items()], time.perf_counter() - started
+
+
+def _init_embedding_worker(model_name: str, num_threads: int, inference_backend: str = "torch"):
+    global _worker_model
+    if inference_backend == "onnx":
+        from services.onnx_inference import OnnxEmbedder
+        _worker_model = OnnxEmbedder.load_or_export(model_name, intra_op_threads=num_threads)
+        return
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    torch.set_num_threads(num_threads)
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def embed_texts(texts: List[str]):
+    """Encode a batch of passages. Runs in a worker process; returns (float32 vectors, busy seconds)."""
+    start = time.perf_counter()
+    vectors = _worker_model.encode(texts, batch_size=64, convert_to_numpy=True, show_progress_bar=False)
+    return vectors.astype("float32"), time.perf_counter() - start
+
+
+def list_data_files(data_dir: str) -> List[str]:
+    return sorted(
+        str(path) for path in Path(data_dir).iterdir()
+        if path.is_file() and path.suffix in SUPPORTED_EXTENSIONS
+    )
+
+
+def file_checksum(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    Checksums of ingested files and the chunk IDs each one produced, stored next
+    to the Chroma database. Changing the chunking settings or the embedding
+    model invalidates every entry.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path or os.path.join(Config.CHROMA_DB_PATH, "ingest_manifest.json")
+        self.settings = {
+            "chunk_size": Config.CHUNK_SIZE,
+            "chunk_overlap": Config.CHUNK_OVERLAP,
+            "embedding_model": Config.EMBEDDING_MODEL,
+        }
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.exists = False
+
+    def load(self) -> "IngestManifest":
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.exists = True
+            if data.get("settings") == self.settings:
+                self.files = data.get("files", {})
+            else:
+                logger.info("Chunking settings or embedding model changed; every file will be re-indexed")
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+
+class StageTimer:
+    """Busy time (summed across workers) and wall-clock span of one pipeline stage."""
+
+    def __init__(self):
+        self.busy = 0.0
+        self.items = 0
+        self.first_start = None
+        self.last_end = None
+
+    def record(self, busy: float, items: int):
+        now = time.perf_counter()
+        if self.first_start is None:
+            self.first_start = now - busy
+        self.last_end = now
+        self.busy += busy
+        self.items += items
+
+    def report(self) -> Dict[str, Any]:
+        wall = (self.last_end - self.first_start) if self.first_start is not None else 0.0
+        return {"items": self.items, "busy_s": round(self.busy, 2), "wall_s": round(wall, 2)}
+
+
+async def run_parallel_ingestion(
+    data_dir: str,
+    chunk_workers: int = Config.INGEST_CHUNK_WORKERS,
+    embed_workers: int = Config.INGEST_EMBED_WORKERS,
+    embed_batch_size: int = Config.INGEST_EMBED_BATCH_SIZE,
+    queue_depth: int = Config.INGEST_QUEUE_DEPTH,
+    segment_records: int = Config.INGEST_SEGMENT_RECORDS,
+    rebuild: bool = False,
+    incremental: bool = False,
+) -> Dict[str, Any]:
+    """
+    Pipelined ingestion: parse/chunk files in a process pool, embed large batches
+    across worker processes, and write to Chroma from a single writer.
+
+    Files are read in byte-range segments of `segment_records` lines and stages
+    are connected by bounded queues, so a slow writer or embedder makes the
+    upstream stages wait and memory stays flat regardless of corpus size.
+
+    Chunk IDs are content hashes, so writes are upserts. In incremental mode,
+    files whose checksum matches the manifest are skipped entirely, chunks
+    already in the collection are not re-embedded, and chunks of changed or
+    removed files that no longer exist are deleted.
+
+    Returns per-stage timings and change counts.
+    """
+    import chromadb
+    from chromadb.config import Settings
+    from services.vector_store import VectorStore
+    from services.document_processor import DocumentProcessor
+    from services.lexical_index import LexicalIndex
+    from services.verse_index import VerseIndex
+    from services.quantized_index import QuantizedIndex
+    from services.partitions import drop_partitions, list_partitions, rebuild_partitions
+    from services.vector_backends import create_backend
+
+    files = list_data_files(data_dir)
+    if not files:
+        raise ValueError(f"No data files found in {data_dir}")
+
+    client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH, settings=Settings(anonymized_telemetry=False))
+    backend = create_backend(client)
+    manifest = IngestManifest().load()
+    if incremental and not manifest.exists and not rebuild and backend.count():
+        # Collections built before content-hashed IDs cannot be diffed
+        logger.warning("No ingest manifest found for a non-empty collection; doing a full rebuild")
+        rebuild = True
+    if rebuild:
+        manifest.files = {}
+        backend.reset()
+        logger.info(f"Dropped existing '{Config.COLLECTION_NAME}' {backend.name} store for full rebuild")
+
+    checksums = {path: file_checksum(path) for path in files}
+    names = {path: os.path.basename(path) for path in files}
+    changes = {"files_unchanged": 0, "files_changed": 0, "files_removed": 0,
+               "chunks_skipped": 0, "chunks_embedded": 0, "chunks_deleted": 0}
+    # Counted against the manifest in both modes; a full run still processes every file
+    changed_files = [path for path in files if manifest.files.get(names[path], {}).get("sha256") != checksums[path]]
+    changes["files_changed"] = len(changed_files)
+    changes["files_unchanged"] = len(files) - len(changed_files)
+    to_process = changed_files if incremental else files
+    removed = [name for name in manifest.files if name not in set(names.values())]
+    changes["files_removed"] = len(removed)
+    new_entries: Dict[str, Dict[str, Any]] = {}
+    file_state: Dict[str, Dict[str, Any]] = {}
+    in_flight: Dict[asyncio.Future, str] = {}
+
+    loop = asyncio.get_running_loop()
+    spawn = multiprocessing.get_context("spawn")
+    threads_per_worker = max(1, (os.cpu_count() or 1) // embed_workers)
+    if Config.INFERENCE_BACKEND == "onnx":
+        # Export once here so the workers don't race to write the same files
+        from services.onnx_inference import ensure_exported
+        await loop.run_in_executor(None, ensure_exported, Config.EMBEDDING_MODEL, "embedder")
+    chunk_pool = ProcessPoolExecutor(max_workers=chunk_workers, mp_context=spawn)
+    embed_pool = ProcessPoolExecutor(
+        max_workers=embed_workers, mp_context=spawn,
+        initializer=_init_embedding_worker, initargs=(Config.EMBEDDING_MODEL, threads_per_worker, Config.INFERENCE_BACKEND)
+    )
+
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_depth)
+    write_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_depth)
+    timers = {"chunk": StageTimer(), "embed": StageTimer(), "write": StageTimer()}
+    done = object()
+
+    async def handle_segment(path: str, chunks, busy: float):
+        timers["chunk"].record(busy, len(chunks))
+        file_state[path]["chunk_ids"].extend(chunk_id for chunk_id, _, _ in chunks)
+        if incremental:
+            present = await loop.run_in_executor(None, existing_ids, [chunk_id for chunk_id, _, _ in chunks])
+            changes["chunks_skipped"] += len(present)
+            chunks = [chunk for chunk in chunks if chunk[0] not in present]
+        for i in range(0, len(chunks), embed_batch_size):
+            await embed_queue.put(chunks[i:i + embed_batch_size])
+
+        file_state[path]["pending"] -= 1
+        if file_state[path]["pending"] == 0 and file_state[path]["scheduled"]:
+            await finish_file(path)
+
+    async def finish_file(path: str):
+        name = names[path]
+        chunk_ids = file_state.pop(path)["chunk_ids"]
+        new_entries[name] = {"sha256": checksums[path], "chunk_ids": chunk_ids}
+        stale = set(manifest.files.get(name, {}).get("chunk_ids", [])) - set(chunk_ids)
+        if stale:
+            await write_queue.put(("delete", sorted(stale)))
+
+    async def drain_one():
+        finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+        for future in finished:
+            path = in_flight.pop(future)
+            chunks, busy = future.result()
+            await handle_segment(path, chunks, busy)
+
+    async def produce_chunks():
+        # Files are split into byte-range segments so no worker ever holds a whole
+        # file; at most chunk_workers * 2 segments are in flight at once.
+        processor = DocumentProcessor(chunk_size=Config.CHUNK_SIZE, chunk_overlap=Config.CHUNK_OVERLAP)
+        for path in to_process:
+            jsonl_path = await loop.run_in_executor(None, processor.to_jsonl, path)
+            file_state[path] = {"chunk_ids": [], "pending": 0, "scheduled": False}
+            for start_offset, end_offset in processor.segment_offsets(jsonl_path, segment_records):
+                while len(in_flight) >= chunk_workers * 2:
+                    await drain_one()
+                future = loop.run_in_executor(
+                    chunk_pool, chunk_segment, jsonl_path, start_offset, end_offset,
+                    Config.CHUNK_SIZE, Config.CHUNK_OVERLAP
+                )
+                in_flight[future] = path
+                file_state[path]["pending"] += 1
+            file_state[path]["scheduled"] = True
+            if file_state[path]["pending"] == 0:
+                await finish_file(path)
+        while in_flight:
+            await drain_one()
+        for name in removed:
+            await write_queue.put(("delete", manifest.files[name].get("chunk_ids", [])))
+        for _ in range(embed_workers):
+            await embed_queue.put(done)
+
+    def existing_ids(chunk_ids: List[str]) -> set:
+        present = set()
+        for i in range(0, len(chunk_ids), 5000):
+            present.update(backend.get(ids=chunk_ids[i:i + 5000], include=[])["ids"])
+        return present
+
+    async def embed_batches():
+        while True:
+            batch = await embed_queue.get()
+            if batch is done:
+                await write_queue.put(done)
+                return
+            vectors, busy = await loop.run_in_executor(embed_pool, embed_texts, [text for _, text, _ in batch])
+            timers["embed"].record(busy, len(batch))
+            await write_queue.put(("upsert", (batch, vectors)))
+
+    def write_batch(batch, vectors):
+        backend.upsert(
+            [chunk_id for chunk_id, _, _ in batch],
+            vectors,
+            [text for _, text, _ in batch],
+            [metadata for _, _, metadata in batch],
+        )
+
+    def delete_ids(chunk_ids: List[str]):
+        for i in range(0, len(chunk_ids), 5000):
+            backend.delete(chunk_ids[i:i + 5000])
+
+    async def write_batches():
+        finished = 0
+        while finished < embed_workers:
+            item = await write_queue.get()
+            if item is done:
+                finished += 1
+                continue
+            action, payload = item
+            start = time.perf_counter()
+            # Single writer thread: backend writes are serialized anyway
+            if action == "delete":
+                await loop.run_in_executor(None, delete_ids, payload)
+                changes["chunks_deleted"] += len(payload)
+                timers["write"].record(time.perf_counter() - start, 0)
+                continue
+            batch, vectors = payload
+            await loop.run_in_executor(None, write_batch, batch, vectors)
+            changes["chunks_embedded"] += len(batch)
+            timers["write"].record(time.perf_counter() - start, len(batch))
+            logger.info(f"Wrote {timers['write'].items} chunks to '{Config.COLLECTION_NAME}'")
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(produce_chunks(), write_batches(), *(embed_batches() for _ in range(embed_workers)))
+    finally:
+        chunk_pool.shutdown(cancel_futures=True)
+        embed_pool.shutdown(cancel_futures=True)
+    await loop.run_in_executor(None, backend.persist)
+
+    for name in removed:
+        manifest.files.pop(name, None)
+    manifest.files.update(new_entries)
+    manifest.save()
+    changed = changes["chunks_embedded"] or changes["chunks_deleted"] or rebuild
+
+    async def build_stage(name: str, build):
+        # `build` runs in a thread and returns the number of items it indexed
+        stage_start = time.perf_counter()
+        items = await loop.run_in_executor(None, build)
+        timers[name] = StageTimer()
+        timers[name].record(time.perf_counter() - stage_start, items)
+
+    # Derived indexes are rebuilt before the version bump, so readers that reload on
+    # a new version never pick up the previous ones
+    try:
+        if changed or not LexicalIndex.exists():
+            await build_stage("lexical_index", lambda: LexicalIndex.build_from_collection(backend)["num_docs"])
+        if changed or not os.path.exists(VerseIndex.default_path()):
+            await build_stage("verse_index", lambda: VerseIndex.build(data_dir)["keys"])
+        # Per-book partitions are Chroma collections, so they only apply to the Chroma backend
+        if Config.PARTITION_BY_BOOK and backend.name == "chroma" and (changed or not list_partitions(client)):
+            await build_stage("partitions", lambda: sum(rebuild_partitions(client, backend.collection)["chunks"].values()))
+        elif changed:
+            drop_partitions(client)
+        if Config.VECTOR_BACKEND == "quantized" and (changed or not QuantizedIndex.exists()):
+            await build_stage("quantized_index", lambda: QuantizedIndex.build_from_collection(backend)["count"])
+    finally:
+        if changed:
+            VectorStore.bump_collection_version()
+
+    report = {
+        "files": len(files),
+        "mode": "incremental" if incremental else "full",
+        **changes,
+        "total_s": round(time.perf_counter() - start, 2),
+        "chunk_workers": chunk_workers,
+        "embed_workers": embed_workers,
+        "stages": {name: timer.report() for name, timer in timers.items()},
+        "collection_count": backend.count(),
+    }
+    logger.info(f"Parallel ingestion finished: {report}")
+    return report
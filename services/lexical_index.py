@@ -0,0 +1,229 @@
+# services/lexical_index.py
+
+import os
+import re
+import json
+import math
+import time
+import shutil
+import logging
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from config.config import Config
+from services.partitions import chunk_book
+
+logger = logging.getLogger(__name__)
+
+# Verse references such as "2.47" stay one token; everything else splits on non-word characters
+TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)+|\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have he her his i in is it its of on or she that the their "
+    "them they this to was were what which who will with you your".split()
+)
+# Metadata keys that describe where a chunk came from or how it was split, not what it says
+SKIPPED_METADATA = ("source", "source_file", "chunk_id", "total_chunks")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, strip diacritics (Nārāyaṇa -> narayana) and drop stopwords."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return [token for token in TOKEN_PATTERN.findall(text) if token not in STOPWORDS]
+
+
+def index_text(content: str, metadata: Optional[Dict[str, Any]]) -> str:
+    """Text that gets indexed for a chunk: its content plus book/chapter/verse metadata."""
+    values = [str(value) for key, value in (metadata or {}).items() if key not in SKIPPED_METADATA]
+    return " ".join([content, *values])
+
+
+class LexicalIndex:
+    """
+    Persistent BM25 inverted index over the chunks in the Chroma collection.
+
+    On disk the index is a directory of flat arrays: postings (chunk ordinal and
+    term frequency) sorted by term, per-chunk lengths, the chunk IDs and a term
+    table mapping each term to its slice of the postings. The arrays are opened
+    with `mmap_mode="r"`, so loading is near-instant and pages are only read for
+    the terms a query touches.
+    """
+
+    def __init__(self, path: str, terms: Dict[str, List[int]], doc_ids: List[str],
+                 postings_doc: np.ndarray, postings_tf: np.ndarray, doc_len: np.ndarray,
+                 doc_book: np.ndarray, meta: Dict[str, Any]):
+        self.path = path
+        self.terms = terms
+        self.doc_ids = doc_ids
+        self.postings_doc = postings_doc
+        self.postings_tf = postings_tf
+        self.doc_len = doc_len
+        self.doc_book = doc_book
+        self.books = {book: ordinal for ordinal, book in enumerate(meta.get("books", []))}
+        self.meta = meta
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        self.avg_doc_len = meta["avg_doc_len"] or 1.0
+
+    @staticmethod
+    def default_path() -> str:
+        return os.path.join(Config.CHROMA_DB_PATH, "lexical_index")
+
+    @classmethod
+    def exists(cls, path: Optional[str] = None) -> bool:
+        return os.path.exists(os.path.join(path or cls.default_path(), "meta.json"))
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["LexicalIndex"]:
+        """Open an index built by `build()`; returns None if there is none yet."""
+        path = path or cls.default_path()
+        if not cls.exists(path):
+            return None
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "terms.json")) as f:
+            terms = json.load(f)
+        with open(os.path.join(path, "doc_ids.json")) as f:
+            doc_ids = json.load(f)
+        return cls(
+            path, terms, doc_ids,
+            np.load(os.path.join(path, "postings_doc.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "postings_tf.npy"), mmap_mode="r"),
+            np.load(os.path.join(path, "doc_len.npy"), mmap_mode="r"),
+            cls._load_doc_book(path, len(doc_ids)),
+            meta,
+        )
+
+    @staticmethod
+    def _load_doc_book(path: str, num_docs: int) -> np.ndarray:
+        # Indexes built before book filtering have no per-chunk book column
+        book_path = os.path.join(path, "doc_book.npy")
+        if not os.path.exists(book_path):
+            return np.full(num_docs, -1, dtype=np.int16)
+        return np.load(book_path, mmap_mode="r")
+
+    @staticmethod
+    def build(records: Iterable[Tuple[str, str, Optional[str]]], path: Optional[str] = None,
+              k1: float = Config.BM25_K1, b: float = Config.BM25_B) -> Dict[str, Any]:
+        """
+        Build the index from (chunk_id, text, book) records and write it to `path`.
+
+        The new index is written next to the old one and swapped in at the end,
+        so a running API never opens a half-written index.
+        """
+        path = path or LexicalIndex.default_path()
+        start = time.perf_counter()
+        postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        doc_ids, doc_len, doc_book = [], [], []
+        books: Dict[str, int] = {}
+        for chunk_id, text, book in records:
+            ordinal = len(doc_ids)
+            tokens = tokenize(text)
+            counts: Dict[str, int] = defaultdict(int)
+            for token in tokens:
+                counts[token] += 1
+            for token, count in counts.items():
+                postings[token].append((ordinal, count))
+            doc_ids.append(chunk_id)
+            doc_len.append(len(tokens))
+            doc_book.append(books.setdefault(book, len(books)) if book else -1)
+
+        terms, offset = {}, 0
+        postings_doc, postings_tf = [], []
+        for term in sorted(postings):
+            entries = postings[term]
+            terms[term] = [offset, len(entries)]
+            postings_doc.extend(ordinal for ordinal, _ in entries)
+            postings_tf.extend(count for _, count in entries)
+            offset += len(entries)
+
+        meta = {
+            "num_docs": len(doc_ids),
+            "num_terms": len(terms),
+            "num_postings": offset,
+            "avg_doc_len": float(np.mean(doc_len)) if doc_len else 0.0,
+            "books": sorted(books, key=books.get),
+            "k1": k1,
+            "b": b,
+            "built_at": time.time(),
+        }
+
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "postings_doc.npy"), np.asarray(postings_doc, dtype=np.int32))
+        np.save(os.path.join(tmp_path, "postings_tf.npy"), np.asarray(postings_tf, dtype=np.float32))
+        np.save(os.path.join(tmp_path, "doc_len.npy"), np.asarray(doc_len, dtype=np.float32))
+        np.save(os.path.join(tmp_path, "doc_book.npy"), np.asarray(doc_book, dtype=np.int16))
+        with open(os.path.join(tmp_path, "terms.json"), "w") as f:
+            json.dump(terms, f, ensure_ascii=False)
+        with open(os.path.join(tmp_path, "doc_ids.json"), "w") as f:
+            json.dump(doc_ids, f)
+        # meta.json is written last: its presence marks a complete index
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+        meta["build_s"] = round(time.perf_counter() - start, 2)
+        logger.info(f"Built lexical index at {path}: {meta}")
+        return meta
+
+    @staticmethod
+    def iter_collection(collection, page_size: int = 5000) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """Page through a Chroma collection yielding (chunk_id, index text, book)."""
+        offset = 0
+        while True:
+            page = collection.get(limit=page_size, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                return
+            for chunk_id, content, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+                yield chunk_id, index_text(content or "", metadata), chunk_book(metadata)
+            offset += len(page["ids"])
+
+    @classmethod
+    def build_from_collection(cls, collection, path: Optional[str] = None) -> Dict[str, Any]:
+        """Rebuild the index from whatever is currently stored in the Chroma collection."""
+        return cls.build(cls.iter_collection(collection), path)
+
+    def search(self, query: str, k: int, book: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k (chunk_id, BM25 score) for the query, best first, optionally within one book."""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if book is not None and book not in self.books:
+            return []
+        for term in set(tokenize(query)):
+            entry = self.terms.get(term)
+            if entry is None:
+                continue
+            start, df = entry
+            docs = self.postings_doc[start:start + df]
+            tf = self.postings_tf[start:start + df]
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_len[docs] / self.avg_doc_len)
+            # A term appears at most once per chunk in its postings, so plain fancy-index add is safe
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if book is not None:
+            scores[self.doc_book != self.books[book]] = 0
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+        if len(matched) > k:
+            matched = matched[np.argpartition(scores[matched], -k)[-k:]]
+        ranked = matched[np.argsort(scores[matched])[::-1]]
+        return [(self.doc_ids[i], float(scores[i])) for i in ranked]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "num_docs": self.meta["num_docs"],
+            "num_terms": self.meta["num_terms"],
+            "num_postings": self.meta["num_postings"],
+            "avg_doc_len": round(self.avg_doc_len, 1),
+            "built_at": self.meta["built_at"],
+        }
@@ -1,12 +1,15 @@
 # services/llm_service.py
 
-from groq import Groq
 # --- UPDATED IMPORT ---
 from deep_translator import GoogleTranslator
+import os
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 import logging
 from config.config import Config
+from services import executors
+from services.groq_client import AsyncGroqClient
+from services.context_builder import format_passage
 from google.api_core.exceptions import GoogleAPICallError
 try:
     from google_search import google_search
@@ -17,11 +20,17 @@ except (ImportError, GoogleAPICallError) as e:
 
 logger = logging.getLogger(__name__)
 
+TRANSLATION_UNAVAILABLE = "अनुवाद अनुपलब्ध है"  # Translation unavailable
+
 class LLMService:
     def __init__(self):
-        self.groq_client = Groq(api_key=Config.GROQ_API_KEY)
+        self.groq_client = AsyncGroqClient()
 
-    async def identify_and_explain_keywords(self, text: str) -> Dict[str, str]:
+    async def identify_and_explain_keywords(self, text: str, raise_errors: bool = False) -> Dict[str, str]:
+        """
+        Explain up to 3 key terms in `text`. Errors are logged and give `{}`,
+        unless `raise_errors` is set so the caller can report the failure.
+        """
         explanations = {}
         if not google_search:
             return explanations # Return empty if search is not available
@@ -33,21 +42,21 @@ Text: "{text}"
 
 Terms:"""
 
-            response = self.groq_client.chat.completions.create(
+            response = await self.groq_client.chat_completion(
                 messages=[{"role": "user", "content": prompt}],
                 model="llama3-8b-8192",
                 temperature=0.1,
                 max_tokens=50,
             )
             
-            keywords_str = response.choices[0].message.content.strip()
+            keywords_str = response.strip()
             keywords = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
 
             if not keywords:
                 return {}
 
             search_queries = [f"what is the meaning of {kw} in hinduism" for kw in keywords]
-            search_results_list = google_search.search(queries=search_queries)
+            search_results_list = await executors.run_io(google_search.search, queries=search_queries)
             
             # The tool returns a list of lists of dictionaries
             search_results = [item for sublist in search_results_list for item in sublist]
@@ -64,6 +73,8 @@ Terms:"""
 
         except Exception as e:
             logger.error(f"Error identifying or explaining keywords: {e}")
+            if raise_errors:
+                raise
             return {}
             
         return explanations
@@ -81,10 +92,7 @@ Terms:"""
         return source_books[:3]
     
     def create_prompt(self, query: str, context_docs: List[Dict], mode: str) -> str:
-        context_text = "\n\n".join([
-            f"Source: {doc['metadata'].get('book_name', 'Unknown')} - {doc['metadata'].get('chapter', '')} {doc['metadata'].get('section', '')}\nContent: {doc['content']}"
-            for doc in context_docs
-        ])
+        context_text = "\n\n".join(format_passage(doc) for doc in context_docs)
         
         if mode == "beginner":
             prompt = f"""You are The Monk AI, a helpful guide to Hindu philosophy for beginners.
@@ -112,11 +120,11 @@ User Question: {query}
 Provide a comprehensive and scholarly response based on the context."""
         return prompt
     
-    async def generate_response(self, query: str, context_docs: List[Dict], mode: str) -> Dict[str, Any]:
+    async def generate_response(self, query: str, context_docs: List[Dict], mode: str, explain_keywords: bool = True) -> Dict[str, Any]:
         try:
             prompt = self.create_prompt(query, context_docs, mode)
             
-            chat_completion = self.groq_client.chat.completions.create(
+            response_text = await self.groq_client.chat_completion(
                 messages=[
                     {"role": "system", "content": "You are The Monk AI, an expert in Hindu philosophy. Provide accurate, respectful, and well-cited responses based on the context given."},
                     {"role": "user", "content": prompt}
@@ -125,13 +133,12 @@ Provide a comprehensive and scholarly response based on the context."""
                 temperature=Config.TEMPERATURE,
                 max_tokens=Config.MAX_TOKENS,
             )
-            response_text = chat_completion.choices[0].message.content
             
             citations = self.extract_citations(context_docs)
             recommendations = self.get_book_recommendations(context_docs)
             
             keywords_explained = None
-            if mode == "beginner":
+            if mode == "beginner" and explain_keywords:
                 keywords_explained = await self.identify_and_explain_keywords(response_text)
             
             return {
@@ -144,43 +151,69 @@ Provide a comprehensive and scholarly response based on the context."""
             logger.error(f"Error generating LLM response: {e}")
             raise
     
+    async def stream_response(self, query: str, context_docs: List[Dict], mode: str) -> AsyncIterator[str]:
+        """Stream the answer from Groq, yielding text deltas as they arrive."""
+        prompt = self.create_prompt(query, context_docs, mode)
+        stream = self.groq_client.stream_chat_completion(
+            messages=[
+                {"role": "system", "content": "You are The Monk AI, an expert in Hindu philosophy. Provide accurate, respectful, and well-cited responses based on the context given."},
+                {"role": "user", "content": prompt}
+            ],
+            model=Config.LLM_MODEL,
+            temperature=Config.TEMPERATURE,
+            max_tokens=Config.MAX_TOKENS,
+        )
+        try:
+            async for delta in stream:
+                yield delta
+        except Exception as e:
+            logger.error(f"Error streaming LLM response: {e}")
+            raise
+        finally:
+            await stream.aclose()
+    
     def extract_citations(self, context_docs: List[Dict]) -> List[Dict]:
         citations = []
         for doc in context_docs:
             citation = {
-                "book": doc['metadata'].get('book_name', 'Unknown Source'),
+                "book": doc['metadata'].get('book_name') or doc['metadata'].get('Veda', 'Unknown Source'),
                 "chapter": doc['metadata'].get('chapter', ''),
                 "section": doc['metadata'].get('section', ''),
-                "verse": doc['metadata'].get('verse_number', ''),
+                "verse": doc['metadata'].get('verse_number', doc['metadata'].get('law_number', doc['metadata'].get('Verse', ''))),
                 "content_preview": doc['content'][:100] + "...",
             }
             citations.append(citation)
         return citations
     
     # --- UPDATED FUNCTION ---
-    async def translate_to_hindi(self, text: str) -> str:
-        """Translate response to Hindi using deep-translator."""
+    async def translate_to_hindi(self, text: str, raise_errors: bool = False) -> str:
+        """
+        Translate response to Hindi using deep-translator. On error this returns
+        `TRANSLATION_UNAVAILABLE`, unless `raise_errors` is set.
+        """
         try:
             if not text or not text.strip():
                 return ""
             # This runs in a separate thread to avoid blocking asyncio event loop
-            translated_text = GoogleTranslator(source='auto', target='hi').translate(text)
+            translator = GoogleTranslator(source='auto', target='hi')
+            translated_text = await executors.run_io(translator.translate, text)
             return translated_text
         except Exception as e:
             logger.error(f"Translation error: {e}")
-            return "अनुवाद अनुपलब्ध है"  # Translation unavailable
+            if raise_errors:
+                raise
+            return TRANSLATION_UNAVAILABLE
 
     async def transcribe_audio(self, audio_file_path: str) -> str:
         """Transcribe audio to text using Groq's Whisper API"""
         try:
-            with open(audio_file_path, "rb") as audio_file:
-                transcription = self.groq_client.audio.transcriptions.create(
-                    file=audio_file,
-                    model=Config.WHISPER_MODEL,
-                    response_format="text"
-                )
-            return str(transcription)
+            audio = await executors.run_io(self._read_file, audio_file_path)
+            return await self.groq_client.transcribe(audio, os.path.basename(audio_file_path), Config.WHISPER_MODEL)
         except Exception as e:
             logger.error(f"Audio transcription error: {e}")
             raise
 
+    @staticmethod
+    def _read_file(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
@@ -0,0 +1,188 @@
+# services/metrics.py
+
+import time
+import bisect
+import threading
+import contextvars
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+from config.config import Config
+
+# Seconds; covers a cached embed (sub-millisecond) up to a slow Groq generation
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = "monk_stage_duration_seconds"
+STAGE_ERRORS = "monk_stage_errors_total"
+REQUEST_SECONDS = "monk_request_duration_seconds"
+
+HELP = {
+    STAGE_SECONDS: "Time spent in each stage of the RAG pipeline",
+    STAGE_ERRORS: "Stages that raised or timed out",
+    REQUEST_SECONDS: "End-to-end time of RAG pipeline requests",
+    "monk_groq_retries_total": "Groq requests retried after a 429, 5xx or transport error",
+}
+
+# The query mode of the request being served, inherited by the tasks it starts
+_mode: contextvars.ContextVar[str] = contextvars.ContextVar("metrics_mode", default="none")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+_DISABLED = nullcontext()
+
+
+class Histogram:
+    """Bucket counts for one label set; rendered cumulatively, like a Prometheus histogram."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-quantile (None if it is in the +Inf bucket)."""
+        if not self.count:
+            return None
+        rank, seen = q * self.count, 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+
+class Metrics:
+    """
+    Per-stage latency histograms and error counters for the RAG pipeline,
+    exported in the Prometheus text format at `/metrics`.
+
+    Stages are timed with `span()`; `request()` times a whole request and sets
+    the mode label for every span inside it, including spans in tasks it starts.
+    """
+
+    def __init__(self, enabled: bool = Config.METRICS_ENABLED, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0.0) + amount
+
+    def span(self, stage: str):
+        """Time one pipeline stage; works around `await`s as well as blocking code."""
+        if not self.enabled:
+            return _DISABLED
+        return self._span(stage)
+
+    @contextmanager
+    def _span(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc(STAGE_ERRORS, stage=stage, mode=_mode.get())
+            raise
+        finally:
+            self.observe(STAGE_SECONDS, time.perf_counter() - start, stage=stage, mode=_mode.get())
+
+    @contextmanager
+    def request(self, endpoint: str, mode: str) -> Iterator[Dict[str, str]]:
+        """
+        Time a whole request. Spans inside it are labelled with `mode`; the
+        yielded dict's `route` ("rag", "cache", "verse", ...) labels the request.
+        """
+        labels = {"route": "rag"}
+        if not self.enabled:
+            yield labels
+            return
+        token = _mode.set(mode)
+        start = time.perf_counter()
+        try:
+            yield labels
+        finally:
+            try:
+                _mode.reset(token)
+            except ValueError:
+                # A streaming response closed from another task's context
+                _mode.set("none")
+            self.observe(REQUEST_SECONDS, time.perf_counter() - start, endpoint=endpoint, mode=mode, route=labels["route"])
+
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+        return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with self.lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+            snapshot = [(key, list(h.counts), h.sum, h.count) for key, h in histograms]
+        lines, declared = [], set()
+        for (name, labels), counts, total, count in snapshot:
+            if name not in declared:
+                declared.add(name)
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} histogram"]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{self._format_labels(labels, (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{self._format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{self._format_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            if name not in declared:
+                declared.add(name)
+                lines += [f"# HELP {name} {HELP.get(name, name)}", f"# TYPE {name} counter"]
+            lines.append(f"{name}{self._format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def stage_summary(self) -> Dict[str, Any]:
+        """Count, mean and bucket-bound p50/p99 per stage and mode, for /system/stats."""
+        with self.lock:
+            items = [(dict(labels), h) for (name, labels), h in self.histograms.items() if name == STAGE_SECONDS]
+            errors = {labels: value for (name, labels), value in self.counters.items() if name == STAGE_ERRORS}
+        summary: Dict[str, Any] = {}
+        for labels, histogram in sorted(items, key=lambda item: (item[0]["stage"], item[0]["mode"])):
+            summary.setdefault(labels["stage"], {})[labels["mode"]] = {
+                "count": histogram.count,
+                "mean_ms": round(histogram.sum / histogram.count * 1000, 2) if histogram.count else None,
+                "p50_le_ms": self._ms(histogram.quantile(0.5)),
+                "p99_le_ms": self._ms(histogram.quantile(0.99)),
+                "errors": int(errors.get(tuple(sorted(labels.items())), 0)),
+            }
+        return {"enabled": self.enabled, "stages": summary}
+
+    @staticmethod
+    def _ms(seconds: Optional[float]) -> Optional[float]:
+        return round(seconds * 1000, 2) if seconds is not None else None
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+metrics = Metrics()
@@ -0,0 +1,85 @@
+# services/model_registry.py
+
+import time
+import logging
+import threading
+from typing import Any, Dict
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+# One embedder and one cross-encoder per process. Loaded in the gunicorn master
+# before it forks (PRELOAD_MODELS), the weights are shared copy-on-write by every worker.
+_models: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def load_local_embedding_model():
+    if Config.INFERENCE_BACKEND == "onnx":
+        from services.onnx_inference import OnnxEmbedder
+        return OnnxEmbedder.load_or_export(Config.EMBEDDING_MODEL)
+    try:
+        from langchain_huggingface import HuggingFaceEmbeddings
+    except ImportError:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=Config.EMBEDDING_MODEL, model_kwargs={'device': 'cpu'})
+
+
+def load_local_reranker():
+    if Config.INFERENCE_BACKEND == "onnx":
+        from services.onnx_inference import OnnxCrossEncoder
+        return OnnxCrossEncoder.load_or_export(Config.RERANKER_MODEL)
+    from sentence_transformers import CrossEncoder
+    return CrossEncoder(Config.RERANKER_MODEL)
+
+
+def _connect_sidecar():
+    from services.inference_client import InferenceClient
+    return InferenceClient()
+
+
+_loaders = {"embedder": load_local_embedding_model, "reranker": load_local_reranker, "sidecar": _connect_sidecar}
+
+
+def get_model(name: str) -> Any:
+    """The process-wide model, loading it on first use."""
+    model = _models.get(name)
+    if model is None:
+        with _lock:
+            model = _models.get(name)
+            if model is None:
+                start = time.perf_counter()
+                model = _models[name] = _loaders[name]()
+                logger.info(f"Loaded {name} in {time.perf_counter() - start:.2f}s")
+    return model
+
+
+def get_embedding_model() -> Any:
+    # With INFERENCE_MODE=sidecar one pooled client stands in for both models
+    return get_model("sidecar" if Config.INFERENCE_MODE == "sidecar" else "embedder")
+
+
+def get_reranker() -> Any:
+    return get_model("sidecar" if Config.INFERENCE_MODE == "sidecar" else "reranker")
+
+
+def preload_models():
+    """
+    Load the models in the parent before workers fork (see gunicorn.conf.py).
+    ONNX Runtime sessions own thread pools that don't survive fork, so with
+    INFERENCE_BACKEND=onnx each worker loads its own (small, int8) models instead.
+    """
+    if Config.INFERENCE_MODE == "sidecar":
+        logger.info("Models live in the inference sidecar; skipping preload")
+        return
+    if Config.INFERENCE_BACKEND == "onnx":
+        logger.info("ONNX models are loaded per worker; skipping preload")
+        return
+    start = time.perf_counter()
+    get_embedding_model()
+    get_reranker()
+    logger.info(f"Preloaded models for sharing across workers in {time.perf_counter() - start:.2f}s")
+
+
+def loaded_models() -> Dict[str, str]:
+    return {name: type(model).__name__ for name, model in _models.items()}
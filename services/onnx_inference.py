@@ -0,0 +1,190 @@
+# services/onnx_inference.py
+
+import os
+import re
+import json
+import time
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def model_dir(model_name: str, kind: str) -> str:
+    """Export directory for a model, e.g. onnx_models/embedder-all-minilm-l6-v2."""
+    slug = re.sub(r"[^a-z0-9]+", "-", os.path.basename(model_name.rstrip("/")).lower()).strip("-")
+    return os.path.join(Config.ONNX_MODEL_DIR, f"{kind}-{slug}")
+
+
+def export_model(model_name: str, kind: str, path: Optional[str] = None, quantize: bool = True) -> Dict[str, Any]:
+    """
+    Export the transformer behind a sentence-transformers embedder or
+    cross-encoder to ONNX, plus a dynamically int8-quantized copy.
+
+    Pooling, normalization and the cross-encoder activation are read from the
+    loaded model and stored in meta.json, so inference matches the torch path.
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    path = path or model_dir(model_name, kind)
+    os.makedirs(path, exist_ok=True)
+    start = time.perf_counter()
+
+    if kind == "embedder":
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name, device="cpu")
+        transformer, tokenizer = model[0].auto_model, model.tokenizer
+        pooling = model[1]
+        meta = {
+            "max_length": model.max_seq_length,
+            "pooling": getattr(pooling, "pooling_mode", None) or pooling.get_pooling_mode_str(),
+            "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        }
+        output_name, sample = "last_hidden_state", tokenizer(["export sample"], return_tensors="pt")
+    elif kind == "reranker":
+        from sentence_transformers import CrossEncoder
+        model = CrossEncoder(model_name, device="cpu")
+        transformer, tokenizer = model.model, model.tokenizer
+        meta = {
+            "max_length": model.max_length or tokenizer.model_max_length,
+            "activation": "sigmoid" if isinstance(model.activation_fn, torch.nn.Sigmoid) else "identity",
+        }
+        output_name, sample = "logits", tokenizer(["export query"], ["export passage"], return_tensors="pt")
+    else:
+        raise ValueError(f"Unknown model kind: {kind}")
+
+    class Wrapper(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *inputs):
+            return self.inner(**dict(zip(input_names, inputs)))[0]
+
+    input_names = list(sample.keys())
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = {0: "batch"}
+    transformer.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            Wrapper(transformer), tuple(sample[name] for name in input_names), os.path.join(path, "model.onnx"),
+            input_names=input_names, output_names=[output_name], dynamic_axes=dynamic_axes,
+            opset_version=17, dynamo=False
+        )
+    if quantize:
+        quantize_dynamic(os.path.join(path, "model.onnx"), os.path.join(path, "model.int8.onnx"), weight_type=QuantType.QInt8)
+    tokenizer.save_pretrained(path)
+
+    meta.update({"model_name": model_name, "kind": kind, "inputs": input_names, "output": output_name,
+                 "quantized": quantize, "exported_at": time.time()})
+    with open(os.path.join(path, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    logger.info(f"Exported {kind} '{model_name}' to ONNX at {path} in {time.perf_counter() - start:.1f}s")
+    return meta
+
+
+def ensure_exported(model_name: str, kind: str) -> str:
+    """Export directory for a model, exporting it first if there is no export yet."""
+    path = model_dir(model_name, kind)
+    if not os.path.exists(os.path.join(path, "meta.json")):
+        logger.info(f"No ONNX export of '{model_name}' found; exporting to {path}")
+        export_model(model_name, kind, path)
+    return path
+
+
+class OnnxModel:
+    """An exported model served by ONNX Runtime; use `load_or_export` to get one."""
+
+    kind = ""
+
+    def __init__(self, path: str, quantized: bool = Config.ONNX_QUANTIZE,
+                 intra_op_threads: int = Config.ONNX_INTRA_OP_THREADS):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        model_file = "model.int8.onnx" if quantized and self.meta["quantized"] else "model.onnx"
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(os.path.join(path, model_file), options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(path)
+        self.path = path
+        self.model_file = model_file
+        self.max_length = self.meta["max_length"]
+
+    @classmethod
+    def load_or_export(cls, model_name: str, quantized: bool = Config.ONNX_QUANTIZE,
+                       intra_op_threads: int = Config.ONNX_INTRA_OP_THREADS) -> "OnnxModel":
+        path = ensure_exported(model_name, cls.kind)
+        model = cls(path, quantized, intra_op_threads)
+        logger.info(f"Loaded ONNX {cls.kind} from {path} ({model.model_file})")
+        return model
+
+    def _run(self, encoded: Dict[str, np.ndarray]) -> np.ndarray:
+        feeds = {name: encoded[name].astype(np.int64) for name in self.meta["inputs"]}
+        return self.session.run([self.meta["output"]], feeds)[0]
+
+
+class OnnxEmbedder(OnnxModel):
+    """Drop-in for the embedding model: `embed_documents`, `embed_query` and an ST-style `encode`."""
+
+    kind = "embedder"
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        if self.meta["pooling"] == "cls":
+            pooled = hidden[:, 0]
+        elif self.meta["pooling"] == "max":
+            pooled = np.where(attention_mask[..., None] > 0, hidden, -1e9).max(axis=1)
+        else:
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.meta["normalize"]:
+            pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        """Same call shape as `SentenceTransformer.encode`; always returns a float32 array."""
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        # Length-sorted batches keep padding, and so wasted compute, to a minimum
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        batches = []
+        for i in range(0, len(texts), batch_size):
+            batch = [texts[j] for j in order[i:i + batch_size]]
+            encoded = self.tokenizer(batch, padding=True, truncation=True, max_length=self.max_length, return_tensors="np")
+            batches.append(self._pool(self._run(encoded), encoded["attention_mask"]))
+        vectors = np.empty((len(texts), batches[0].shape[1]), dtype=np.float32)
+        vectors[order] = np.vstack(batches)
+        return vectors
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.encode([text])[0].tolist()
+
+
+class OnnxCrossEncoder(OnnxModel):
+    """Drop-in for `CrossEncoder.predict`."""
+
+    kind = "reranker"
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        scores = []
+        for i in range(0, len(pairs), max(batch_size, 1)):
+            batch = pairs[i:i + batch_size]
+            encoded = self.tokenizer([query for query, _ in batch], [passage for _, passage in batch], padding=True,
+                                     truncation=True, max_length=self.max_length, return_tensors="np")
+            logits = self._run(encoded)
+            scores.append(logits[:, 0] if logits.shape[1] == 1 else logits)
+        scores = np.concatenate(scores) if scores else np.zeros(0, dtype=np.float32)
+        if self.meta["activation"] == "sigmoid":
+            scores = 1.0 / (1.0 + np.exp(-scores))
+        return scores.astype(np.float32)
@@ -0,0 +1,100 @@
+# services/partitions.py
+
+import re
+import time
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+PARTITION_SEPARATOR = "__"
+
+
+def chunk_book(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Book a chunk belongs to; the Vedas carry it under 'Veda' instead of 'book_name'."""
+    metadata = metadata or {}
+    return metadata.get("book_name") or metadata.get("Veda")
+
+
+def partition_name(book: str, collection_name: str = Config.COLLECTION_NAME) -> str:
+    """Chroma-safe name of the per-book collection, e.g. hindu_scriptures__bhagavad_gita."""
+    slug = re.sub(r"[^a-z0-9]+", "_", book.lower()).strip("_")
+    return f"{collection_name}{PARTITION_SEPARATOR}{slug}"[:63]
+
+
+def build_where(book: Optional[str] = None, chapter: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Chroma `where` clause scoping a search to a book and/or chapter."""
+    clauses = []
+    if book:
+        clauses.append({"$or": [{"book_name": book}, {"Veda": book}]})
+    if chapter:
+        clauses.append({"chapter": chapter})
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def iter_collection(collection, include: List[str], where: Optional[Dict[str, Any]] = None,
+                    page_size: int = 2000) -> Iterator[Dict[str, Any]]:
+    """Page through a collection, yielding Chroma `get` pages."""
+    offset = 0
+    while True:
+        page = collection.get(where=where, limit=page_size, offset=offset, include=include)
+        if not page["ids"]:
+            return
+        yield page
+        offset += len(page["ids"])
+
+
+def list_partitions(client, collection_name: str = Config.COLLECTION_NAME) -> List[str]:
+    prefix = f"{collection_name}{PARTITION_SEPARATOR}"
+    names = [getattr(collection, "name", collection) for collection in client.list_collections()]
+    return sorted(name for name in names if name.startswith(prefix))
+
+
+def drop_partitions(client, collection_name: str = Config.COLLECTION_NAME) -> int:
+    names = list_partitions(client, collection_name)
+    for name in names:
+        client.delete_collection(name)
+    return len(names)
+
+
+def rebuild_partitions(client, collection, collection_name: str = Config.COLLECTION_NAME) -> Dict[str, Any]:
+    """
+    Copy every chunk of the main collection into a per-book collection.
+
+    Embeddings are copied, not recomputed, so this costs one read and one
+    write per chunk. Existing partitions are dropped first so deletions in the
+    main collection carry over.
+    """
+    start = time.perf_counter()
+    drop_partitions(client, collection_name)
+
+    partitions: Dict[str, Any] = {}
+    counts: Dict[str, int] = {}
+    for page in iter_collection(collection, include=["embeddings", "documents", "metadatas"]):
+        by_book: Dict[str, Dict[str, list]] = {}
+        for chunk_id, embedding, content, metadata in zip(
+            page["ids"], page["embeddings"], page["documents"], page["metadatas"]
+        ):
+            book = chunk_book(metadata)
+            if not book:
+                continue
+            batch = by_book.setdefault(book, {"ids": [], "embeddings": [], "documents": [], "metadatas": []})
+            batch["ids"].append(chunk_id)
+            batch["embeddings"].append(embedding)
+            batch["documents"].append(content)
+            batch["metadatas"].append(metadata)
+
+        for book, batch in by_book.items():
+            if book not in partitions:
+                partitions[book] = client.get_or_create_collection(
+                    partition_name(book, collection_name), metadata=collection.metadata, embedding_function=None
+                )
+            partitions[book].upsert(**batch)
+            counts[book] = counts.get(book, 0) + len(batch["ids"])
+
+    report = {"partitions": len(partitions), "chunks": counts, "build_s": round(time.perf_counter() - start, 2)}
+    logger.info(f"Rebuilt per-book partitions: {report}")
+    return report
@@ -0,0 +1,259 @@
+# services/quantized_index.py
+
+import os
+import json
+import time
+import shutil
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain.docstore.document import Document
+from config.config import Config
+from services.partitions import chunk_book, iter_collection
+
+logger = logging.getLogger(__name__)
+
+# Rows scored per matrix product when scanning the whole index, to bound temporary memory
+SCAN_BLOCK_ROWS = 16384
+
+
+class QuantizedIndex:
+    """
+    In-process vector index over the collection's embeddings, stored quantized
+    in memory-mapped NumPy files.
+
+    Vectors are kept as int8 (symmetric per-row scale) or float16. Search is an
+    exact scan, or an IVF probe of the `nprobe` nearest k-means lists when the
+    index was built with `ivf_lists > 0`. Optionally the top candidates are
+    re-scored against a float32 copy of the vectors; because that file is also
+    memory-mapped, only the candidate rows are ever paged in.
+
+    Chunk text and metadata live next to the vectors (`documents.jsonl` plus
+    byte offsets), so a search never goes through the Chroma client.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        with open(os.path.join(path, "ids.json")) as f:
+            self.ids = json.load(f)
+        self.dtype = self.meta["dtype"]
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        self.scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r")
+        self.doc_book = np.load(os.path.join(path, "doc_book.npy"), mmap_mode="r")
+        self.doc_offsets = np.load(os.path.join(path, "doc_offsets.npy"), mmap_mode="r")
+        self.documents = np.memmap(os.path.join(path, "documents.jsonl"), dtype=np.uint8, mode="r")
+        self.books = {book: ordinal for ordinal, book in enumerate(self.meta["books"])}
+
+        f32_path = os.path.join(path, "vectors_f32.npy")
+        self.vectors_f32 = np.load(f32_path, mmap_mode="r") if os.path.exists(f32_path) else None
+        if self.meta["ivf_lists"]:
+            self.centroids = np.load(os.path.join(path, "centroids.npy"))
+            self.list_rows = np.load(os.path.join(path, "list_rows.npy"), mmap_mode="r")
+            self.list_offsets = np.load(os.path.join(path, "list_offsets.npy"))
+        else:
+            self.centroids = self.list_rows = self.list_offsets = None
+        self.searches = 0
+
+    @staticmethod
+    def default_path() -> str:
+        return os.path.join(Config.CHROMA_DB_PATH, "quantized_index")
+
+    @classmethod
+    def exists(cls, path: Optional[str] = None) -> bool:
+        return os.path.exists(os.path.join(path or cls.default_path(), "meta.json"))
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["QuantizedIndex"]:
+        path = path or cls.default_path()
+        return cls(path) if cls.exists(path) else None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (stored vectors, per-row scales); float16 rows have a scale of 1."""
+        if dtype == "float16":
+            return vectors.astype(np.float16), np.ones(len(vectors), dtype=np.float32)
+        if dtype != "int8":
+            raise ValueError(f"Unsupported quantized index dtype: {dtype}")
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+
+    @staticmethod
+    def _kmeans(vectors: np.ndarray, n_lists: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+        """Spherical k-means on a sample of the vectors; returns unit-norm centroids."""
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(vectors), n_lists * 256)
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for list_id in range(n_lists):
+                members = sample[assignment == list_id]
+                if len(members):
+                    centroids[list_id] = members.mean(axis=0)
+            centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+        return centroids
+
+    @staticmethod
+    def build(records: Iterable[Tuple[str, List[float], str, Dict[str, Any]]], path: Optional[str] = None,
+              dtype: str = Config.QUANTIZED_INDEX_DTYPE, ivf_lists: int = Config.QUANTIZED_INDEX_IVF_LISTS,
+              keep_float32: bool = Config.QUANTIZED_INDEX_RESCORE) -> Dict[str, Any]:
+        """
+        Build the index from (chunk_id, embedding, text, metadata) records.
+
+        Documents are streamed to disk as they arrive; the float32 vectors are
+        collected once to quantize them and, for IVF, to train the centroids.
+        As with the lexical index, the new files are swapped in at the end.
+        """
+        path = path or QuantizedIndex.default_path()
+        start = time.perf_counter()
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+
+        ids, vectors, doc_book, offsets = [], [], [], [0]
+        books: Dict[str, int] = {}
+        with open(os.path.join(tmp_path, "documents.jsonl"), "wb") as documents:
+            for chunk_id, embedding, content, metadata in records:
+                line = json.dumps({"content": content, "metadata": metadata}, ensure_ascii=False).encode("utf-8") + b"\n"
+                documents.write(line)
+                offsets.append(offsets[-1] + len(line))
+                ids.append(chunk_id)
+                vectors.append(np.asarray(embedding, dtype=np.float32))
+                book = chunk_book(metadata)
+                doc_book.append(books.setdefault(book, len(books)) if book else -1)
+
+        if not ids:
+            # Nothing to quantize; without an index on disk dense_search uses the backend
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            shutil.rmtree(path, ignore_errors=True)
+            logger.warning(f"No vectors to index; left the quantized index at {path} unbuilt")
+            return {"count": 0, "dimensions": 0, "dtype": dtype, "ivf_lists": 0,
+                    "build_s": round(time.perf_counter() - start, 2)}
+
+        matrix = np.vstack(vectors)
+        del vectors
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        stored, scales = QuantizedIndex.quantize(matrix, dtype)
+
+        np.save(os.path.join(tmp_path, "vectors.npy"), stored)
+        np.save(os.path.join(tmp_path, "scales.npy"), scales)
+        np.save(os.path.join(tmp_path, "doc_book.npy"), np.asarray(doc_book, dtype=np.int16))
+        np.save(os.path.join(tmp_path, "doc_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+        if keep_float32:
+            np.save(os.path.join(tmp_path, "vectors_f32.npy"), matrix)
+
+        ivf_lists = min(ivf_lists, len(ids)) if ivf_lists else 0
+        if ivf_lists:
+            centroids = QuantizedIndex._kmeans(matrix, ivf_lists)
+            assignment = np.concatenate([
+                np.argmax(matrix[i:i + SCAN_BLOCK_ROWS] @ centroids.T, axis=1)
+                for i in range(0, len(matrix), SCAN_BLOCK_ROWS)
+            ])
+            list_rows = np.argsort(assignment, kind="stable").astype(np.int32)
+            list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=ivf_lists))])
+            np.save(os.path.join(tmp_path, "centroids.npy"), centroids.astype(np.float32))
+            np.save(os.path.join(tmp_path, "list_rows.npy"), list_rows)
+            np.save(os.path.join(tmp_path, "list_offsets.npy"), list_offsets.astype(np.int64))
+
+        with open(os.path.join(tmp_path, "ids.json"), "w") as f:
+            json.dump(ids, f)
+        meta = {
+            "count": len(ids),
+            "dimensions": int(matrix.shape[1]),
+            "dtype": dtype,
+            "ivf_lists": ivf_lists,
+            "float32_rescore": keep_float32,
+            "books": sorted(books, key=books.get),
+            "built_at": time.time(),
+        }
+        # meta.json is written last: its presence marks a complete index
+        with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+        meta["build_s"] = round(time.perf_counter() - start, 2)
+        logger.info(f"Built {dtype} quantized index at {path}: {meta['count']} vectors, {ivf_lists} IVF lists")
+        return meta
+
+    @staticmethod
+    def iter_collection(collection) -> Iterable[Tuple[str, List[float], str, Dict[str, Any]]]:
+        for page in iter_collection(collection, include=["embeddings", "documents", "metadatas"]):
+            yield from zip(page["ids"], page["embeddings"], page["documents"], page["metadatas"])
+
+    @classmethod
+    def build_from_collection(cls, collection, path: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Rebuild the index from the embeddings already stored in the Chroma collection."""
+        return cls.build(cls.iter_collection(collection), path, **kwargs)
+
+    def _score_rows(self, query: np.ndarray, rows: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Approximate inner products for the given rows (all rows if None)."""
+        if rows is not None:
+            return rows, (self.vectors[rows].astype(np.float32) @ query) * self.scales[rows]
+        scores = np.empty(len(self), dtype=np.float32)
+        for i in range(0, len(self), SCAN_BLOCK_ROWS):
+            block = self.vectors[i:i + SCAN_BLOCK_ROWS].astype(np.float32)
+            scores[i:i + SCAN_BLOCK_ROWS] = (block @ query) * self.scales[i:i + SCAN_BLOCK_ROWS]
+        return np.arange(len(self)), scores
+
+    def search(self, embedding: Any, k: int, book: Optional[str] = None, nprobe: int = Config.QUANTIZED_INDEX_NPROBE,
+               rescore: Optional[bool] = None) -> List[Tuple[int, float]]:
+        """Top-k (row, cosine similarity) for a query embedding, optionally within one book."""
+        self.searches += 1
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        if book is not None and book not in self.books:
+            return []
+
+        rows = None
+        if self.centroids is not None:
+            probe = np.argsort(self.centroids @ query)[::-1][:nprobe]
+            rows = np.concatenate([self.list_rows[self.list_offsets[p]:self.list_offsets[p + 1]] for p in probe])
+        if book is not None:
+            in_book = self.doc_book == self.books[book]
+            rows = np.flatnonzero(in_book) if rows is None else rows[in_book[rows]]
+        rows, scores = self._score_rows(query, rows)
+        if not len(rows):
+            return []
+
+        rescore = self.vectors_f32 is not None if rescore is None else rescore and self.vectors_f32 is not None
+        depth = min(len(rows), k * Config.QUANTIZED_RESCORE_FACTOR if rescore else k)
+        top = np.argpartition(scores, -depth)[-depth:]
+        rows, scores = rows[top], scores[top]
+        if rescore:
+            # Re-rank the shortlist with full-precision vectors; only these rows are paged in
+            order = np.argsort(rows)
+            rows = rows[order]
+            scores = np.asarray(self.vectors_f32[rows]) @ query
+        best = np.argsort(scores)[::-1][:k]
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+    def get_documents(self, rows: Iterable[int]) -> List[Document]:
+        documents = []
+        for row in rows:
+            record = json.loads(self.documents[self.doc_offsets[row]:self.doc_offsets[row + 1]].tobytes())
+            documents.append(Document(page_content=record["content"], metadata=record["metadata"] or {}))
+        return documents
+
+    def disk_bytes(self) -> Dict[str, int]:
+        return {name: os.path.getsize(os.path.join(self.path, name)) for name in sorted(os.listdir(self.path))}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "count": self.meta["count"],
+            "dtype": self.dtype,
+            "ivf_lists": self.meta["ivf_lists"],
+            "float32_rescore": self.vectors_f32 is not None,
+            "vector_bytes": int(self.vectors.nbytes),
+            "searches": self.searches,
+            "built_at": self.meta["built_at"],
+        }
@@ -1,20 +1,40 @@
 # rag_pipeline.py
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Awaitable, Tuple, AsyncIterator
+import asyncio
 import logging
+import time
+from collections import deque
+import numpy as np
+from bson import ObjectId
+from config.config import Config
 from services.vector_store import VectorStore
-from services.llm_service import LLMService
+from services.llm_service import LLMService, TRANSLATION_UNAVAILABLE
 from services.chat_service import ChatService
+from services.answer_cache import AnswerCache
+from services.context_builder import ContextBuilder
+from services.verse_index import VerseIndex
+from services.vector_backends import matches_where
+from services.partitions import build_where
+from services.metrics import metrics
+from services import executors
 from models.database import QueryRequest, QueryResponse, ChatMessage
 import os
 
 logger = logging.getLogger(__name__)
 
 class RAGPipeline:
-    def __init__(self):
-        self.vector_store = VectorStore()
+    def __init__(self, load_models: bool = True):
+        self.vector_store = VectorStore(load_models=load_models)
         self.llm_service = LLMService()
         self.chat_service = ChatService()
+        self.answer_cache = AnswerCache() if Config.ANSWER_CACHE_ENABLED else None
+        self.context_builder = ContextBuilder()
+        self.verse_index = None
+        self.verse_index_version = None
+        self.verse_index_lock = asyncio.Lock()
+        self.route_counters = {"queries": 0, "verse_lookups": 0, "unresolved_references": 0, "ambiguous_references": 0}
+        self.verse_lookup_latencies = deque(maxlen=1000)
         self.initialized = False
     
     async def initialize(self):
@@ -24,91 +44,413 @@ class RAGPipeline:
             logger.info("RAG Pipeline initialized successfully")
     
     async def process_query(self, query_request: QueryRequest, user_id: str) -> QueryResponse:
+        with metrics.request("query", query_request.mode) as request_labels:
+            return await self._process_query(query_request, user_id, request_labels)
+    
+    async def _process_query(self, query_request: QueryRequest, user_id: str,
+                             request_labels: Dict[str, str]) -> QueryResponse:
         try:
+            start = time.perf_counter()
             await self.initialize()
-            
-            relevant_docs = await self.vector_store.search_and_rerank(query_request.query)
-            
+        
+            with metrics.span("verse_lookup"):
+                verse_records = await self.lookup_verse(query_request)
+            if verse_records:
+                request_labels["route"] = "verse"
+                response = await self.respond_from_verse_index(query_request, user_id, verse_records)
+                self.verse_lookup_latencies.append(time.perf_counter() - start)
+                return response
+        
+            cached, query_embedding = await self.lookup_answer_cache(query_request)
+            if cached:
+                request_labels["route"] = "cache"
+                return await self.respond_from_cache(query_request, user_id, cached)
+        
+            relevant_docs = await self.vector_store.search_and_rerank(
+                query_request.query, query_request.book, query_request.chapter
+            )
+            with metrics.span("context"):
+                relevant_docs = await executors.run_inference(
+                    self.context_builder.build, query_request.query, relevant_docs
+                )
+        
             if not relevant_docs:
+                request_labels["route"] = "no_docs"
                 fallback_answer = "I could not find relevant information in the scriptures to answer your question."
+                status, hindi_translation = await self._run_branch(
+                    "translation", self.llm_service.translate_to_hindi(fallback_answer, raise_errors=True),
+                    Config.TRANSLATION_TIMEOUT
+                )
                 return QueryResponse(
                     answer=fallback_answer,
-                    hindi_translation=await self.llm_service.translate_to_hindi(fallback_answer),
+                    hindi_translation=hindi_translation or "",
                     citations=[],
                     recommendations=[],
-                    session_id=query_request.session_id or ""
+                    session_id=query_request.session_id or "",
+                    branch_status={"translation": status}
                 )
-            
-            llm_response = await self.llm_service.generate_response(
-                query_request.query, 
-                relevant_docs, 
-                query_request.mode
+        
+            with metrics.span("generation"):
+                llm_response = await self.llm_service.generate_response(
+                    query_request.query, 
+                    relevant_docs, 
+                    query_request.mode,
+                    explain_keywords=False
+                )
+        
+            response = await self.post_process(query_request, user_id, llm_response)
+            self.store_answer(query_request, response, query_embedding)
+            return response
+        
+        except Exception as e:
+            logger.error(f"Error in RAG pipeline: {e}")
+            raise
+
+    async def stream_query(self, query_request: QueryRequest, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of `process_query`. Yields events in order:
+        `citations` as soon as retrieval is done, one `token` per LLM delta,
+        then `translation`, `keywords` and a final `done` with the session ID.
+        """
+        with metrics.request("stream", query_request.mode) as request_labels:
+            async for event in self._stream_query(query_request, user_id, request_labels):
+                yield event
+    
+    async def _stream_query(self, query_request: QueryRequest, user_id: str,
+                            request_labels: Dict[str, str]) -> AsyncIterator[Dict[str, Any]]:
+        start = time.perf_counter()
+        await self.initialize()
+        
+        with metrics.span("verse_lookup"):
+            verse_records = await self.lookup_verse(query_request)
+        cached, query_embedding = (None, None) if verse_records else await self.lookup_answer_cache(query_request)
+        if verse_records or cached:
+            request_labels["route"] = "verse" if verse_records else "cache"
+            if verse_records:
+                response = await self.respond_from_verse_index(query_request, user_id, verse_records)
+                self.verse_lookup_latencies.append(time.perf_counter() - start)
+            else:
+                response = await self.respond_from_cache(query_request, user_id, cached)
+            yield {"event": "citations", "data": {"citations": response.citations, "recommendations": response.recommendations}}
+            yield {"event": "token", "data": {"text": response.answer}}
+            yield {"event": "translation", "data": {"hindi_translation": response.hindi_translation}}
+            yield {"event": "keywords", "data": {"keywords_explained": response.keywords_explained}}
+            yield {"event": "done", "data": {"session_id": response.session_id, "branch_status": response.branch_status}}
+            return
+        
+        relevant_docs = await self.vector_store.search_and_rerank(
+            query_request.query, query_request.book, query_request.chapter
+        )
+        with metrics.span("context"):
+            relevant_docs = await executors.run_inference(
+                self.context_builder.build, query_request.query, relevant_docs
+            )
+        citations = self.llm_service.extract_citations(relevant_docs)
+        recommendations = self.llm_service.get_book_recommendations(relevant_docs)
+        yield {"event": "citations", "data": {"citations": citations, "recommendations": recommendations}}
+        
+        if not relevant_docs:
+            request_labels["route"] = "no_docs"
+            fallback_answer = "I could not find relevant information in the scriptures to answer your question."
+            yield {"event": "token", "data": {"text": fallback_answer}}
+            status, hindi_translation = await self._run_branch(
+                "translation", self.llm_service.translate_to_hindi(fallback_answer, raise_errors=True),
+                Config.TRANSLATION_TIMEOUT
             )
-            
-            hindi_translation = await self.llm_service.translate_to_hindi(llm_response["response"])
-            
-            session_id = await self.handle_chat_session(
+            yield {"event": "translation", "data": {"hindi_translation": hindi_translation or ""}}
+            yield {"event": "done", "data": {
+                "session_id": query_request.session_id or "", "branch_status": {"translation": status}
+            }}
+            return
+        
+        parts = []
+        # Includes the time the client takes to consume each token
+        with metrics.span("generation"):
+            async for delta in self.llm_service.stream_response(query_request.query, relevant_docs, query_request.mode):
+                parts.append(delta)
+                yield {"event": "token", "data": {"text": delta}}
+        
+        llm_response = {
+            "response": "".join(parts),
+            "citations": citations,
+            "recommendations": recommendations,
+            "keywords_explained": None
+        }
+        response = await self.post_process(query_request, user_id, llm_response)
+        self.store_answer(query_request, response, query_embedding)
+        
+        yield {"event": "translation", "data": {"hindi_translation": response.hindi_translation}}
+        yield {"event": "keywords", "data": {"keywords_explained": response.keywords_explained}}
+        yield {"event": "done", "data": {"session_id": response.session_id, "branch_status": response.branch_status}}
+    
+    async def lookup_verse(self, query_request: QueryRequest) -> Optional[List[Dict[str, Any]]]:
+        """
+        The source record if the query is a plain scripture reference like 'Manusmriti 3.56'
+        that matches exactly one record within the request's book/chapter scope.
+        """
+        self.route_counters["queries"] += 1
+        if not Config.VERSE_LOOKUP_ENABLED:
+            return None
+        
+        collection_version = self.vector_store.collection_version()
+        if collection_version != self.verse_index_version:
+            async with self.verse_index_lock:
+                if collection_version != self.verse_index_version:
+                    # The loader rebuilds the verse index whenever it writes the collection
+                    self.verse_index = await executors.run_inference(VerseIndex.load)
+                    self.verse_index_version = collection_version
+        if self.verse_index is None:
+            return None
+        
+        reference = self.verse_index.parse_reference(query_request.query)
+        if reference is None:
+            return None
+        where = build_where(query_request.book, query_request.chapter)
+        records = [record for record in self.verse_index.lookup(*reference) if matches_where(record["metadata"], where)]
+        if len(records) != 1:
+            # Unknown, or shared by unrelated records (e.g. repeated 'Verse 75' headings); let retrieval handle it
+            self.route_counters["ambiguous_references" if records else "unresolved_references"] += 1
+            return None
+        self.route_counters["verse_lookups"] += 1
+        return records
+    
+    @staticmethod
+    def format_verse_answer(records: List[Dict[str, Any]]) -> str:
+        sections = []
+        for record in records:
+            metadata = record["metadata"]
+            verse = metadata.get("verse_number", metadata.get("law_number", metadata.get("Verse", "")))
+            label = "law" if "law_number" in metadata else "verse"
+            verse = verse if str(verse).lower().startswith(label) else f"{label.title()} {verse}"
+            heading = " - ".join(str(part) for part in (
+                metadata.get("book_name") or metadata.get("Veda"), metadata.get("chapter"), verse
+            ) if part)
+            sections.append(f"**{heading}**\n\n{record['content']}")
+        return "\n\n".join(sections)
+    
+    async def respond_from_verse_index(self, query_request: QueryRequest, user_id: str, records: List[Dict[str, Any]]) -> QueryResponse:
+        """Answer a reference lookup with the verse text itself: no retrieval, rerank or LLM call."""
+        llm_response = {
+            "response": self.format_verse_answer(records),
+            "citations": self.llm_service.extract_citations(records),
+            "recommendations": self.llm_service.get_book_recommendations(records),
+            "keywords_explained": None
+        }
+        return await self.post_process(query_request, user_id, llm_response, explain_keywords=False)
+    
+    async def lookup_answer_cache(self, query_request: QueryRequest) -> Tuple[Optional[Dict[str, Any]], Any]:
+        """Return (cached answer or None, query embedding) for the request."""
+        if not self.answer_cache:
+            return None, None
+        
+        self.answer_cache.sync_version(self.vector_store.collection_version())
+        try:
+            query_embedding = await self.vector_store.embed_query(query_request.query)
+        except Exception as e:
+            logger.warning(f"Could not embed query for answer cache, using exact match only: {e}")
+            query_embedding = None
+        with metrics.span("answer_cache"):
+            cached = self.answer_cache.get(query_request.query, self.cache_scope(query_request), query_embedding)
+        return cached, query_embedding
+    
+    @staticmethod
+    def cache_scope(query_request: QueryRequest) -> str:
+        """Answers depend on the mode and on any book/chapter filter, so both are part of the cache key."""
+        if not query_request.book and not query_request.chapter:
+            return query_request.mode
+        return f"{query_request.mode}|{query_request.book or ''}|{query_request.chapter or ''}"
+    
+    def store_answer(self, query_request: QueryRequest, response: QueryResponse, query_embedding: Any):
+        """Cache a response, but only if every branch produced a full result."""
+        if not self.answer_cache:
+            return
+        status = response.branch_status or {}
+        if status.get("translation") != "completed" or any(value not in ("completed", "skipped") for value in status.values()):
+            return
+        if not response.hindi_translation or response.hindi_translation == TRANSLATION_UNAVAILABLE:
+            return
+        self.answer_cache.put(query_request.query, self.cache_scope(query_request), {
+            "answer": response.answer,
+            "hindi_translation": response.hindi_translation,
+            "citations": response.citations,
+            "recommendations": response.recommendations,
+            "keywords_explained": response.keywords_explained,
+        }, query_embedding)
+    
+    async def respond_from_cache(self, query_request: QueryRequest, user_id: str, cached: Dict[str, Any]) -> QueryResponse:
+        """Serve a cached answer; the exchange is still written to the chat session."""
+        session_id = query_request.session_id or str(ObjectId())
+        status, _ = await self._run_branch(
+            "persistence",
+            self.handle_chat_session(
                 user_id=user_id,
-                session_id=query_request.session_id,
+                session_id=session_id,
+                is_new_session=not query_request.session_id,
                 query=query_request.query,
-                response=llm_response["response"],
+                response=cached["answer"],
+                mode=query_request.mode,
+                citations=cached["citations"],
+                hindi_translation=self._resolved(("completed", cached["hindi_translation"]))
+            ),
+            Config.PERSISTENCE_TIMEOUT
+        )
+        return QueryResponse(
+            **cached,
+            session_id=session_id,
+            branch_status={"translation": "cached", "keywords": "cached", "persistence": status}
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "answer_cache": self.answer_cache.stats() if self.answer_cache else {"enabled": False},
+            "embedding_cache": self.vector_store.embedding_cache.stats(),
+            "embed_batching": self.vector_store.embed_batcher.stats(),
+            "rerank_batching": self.vector_store.rerank_batcher.stats(),
+            "rerank": self.vector_store.rerank_stats(),
+            "verse_lookup": self.verse_lookup_stats(),
+            "stage_latency": metrics.stage_summary(),
+            "groq": self.llm_service.groq_client.stats(),
+            "context": self.context_builder.stats(),
+        }
+    
+    def verse_lookup_stats(self) -> Dict[str, Any]:
+        queries = self.route_counters["queries"]
+        latencies = np.array(self.verse_lookup_latencies) * 1000
+        return {
+            "enabled": Config.VERSE_LOOKUP_ENABLED,
+            **self.route_counters,
+            "short_circuit_rate": round(self.route_counters["verse_lookups"] / queries, 4) if queries else 0.0,
+            "p50_ms": round(float(np.percentile(latencies, 50)), 1) if len(latencies) else None,
+            "p99_ms": round(float(np.percentile(latencies, 99)), 1) if len(latencies) else None,
+            "index": self.verse_index.stats() if self.verse_index else None,
+        }
+    
+    @staticmethod
+    async def _resolved(value: Any) -> Any:
+        return value
+    
+    async def post_process(self, query_request: QueryRequest, user_id: str, llm_response: Dict[str, Any],
+                           explain_keywords: bool = True) -> QueryResponse:
+        """
+        Fan out translation, keyword explanation and chat persistence concurrently.
+        Each branch has its own timeout; a branch that times out or fails is reported
+        in `branch_status` and its result is left empty instead of failing the request.
+        """
+        answer = llm_response["response"]
+        session_id = query_request.session_id or str(ObjectId())
+        
+        translation = asyncio.create_task(self._run_branch(
+            "translation", self.llm_service.translate_to_hindi(answer, raise_errors=True), Config.TRANSLATION_TIMEOUT
+        ))
+        branches = {"translation": translation}
+        
+        if explain_keywords and query_request.mode == "beginner":
+            branches["keywords"] = asyncio.create_task(self._run_branch(
+                "keywords", self.llm_service.identify_and_explain_keywords(answer, raise_errors=True),
+                Config.KEYWORDS_TIMEOUT
+            ))
+        
+        # Persistence waits on the translation branch for the assistant message,
+        # so its budget covers both.
+        branches["persistence"] = asyncio.create_task(self._run_branch(
+            "persistence",
+            self.handle_chat_session(
+                user_id=user_id,
+                session_id=session_id,
+                is_new_session=not query_request.session_id,
+                query=query_request.query,
+                response=answer,
                 mode=query_request.mode,
                 citations=llm_response["citations"],
-                hindi_translation=hindi_translation
-            )
-            
-            return QueryResponse(
-                answer=llm_response["response"],
-                hindi_translation=hindi_translation,
-                citations=llm_response["citations"],
-                recommendations=llm_response["recommendations"],
-                keywords_explained=llm_response.get("keywords_explained"),
-                session_id=session_id
-            )
-            
+                hindi_translation=translation
+            ),
+            Config.TRANSLATION_TIMEOUT + Config.PERSISTENCE_TIMEOUT
+        ))
+        
+        await asyncio.gather(*branches.values())
+        results = {name: task.result() for name, task in branches.items()}
+        branch_status = {name: status for name, (status, _) in results.items()}
+        if "keywords" not in branch_status:
+            branch_status["keywords"] = "skipped"
+        
+        translation_status, hindi_translation = results["translation"]
+        if translation_status == "failed":
+            hindi_translation = TRANSLATION_UNAVAILABLE
+        keywords_explained = results["keywords"][1] if "keywords" in results else llm_response.get("keywords_explained")
+        
+        return QueryResponse(
+            answer=answer,
+            hindi_translation=hindi_translation or "",
+            citations=llm_response["citations"],
+            recommendations=llm_response["recommendations"],
+            keywords_explained=keywords_explained,
+            session_id=session_id,
+            branch_status=branch_status
+        )
+    
+    async def _run_branch(self, name: str, coro: Awaitable[Any], timeout: float) -> Tuple[str, Any]:
+        """Await a post-generation branch, converting timeouts and errors into a status."""
+        try:
+            with metrics.span(name):
+                return "completed", await asyncio.wait_for(coro, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Branch '{name}' timed out after {timeout}s")
+            return "timed_out", None
         except Exception as e:
-            logger.error(f"Error in RAG pipeline: {e}")
-            raise
+            logger.error(f"Branch '{name}' failed: {e}")
+            return "failed", None
     
     async def handle_chat_session(
-        self, user_id: str, session_id: Optional[str], query: str, response: str, 
-        mode: str, citations: List[Dict], hindi_translation: str
+        self, user_id: str, session_id: str, is_new_session: bool, query: str, response: str, 
+        mode: str, citations: List[Dict], hindi_translation: Awaitable[Tuple[str, Optional[str]]]
     ) -> str:
-        if not session_id:
+        """
+        Persist the exchange. The session and user message are written while the
+        translation is still running; the assistant message follows once the
+        translation branch has finished (or timed out).
+        """
+        if is_new_session:
             title = self.chat_service.generate_session_title(query)
-            session = await self.chat_service.create_chat_session(user_id, title)
-            session_id = str(session.id)
+            with metrics.span("mongo_write"):
+                await self.chat_service.create_chat_session(user_id, title, session_id=session_id)
         
         user_message = ChatMessage(role="user", content=query, mode=mode)
-        await self.chat_service.add_message_to_session(session_id, user_id, user_message)
+        with metrics.span("mongo_write"):
+            await self.chat_service.add_message_to_session(session_id, user_id, user_message)
         
+        _, translated = await asyncio.shield(hindi_translation)
         assistant_message = ChatMessage(
             role="assistant", content=response, mode=mode,
-            citations=citations, hindi_translation=hindi_translation
+            citations=citations, hindi_translation=translated
         )
-        await self.chat_service.add_message_to_session(session_id, user_id, assistant_message)
+        with metrics.span("mongo_write"):
+            await self.chat_service.add_message_to_session(session_id, user_id, assistant_message)
         
         return session_id
     
     async def process_voice_query(self, audio_file_path: str, mode: str, user_id: str, session_id: Optional[str] = None) -> QueryResponse:
-        try:
-            logger.info(f"Processing voice query for user {user_id}...")
-            query_text = await self.llm_service.transcribe_audio(audio_file_path)
-            logger.info(f"Transcribed text: {query_text}")
+        with metrics.request("voice_query", mode) as request_labels:
+            try:
+                logger.info(f"Processing voice query for user {user_id}...")
+                with metrics.span("transcription"):
+                    query_text = await self.llm_service.transcribe_audio(audio_file_path)
+                logger.info(f"Transcribed text: {query_text}")
 
-            if not query_text.strip():
-                return QueryResponse(
-                    answer="I couldn't understand what you said. Could you please speak clearly?",
-                    hindi_translation="मुझे समझ नहीं आया कि आपने क्या कहा। क्या आप कृपया स्पष्ट रूप से बोल सकते हैं?",
-                    citations=[],
-                    recommendations=[],
-                    session_id=session_id or ""
-                )
+                if not query_text.strip():
+                    request_labels["route"] = "no_speech"
+                    return QueryResponse(
+                        answer="I couldn't understand what you said. Could you please speak clearly?",
+                        hindi_translation="मुझे समझ नहीं आया कि आपने क्या कहा। क्या आप कृपया स्पष्ट रूप से बोल सकते हैं?",
+                        citations=[],
+                        recommendations=[],
+                        session_id=session_id or ""
+                    )
 
-            query_request = QueryRequest(query=query_text, mode=mode, session_id=session_id)
-            return await self.process_query(query_request, user_id)
-        finally:
-            # Clean up the temporary audio file
-            if os.path.exists(audio_file_path):
-                os.remove(audio_file_path)
-                logger.info(f"Removed temporary audio file: {audio_file_path}")
\ No newline at end of file
+                query_request = QueryRequest(query=query_text, mode=mode, session_id=session_id)
+                # Counted once, as a voice_query, with the transcription included
+                return await self._process_query(query_request, user_id, request_labels)
+            finally:
+                # Clean up the temporary audio file
+                if os.path.exists(audio_file_path):
+                    os.remove(audio_file_path)
+                    logger.info(f"Removed temporary audio file: {audio_file_path}")
\ No newline at end of file
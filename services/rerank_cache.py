@@ -0,0 +1,72 @@
+# services/rerank_cache.py
+
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Tuple
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class RerankCache:
+    """
+    Thread-safe LRU cache of cross-encoder scores keyed by (query hash, chunk ID).
+
+    Chunk IDs are content hashes, so a cached score stays valid across
+    re-indexing: a changed chunk gets a new ID and simply misses.
+    """
+
+    def __init__(self, max_entries: int = Config.RERANK_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def query_key(query: str) -> str:
+        return hashlib.sha1(query.encode("utf-8")).hexdigest()
+
+    def get_many(self, query: str, chunk_ids: Iterable[str]) -> Dict[str, float]:
+        """Cached scores for whichever of the chunks have been scored against this query."""
+        query_key = self.query_key(query)
+        found = {}
+        with self.lock:
+            for chunk_id in chunk_ids:
+                score = self.entries.get((query_key, chunk_id))
+                if score is None:
+                    self.misses += 1
+                    continue
+                self.entries.move_to_end((query_key, chunk_id))
+                self.hits += 1
+                found[chunk_id] = score
+        return found
+
+    def put_many(self, query: str, scores: Dict[str, float]):
+        query_key = self.query_key(query)
+        with self.lock:
+            for chunk_id, score in scores.items():
+                self.entries[(query_key, chunk_id)] = score
+                self.entries.move_to_end((query_key, chunk_id))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+            }
@@ -0,0 +1,125 @@
+# services/startup.py
+
+import os
+import time
+import asyncio
+import logging
+import importlib
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+from config.config import Config
+from services import executors
+from database.connection import connect_to_mongo, close_mongo_connection
+
+logger = logging.getLogger(__name__)
+
+COMPONENTS = ("mongo", "imports", "pipeline", "embedder", "reranker", "context_tokenizer", "vector_store",
+              "warm_inference")
+
+
+class StartupState:
+    """Load state of every component the API needs before it can answer queries."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.components: Dict[str, Dict[str, Any]] = {name: {"status": "pending"} for name in COMPONENTS}
+        self.pipeline = None
+        self.ready_after: Optional[float] = None
+        self.mongo_task: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def loading(self, name: str):
+        """Mark a component as loading for the duration of the block, then ready or failed."""
+        component = self.components[name]
+        component["status"] = "loading"
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            component.update(status="failed", error=str(e), seconds=round(time.perf_counter() - start, 3))
+            logger.error(f"Startup component '{name}' failed: {e}")
+            raise
+        component.pop("error", None)
+        component.update(status="ready", seconds=round(time.perf_counter() - start, 3))
+        logger.info(f"Startup component '{name}' ready in {component['seconds']:.2f}s")
+        if self.ready and self.ready_after is None:
+            self.ready_after = time.perf_counter() - self.started
+
+    @property
+    def ready(self) -> bool:
+        return all(component["status"] == "ready" for component in self.components.values())
+
+    @property
+    def failed(self) -> Dict[str, str]:
+        return {
+            name: component["error"] for name, component in self.components.items() if component["status"] == "failed"
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "pid": os.getpid(),
+            "uptime_s": round(time.perf_counter() - self.started, 3),
+            "time_to_ready_s": round(self.ready_after, 3) if self.ready_after is not None else None,
+            "components": self.components,
+        }
+
+
+async def retry_mongo(state: StartupState):
+    """
+    Reconnect to MongoDB after a failed startup attempt, with exponential backoff
+    from STARTUP_RETRY_BASE up to STARTUP_RETRY_MAX seconds. Between attempts the
+    component reports "failed" with the last error, so the API is live but not ready.
+    """
+    delay = Config.STARTUP_RETRY_BASE
+    while True:
+        state.components["mongo"]["retry_in_s"] = delay
+        logger.warning(f"Retrying MongoDB connection in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        await close_mongo_connection()
+        try:
+            with state.loading("mongo"):
+                await connect_to_mongo()
+            state.components["mongo"].pop("retry_in_s", None)
+            return
+        except Exception:
+            delay = min(delay * 2, Config.STARTUP_RETRY_MAX)
+
+
+async def warm_up(state: StartupState):
+    """
+    Connect to MongoDB, then import and load the RAG pipeline one component at a
+    time off the event loop, so liveness checks keep answering throughout.
+    A MongoDB failure doesn't stop the models from loading: `retry_mongo()` keeps
+    reconnecting in the background and the API turns ready once it succeeds.
+    A model failure is not retried; the API stays live but not ready.
+    """
+    try:
+        with state.loading("mongo"):
+            await connect_to_mongo()
+    except Exception:
+        state.mongo_task = asyncio.create_task(retry_mongo(state))
+
+    try:
+        with state.loading("imports"):
+            # torch, sentence-transformers and chromadb are only imported here
+            module = await executors.run_io(importlib.import_module, "services.rag_pipeline")
+        with state.loading("pipeline"):
+            pipeline = await executors.run_io(module.RAGPipeline, load_models=False)
+        with state.loading("embedder"):
+            await executors.run_inference(pipeline.vector_store.load_embedding_model)
+        with state.loading("reranker"):
+            await executors.run_inference(pipeline.vector_store.load_reranker)
+        with state.loading("context_tokenizer"):
+            # Falls back to the length estimate if CONTEXT_TOKENIZER can't be loaded
+            await executors.run_io(pipeline.context_builder.load_tokenizer)
+        with state.loading("vector_store"):
+            await pipeline.initialize()
+            if pipeline.vector_store.backend is None:
+                raise RuntimeError("vector store backend could not be opened")
+        with state.loading("warm_inference"):
+            if Config.WARM_UP_INFERENCE:
+                await executors.run_inference(pipeline.vector_store.warm_up)
+        state.pipeline = pipeline
+    except Exception:
+        logger.error("Warm-up stopped; the API stays live but not ready")
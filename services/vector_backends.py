@@ -0,0 +1,371 @@
+# services/vector_backends.py
+
+import os
+import json
+import time
+import shutil
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple, runtime_checkable
+import numpy as np
+from langchain.docstore.document import Document
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@runtime_checkable
+class VectorBackend(Protocol):
+    """
+    Storage and search for chunk embeddings behind `VectorStore`.
+
+    Filters use Chroma's `where` syntax (see `partitions.build_where`) and `get`
+    returns Chroma-shaped pages, so the index builders that page through the
+    collection work against any backend. Search scores are cosine similarities.
+    """
+
+    name: str
+
+    def add(self, ids: Sequence[str], embeddings: Sequence[Sequence[float]], documents: Sequence[str],
+            metadatas: Sequence[Dict[str, Any]]) -> None: ...
+
+    def upsert(self, ids: Sequence[str], embeddings: Sequence[Sequence[float]], documents: Sequence[str],
+               metadatas: Sequence[Dict[str, Any]]) -> None: ...
+
+    def delete(self, ids: Sequence[str]) -> None: ...
+
+    def get(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, offset: int = 0, include: Sequence[str] = ("documents", "metadatas")) -> Dict[str, Any]: ...
+
+    def search(self, embedding: Sequence[float], k: int,
+               where: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]: ...
+
+    def count(self) -> int: ...
+
+    def persist(self) -> None: ...
+
+    def reset(self) -> None: ...
+
+    def stats(self) -> Dict[str, Any]: ...
+
+
+def matches_where(metadata: Optional[Dict[str, Any]], where: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate the subset of Chroma's `where` syntax used in this repo against one metadata dict."""
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            [(operator, operand)] = condition.items()
+            value = metadata.get(key)
+            if operator == "$eq" and value != operand:
+                return False
+            if operator == "$ne" and value == operand:
+                return False
+            if operator == "$in" and value not in operand:
+                return False
+            if operator == "$nin" and value in operand:
+                return False
+            if operator not in ("$eq", "$ne", "$in", "$nin"):
+                raise ValueError(f"Unsupported where operator: {operator}")
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class ChromaBackend:
+    """The Chroma collection, used directly rather than through the LangChain wrapper."""
+
+    name = "chroma"
+
+    def __init__(self, client, collection_name: str = Config.COLLECTION_NAME):
+        self.client = client
+        self.collection_name = collection_name
+        self.collection = client.get_or_create_collection(collection_name, embedding_function=None)
+        self.space = self._distance_space(self.collection)
+
+    @staticmethod
+    def _distance_space(collection) -> str:
+        configuration = getattr(collection, "configuration", None) or {}
+        space = (configuration.get("hnsw") or {}).get("space")
+        return space or (collection.metadata or {}).get("hnsw:space", "l2")
+
+    def _similarity(self, distance: float) -> float:
+        # Embeddings are unit-normalized: squared L2 = 2 - 2*cos, cosine/ip distance = 1 - cos
+        return 1.0 - distance / 2.0 if self.space == "l2" else 1.0 - distance
+
+    @staticmethod
+    def _lists(embeddings) -> List[List[float]]:
+        return [np.asarray(embedding, dtype=np.float32).tolist() for embedding in embeddings]
+
+    def add(self, ids, embeddings, documents, metadatas):
+        self.collection.add(ids=list(ids), embeddings=self._lists(embeddings),
+                            documents=list(documents), metadatas=list(metadatas))
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.collection.upsert(ids=list(ids), embeddings=self._lists(embeddings),
+                               documents=list(documents), metadatas=list(metadatas))
+
+    def delete(self, ids):
+        if ids:
+            self.collection.delete(ids=list(ids))
+
+    def get(self, ids=None, where=None, limit=None, offset=0, include=("documents", "metadatas")):
+        return self.collection.get(ids=list(ids) if ids is not None else None, where=where,
+                                   limit=limit, offset=offset or None, include=list(include))
+
+    def search(self, embedding, k, where=None):
+        found = self.collection.query(
+            query_embeddings=[np.asarray(embedding, dtype=np.float32).tolist()], n_results=k, where=where,
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            (Document(page_content=content, metadata=metadata or {}), self._similarity(distance))
+            for content, metadata, distance in zip(found["documents"][0], found["metadatas"][0], found["distances"][0])
+        ]
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def persist(self):
+        """Chroma persists on every write."""
+
+    def reset(self):
+        try:
+            self.client.delete_collection(self.collection_name)
+        except Exception:
+            logger.info(f"No existing collection '{self.collection_name}' to drop")
+        self.collection = self.client.get_or_create_collection(self.collection_name, embedding_function=None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "collection": self.collection_name, "count": self.count(), "space": self.space}
+
+
+class NumpyBackend:
+    """
+    Exact in-memory search over a float32 matrix, persisted to a directory.
+
+    Writes stay in memory until `persist()`, which writes `vectors.npy` and
+    `records.jsonl` (id, text and metadata per row) and then `meta.json`, whose
+    mtime tells readers in other processes to reload. Filter masks are cached
+    per `where` clause until the next write.
+    """
+
+    name = "numpy"
+
+    def __init__(self, path: Optional[str] = None, dimensions: int = 384):
+        self.path = path or self.default_path()
+        self.lock = threading.RLock()
+        self.dimensions = dimensions
+        self.loaded_mtime = None
+        self.dirty = False
+        self.searches = 0
+        self._clear()
+        self.refresh()
+
+    @staticmethod
+    def default_path(collection_name: str = Config.COLLECTION_NAME) -> str:
+        return os.path.join(Config.CHROMA_DB_PATH, "numpy_store", collection_name)
+
+    def _clear(self):
+        self.vectors = np.zeros((0, self.dimensions), dtype=np.float32)
+        self.size = 0
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.mask_cache: Dict[str, np.ndarray] = {}
+
+    def refresh(self):
+        """Reload from disk if another process persisted a newer copy."""
+        try:
+            mtime = os.path.getmtime(os.path.join(self.path, "meta.json"))
+        except OSError:
+            return
+        if mtime == self.loaded_mtime or self.dirty:
+            return
+        with self.lock:
+            start = time.perf_counter()
+            self._clear()
+            self.vectors = np.load(os.path.join(self.path, "vectors.npy"))
+            self.size = len(self.vectors)
+            if self.size:
+                self.dimensions = self.vectors.shape[1]
+            with open(os.path.join(self.path, "records.jsonl"), encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    self.ids.append(record["id"])
+                    self.documents.append(record["document"])
+                    self.metadatas.append(record["metadata"])
+            self.rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+            self.loaded_mtime = mtime
+            logger.info(f"Loaded NumPy vector store from {self.path}: {self.size} vectors in {time.perf_counter() - start:.2f}s")
+
+    @staticmethod
+    def _normalized(embeddings) -> np.ndarray:
+        matrix = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    def _reserve(self, rows: int, dimensions: int):
+        if not self.size:
+            self.dimensions = dimensions
+            self.vectors = np.zeros((0, dimensions), dtype=np.float32)
+        if self.size + rows > len(self.vectors):
+            grown = np.zeros((max(self.size + rows, 2 * len(self.vectors), 1024), self.dimensions), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+
+    def _write(self, ids, embeddings, documents, metadatas, overwrite: bool):
+        if not len(ids):
+            return
+        with self.lock:
+            matrix = self._normalized(embeddings)
+            new_ids = [chunk_id for chunk_id in dict.fromkeys(ids) if chunk_id not in self.rows]
+            self._reserve(len(new_ids), matrix.shape[1])
+            for chunk_id, vector, document, metadata in zip(ids, matrix, documents, metadatas):
+                row = self.rows.get(chunk_id)
+                if row is None:
+                    row = self.size
+                    self.rows[chunk_id] = row
+                    self.ids.append(chunk_id)
+                    self.documents.append(document)
+                    self.metadatas.append(metadata or {})
+                    self.size += 1
+                elif not overwrite:
+                    continue
+                else:
+                    self.documents[row] = document
+                    self.metadatas[row] = metadata or {}
+                self.vectors[row] = vector
+            self.mask_cache.clear()
+            self.dirty = True
+
+    def add(self, ids, embeddings, documents, metadatas):
+        # Like Chroma, adding an existing ID leaves the stored record unchanged
+        self._write(ids, embeddings, documents, metadatas, overwrite=False)
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self._write(ids, embeddings, documents, metadatas, overwrite=True)
+
+    def delete(self, ids):
+        with self.lock:
+            drop = {self.rows[chunk_id] for chunk_id in ids if chunk_id in self.rows}
+            if not drop:
+                return
+            keep = np.ones(self.size, dtype=bool)
+            keep[list(drop)] = False
+            keep = np.flatnonzero(keep)
+            self.vectors = self.vectors[keep]
+            self.ids = [self.ids[row] for row in keep]
+            self.documents = [self.documents[row] for row in keep]
+            self.metadatas = [self.metadatas[row] for row in keep]
+            self.rows = {chunk_id: row for row, chunk_id in enumerate(self.ids)}
+            self.size = len(keep)
+            self.mask_cache.clear()
+            self.dirty = True
+
+    def _mask(self, where: Dict[str, Any]) -> np.ndarray:
+        key = json.dumps(where, sort_keys=True)
+        mask = self.mask_cache.get(key)
+        if mask is None:
+            mask = np.fromiter((matches_where(metadata, where) for metadata in self.metadatas), dtype=bool, count=self.size)
+            self.mask_cache[key] = mask
+        return mask
+
+    def get(self, ids=None, where=None, limit=None, offset=0, include=("documents", "metadatas")):
+        self.refresh()
+        with self.lock:
+            if ids is not None:
+                rows = [self.rows[chunk_id] for chunk_id in ids if chunk_id in self.rows]
+                if where:
+                    rows = [row for row in rows if matches_where(self.metadatas[row], where)]
+            else:
+                rows = np.flatnonzero(self._mask(where)).tolist() if where else range(self.size)
+            rows = list(rows)[offset:offset + limit if limit is not None else None]
+            page = {"ids": [self.ids[row] for row in rows], "included": list(include)}
+            page["documents"] = [self.documents[row] for row in rows] if "documents" in include else None
+            page["metadatas"] = [self.metadatas[row] for row in rows] if "metadatas" in include else None
+            page["embeddings"] = self.vectors[rows] if "embeddings" in include else None
+            return page
+
+    def search(self, embedding, k, where=None):
+        self.refresh()
+        with self.lock:
+            self.searches += 1
+            query = np.asarray(embedding, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1.0)
+            if where:
+                rows = np.flatnonzero(self._mask(where))
+                scores = self.vectors[rows] @ query
+            else:
+                rows = None
+                scores = self.vectors[:self.size] @ query
+            if not len(scores):
+                return []
+            depth = min(k, len(scores))
+            top = np.argpartition(scores, -depth)[-depth:]
+            top = top[np.argsort(scores[top])[::-1]]
+            return [
+                (Document(page_content=self.documents[row], metadata=self.metadatas[row]), float(scores[i]))
+                for i, row in zip(top, rows[top] if rows is not None else top)
+            ]
+
+    def count(self) -> int:
+        self.refresh()
+        return self.size
+
+    def persist(self):
+        """Write the store to disk; the new files are swapped in as a whole, meta.json last."""
+        with self.lock:
+            if not self.dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            os.makedirs(tmp_path)
+            np.save(os.path.join(tmp_path, "vectors.npy"), self.vectors[:self.size])
+            with open(os.path.join(tmp_path, "records.jsonl"), "w", encoding="utf-8") as f:
+                for chunk_id, document, metadata in zip(self.ids, self.documents, self.metadatas):
+                    f.write(json.dumps({"id": chunk_id, "document": document, "metadata": metadata}, ensure_ascii=False) + "\n")
+            with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                json.dump({"count": self.size, "dimensions": self.dimensions, "persisted_at": time.time()}, f)
+            shutil.rmtree(self.path, ignore_errors=True)
+            os.replace(tmp_path, self.path)
+            self.loaded_mtime = os.path.getmtime(os.path.join(self.path, "meta.json"))
+            self.dirty = False
+            logger.info(f"Persisted NumPy vector store to {self.path}: {self.size} vectors")
+
+    def reset(self):
+        with self.lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._clear()
+            self.loaded_mtime = None
+            self.dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "count": self.size,
+            "dimensions": self.dimensions,
+            "matrix_bytes": int(self.vectors[:self.size].nbytes),
+            "searches": self.searches,
+            "unpersisted_writes": self.dirty,
+        }
+
+
+def create_backend(client=None, backend: Optional[str] = None,
+                   collection_name: str = Config.COLLECTION_NAME) -> VectorBackend:
+    """Storage backend for `Config.VECTOR_BACKEND`; 'quantized' keeps Chroma as its store."""
+    backend = backend or Config.VECTOR_BACKEND
+    if backend == "numpy":
+        return NumpyBackend(NumpyBackend.default_path(collection_name))
+    if backend in ("chroma", "quantized"):
+        return ChromaBackend(client, collection_name)
+    raise ValueError(f"Unknown VECTOR_BACKEND: {backend}")
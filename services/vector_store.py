@@ -2,34 +2,56 @@
 
 import chromadb
 from chromadb.config import Settings
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import Chroma
 from langchain.docstore.document import Document
-from sentence_transformers import CrossEncoder
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import asyncio
 import logging
+import time
+import numpy as np
 from config.config import Config
+from services import executors, model_registry
+from services.embedding_cache import EmbeddingCache
+from services.rerank_cache import RerankCache
+from services.batching import MicroBatcher
+from services.inference_client import InferenceClient
+from services.metrics import metrics
+from services.document_processor import DocumentProcessor
+from services.lexical_index import LexicalIndex
+from services.quantized_index import QuantizedIndex
+from services.partitions import build_where, list_partitions, partition_name
+from services.vector_backends import ChromaBackend, VectorBackend, create_backend
 import shutil, os
-
-try:
-    from langchain_huggingface import HuggingFaceEmbeddings
-    from langchain_chroma import Chroma
-except ImportError:
-    # Fallback to old imports
-    from langchain.embeddings import HuggingFaceEmbeddings
-    from langchain.vectorstores import Chroma
+from collections import deque
 
 
 logger = logging.getLogger(__name__)
 
 class VectorStore:
-    def __init__(self):
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=Config.EMBEDDING_MODEL,
-            model_kwargs={'device': 'cpu'}
+    def __init__(self, load_models: bool = True):
+        self.embedding_model = None
+        self.reranker = None
+        if load_models:
+            self.load_embedding_model()
+            self.load_reranker()
+        self.embedding_cache = EmbeddingCache(Config.EMBEDDING_CACHE_MAX_BYTES)
+        self.rerank_cache = RerankCache(Config.RERANK_CACHE_MAX_ENTRIES) if Config.RERANK_CACHE_ENABLED else None
+        self.rerank_counters = {"queries": 0, "skipped": 0, "shortened": 0, "pairs_scored": 0,
+                                "pairs_cached": 0, "pairs_avoided": 0, "score_seconds": 0.0}
+        self.rerank_latencies = deque(maxlen=1000)
+        # Query encodes from concurrent requests share one forward pass
+        self.embed_batcher = MicroBatcher(
+            self._encode_queries,
+            max_batch_size=Config.EMBED_MAX_BATCH_SIZE,
+            max_wait_ms=Config.EMBED_BATCH_WAIT_MS,
+            name="embed"
+        )
+        # Pairs from concurrent queries are scored together in one predict call
+        self.rerank_batcher = MicroBatcher(
+            self._predict_pairs,
+            max_batch_size=Config.RERANK_MAX_BATCH_SIZE,
+            max_wait_ms=Config.RERANK_BATCH_WAIT_MS,
+            name="rerank"
         )
-        
-        self.reranker = CrossEncoder(Config.RERANKER_MODEL)
         
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
@@ -37,76 +59,293 @@ class VectorStore:
             settings=Settings(anonymized_telemetry=False)
         )
         
-        self.collection_name = "hindu_scriptures"
-        self.vectorstore = None
+        self.collection_name = Config.COLLECTION_NAME
+        self.backend: Optional[VectorBackend] = None
+        self.lexical_index = None
+        self.lexical_index_mtime = None
+        self.quantized_index = None
+        self.quantized_index_mtime = None
+        self.partition_stores = {}
+        self.partition_names = set()
+        self.partition_version = None
         
+    def load_embedding_model(self):
+        # Shared with every other VectorStore in the process, and with forked workers if preloaded
+        self.embedding_model = model_registry.get_embedding_model()
+    
+    def load_reranker(self):
+        self.reranker = model_registry.get_reranker()
+    
+    def warm_up(self):
+        """One embed and one rerank, so the first real query doesn't pay for lazy kernel and allocator setup"""
+        self.embedding_model.embed_documents(["warm up"])
+        self.reranker.predict([("warm up", "warm up")])
+    
     async def initialize_vectorstore(self):
         """Initialize or load existing vector store"""
         try:
-            self.vectorstore = Chroma(
-                client=self.client,
-                collection_name=self.collection_name,
-                embedding_function=self.embedding_model,
-                persist_directory=Config.CHROMA_DB_PATH
-            )
-            logger.info("Vector store initialized successfully")
+            self.backend = create_backend(self.client, collection_name=self.collection_name)
+            logger.info(f"Vector store initialized successfully ({self.backend.name} backend)")
         except Exception as e:
             logger.error(f"Error initializing vector store: {e}")
             return {"error": str(e)}
     
-    async def add_documents(self, documents: List[Document]):
-        """Add documents to vector store"""
+    async def add_documents(self, documents: Iterable[Document]) -> int:
+        """Add documents to vector store, consuming any iterable lazily in batches"""
         try:
-            if not self.vectorstore:
+            if not self.backend:
                 await self.initialize_vectorstore()
             
-            # Add documents in batches
+            # Add documents in batches; content-hashed IDs make re-runs upsert instead of duplicating
             batch_size = 100
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i:i + batch_size]
-                self.vectorstore.add_documents(batch)
-                logger.info(f"Added batch {i//batch_size + 1} of {(len(documents) + batch_size - 1)//batch_size}")
+            added = 0
+            for batch_number, batch in enumerate(DocumentProcessor.batched(documents, batch_size), start=1):
+                unique = list({DocumentProcessor.chunk_id(doc): doc for doc in batch}.values())
+                texts = [doc.page_content for doc in unique]
+                self.backend.upsert(
+                    [DocumentProcessor.chunk_id(doc) for doc in unique],
+                    self.embedding_model.embed_documents(texts),
+                    texts,
+                    [doc.metadata for doc in unique]
+                )
+                added += len(batch)
+                if batch_number % 10 == 0:
+                    logger.info(f"Added batch {batch_number} ({added} documents so far)")
             
-            logger.info(f"Added {len(documents)} documents to vector store")
+            self.backend.persist()
+            logger.info(f"Added {added} documents to vector store")
+            if added:
+                self.bump_collection_version()
+            return added
             
         except Exception as e:
             logger.error(f"Error adding documents to vector store: {e}")
             raise
     
-    async def similarity_search(self, query: str, k: int = Config.TOP_K_RETRIEVAL) -> List[Document]:
-        """Perform similarity search"""
+    async def embed_query(self, query: str) -> np.ndarray:
+        """Embed a query with the same model used for retrieval, via the shared embedding cache"""
+        cached = self.embedding_cache.get(query)
+        if cached is not None:
+            return cached
+        with metrics.span("embed"):
+            # The sidecar batches across every worker itself, so it is called directly on the loop
+            if isinstance(self.embedding_model, InferenceClient):
+                start = time.perf_counter()
+                [embedding] = await self.embedding_model.aembed([query])
+                elapsed = time.perf_counter() - start
+            else:
+                [(embedding, elapsed)] = await self.embed_batcher.submit([query])
+        return self.embedding_cache.put(query, embedding, elapsed)
+    
+    def _encode_queries(self, queries: List[str]) -> List[tuple]:
+        """Encode a batch of queries in one forward pass; returns (vector, amortized seconds) per query"""
+        start = time.perf_counter()
+        embeddings = self.embedding_model.embed_documents(queries)
+        per_query = (time.perf_counter() - start) / max(len(queries), 1)
+        return [(embedding, per_query) for embedding in embeddings]
+    
+    @staticmethod
+    def collection_version() -> float:
+        """Timestamp of the last write to the collection, shared across processes via a marker file"""
         try:
-            if not self.vectorstore:
+            return os.path.getmtime(os.path.join(Config.CHROMA_DB_PATH, "collection_version"))
+        except OSError:
+            return 0.0
+    
+    @staticmethod
+    def bump_collection_version():
+        """Mark the collection as changed so caches built on top of it are invalidated"""
+        os.makedirs(Config.CHROMA_DB_PATH, exist_ok=True)
+        with open(os.path.join(Config.CHROMA_DB_PATH, "collection_version"), "w") as f:
+            f.write(str(time.time()))
+    
+    def get_partition_store(self, book: str) -> Optional[ChromaBackend]:
+        """Backend for a book's own Chroma collection, or None if it has not been partitioned"""
+        if not Config.PARTITION_BY_BOOK or self.backend.name != "chroma":
+            return None
+        collection_version = self.collection_version()
+        if collection_version != self.partition_version:
+            # The loader rebuilds partitions whenever it writes; drop handles to collections that changed
+            self.partition_names = set(list_partitions(self.client, self.collection_name))
+            self.partition_stores = {}
+            self.partition_version = collection_version
+        name = partition_name(book, self.collection_name)
+        if name not in self.partition_names:
+            return None
+        if name not in self.partition_stores:
+            self.partition_stores[name] = ChromaBackend(self.client, name)
+        return self.partition_stores[name]
+    
+    def get_quantized_index(self):
+        """Current in-process quantized index, reopened whenever the loader writes a new one"""
+        meta_path = os.path.join(QuantizedIndex.default_path(), "meta.json")
+        try:
+            mtime = os.path.getmtime(meta_path)
+        except OSError:
+            self.quantized_index, self.quantized_index_mtime = None, None
+            return None
+        if mtime != self.quantized_index_mtime:
+            self.quantized_index = QuantizedIndex.load()
+            self.quantized_index_mtime = mtime
+            logger.info(f"Loaded quantized index: {self.quantized_index.stats()}")
+        return self.quantized_index
+    
+    async def quantized_search(self, query: str, k: int, book: Optional[str] = None,
+                               chapter: Optional[str] = None) -> Optional[List[Tuple[Document, float]]]:
+        """Search the memory-mapped quantized index; None if it has not been built yet"""
+        index = self.get_quantized_index()
+        if index is None:
+            logger.warning("VECTOR_BACKEND is 'quantized' but no quantized index exists; using Chroma")
+            return None
+        embedding = await self.embed_query(query)
+        depth = k * Config.LEXICAL_CHAPTER_OVERSAMPLE if chapter else k
+        with metrics.span("dense_search"):
+            hits = await executors.run_inference(index.search, embedding, depth, book)
+        results = list(zip(index.get_documents(row for row, _ in hits), (score for _, score in hits)))
+        if chapter:
+            results = [(doc, score) for doc, score in results if doc.metadata.get("chapter") == chapter]
+        logger.info(f"Retrieved {len(results[:k])} documents for query from quantized index")
+        return results[:k]
+    
+    async def similarity_search(self, query: str, k: int = Config.TOP_K_RETRIEVAL,
+                                book: Optional[str] = None, chapter: Optional[str] = None) -> List[Document]:
+        """Perform similarity search, optionally scoped to a book and/or chapter"""
+        return [doc for doc, _ in await self.dense_search(query, k, book, chapter)]
+    
+    async def dense_search(self, query: str, k: int = Config.TOP_K_RETRIEVAL, book: Optional[str] = None,
+                           chapter: Optional[str] = None) -> List[Tuple[Document, float]]:
+        """Similarity search returning (document, cosine similarity) pairs, best first"""
+        try:
+            if not self.backend:
                 await self.initialize_vectorstore()
             
-            results = self.vectorstore.similarity_search(query, k=k)
-            logger.info(f"Retrieved {len(results)} documents for query")
-            return results
+            if Config.VECTOR_BACKEND == "quantized":
+                results = await self.quantized_search(query, k, book, chapter)
+                if results is not None:
+                    return results
+            
+            # A per-book partition only holds that book, so only the chapter is left to filter on
+            partition = self.get_partition_store(book) if book else None
+            store = partition or self.backend
+            where = build_where(None if partition else book, chapter)
+            
+            embedding = await self.embed_query(query)
+            with metrics.span("dense_search"):
+                try:
+                    hits = await executors.run_inference(store.search, embedding, k, where)
+                except Exception as e:
+                    if partition is None:
+                        raise
+                    # The loader may be rebuilding partitions; the filtered global search gives the same answer
+                    logger.warning(f"Partition search for '{book}' failed, using the global collection: {e}")
+                    hits = await executors.run_inference(self.backend.search, embedding, k, build_where(book, chapter))
+            logger.info(f"Retrieved {len(hits)} documents for query")
+            return hits
             
         except Exception as e:
             logger.error(f"Error in similarity search: {e}")
             raise
     
-    def rerank_documents(self, query: str, documents: List[Document], top_k: int = Config.TOP_K_RERANK) -> List[Dict[str, Any]]:
-        """Rerank documents using cross-encoder"""
+    def _predict_pairs(self, pairs: List[tuple]) -> List[float]:
+        """Score a batch of (query, passage) pairs in one cross-encoder forward pass"""
+        scores = self.reranker.predict(pairs, batch_size=max(len(pairs), 1))
+        return [float(score) for score in scores]
+    
+    @staticmethod
+    def plan_rerank(chunk_ids: List[str], dense_scores: Optional[Dict[str, float]], top_k: int) -> Tuple[str, List[int]]:
+        """
+        Decide which candidates need cross-encoder scores: ("full" | "shortlist" | "skip", positions).
+        Without dense scores everything is reranked. Lexical-only candidates have no
+        dense score and are always kept in a shortlist.
+        """
+        positions = list(range(len(chunk_ids)))
+        ranked = sorted(dense_scores.values(), reverse=True) if dense_scores else []
+        if len(ranked) < 2:
+            return "full", positions
+        if ranked[0] - ranked[1] >= Config.RERANK_SKIP_GAP:
+            return "skip", []
+        if Config.RERANK_SHORTLIST_MARGIN <= 0:
+            return "full", positions
+        floor = ranked[0] - Config.RERANK_SHORTLIST_MARGIN
+        shortlist = [i for i in positions if dense_scores.get(chunk_ids[i], floor) >= floor]
+        # Never return fewer than top_k; pad with the best-placed remaining candidates
+        for i in positions:
+            if len(shortlist) >= top_k:
+                break
+            if i not in shortlist:
+                shortlist.append(i)
+        shortlist.sort()
+        return ("shortlist" if len(shortlist) < len(positions) else "full"), shortlist
+    
+    async def rerank_documents(self, query: str, documents: List[Document], top_k: int = Config.TOP_K_RERANK,
+                               dense_scores: Optional[Dict[str, float]] = None) -> List[Dict[str, Any]]:
+        """
+        Rerank documents using cross-encoder. Scores already computed for the same
+        query and chunk come from the rerank cache. With `dense_scores` (adaptive
+        mode) the cross-encoder is skipped or limited to a shortlist when dense
+        similarity already separates the candidates.
+        """
         try:
             if not documents:
                 return []
             
-            pairs = [(query, doc.page_content) for doc in documents]
-            scores = self.reranker.predict(pairs)
+            start = time.perf_counter()
+            counters = self.rerank_counters
+            counters["queries"] += 1
+            chunk_ids = [DocumentProcessor.chunk_id(doc) for doc in documents]
+            mode, positions = self.plan_rerank(chunk_ids, dense_scores, top_k)
+            
+            if mode == "skip":
+                counters["skipped"] += 1
+                counters["pairs_avoided"] += len(documents)
+                winner = max(range(len(documents)), key=lambda i: dense_scores.get(chunk_ids[i], float("-inf")))
+                order = [winner] + [i for i in range(len(documents)) if i != winner]
+                self.rerank_latencies.append(time.perf_counter() - start)
+                return [
+                    {
+                        'content': documents[i].page_content,
+                        'metadata': documents[i].metadata,
+                        'score': float(dense_scores.get(chunk_ids[i], 0.0)),
+                        'rank': i + 1
+                    }
+                    for i in order[:top_k]
+                ]
+            if mode == "shortlist":
+                counters["shortened"] += 1
+                counters["pairs_avoided"] += len(documents) - len(positions)
+            
+            scores = self.rerank_cache.get_many(query, (chunk_ids[i] for i in positions)) if self.rerank_cache else {}
+            missing = [i for i in positions if chunk_ids[i] not in scores]
+            counters["pairs_cached"] += len(positions) - len(missing)
+            if missing:
+                score_start = time.perf_counter()
+                pairs = [(query, documents[i].page_content) for i in missing]
+                with metrics.span("rerank"):
+                    # As in embed_query, the sidecar does its own batching
+                    if isinstance(self.reranker, InferenceClient):
+                        predicted = await self.reranker.apredict(pairs)
+                    else:
+                        predicted = await self.rerank_batcher.submit(pairs)
+                counters["score_seconds"] += time.perf_counter() - score_start
+                counters["pairs_scored"] += len(missing)
+                new_scores = {chunk_ids[i]: float(score) for i, score in zip(missing, predicted)}
+                if self.rerank_cache:
+                    self.rerank_cache.put_many(query, new_scores)
+                scores.update(new_scores)
             
             results = [
                 {
-                    'content': doc.page_content,
-                    'metadata': doc.metadata,
-                    'score': float(score),
+                    'content': documents[i].page_content,
+                    'metadata': documents[i].metadata,
+                    'score': scores[chunk_ids[i]],
                     'rank': i + 1
                 }
-                for i, (doc, score) in enumerate(zip(documents, scores))
+                for i in positions
             ]
             
+            # A shortlist always holds at least top_k candidates, so the rest can be dropped
             results = sorted(results, key=lambda x: x['score'], reverse=True)
+            self.rerank_latencies.append(time.perf_counter() - start)
             return results[:top_k]
             
         except Exception as e:
@@ -121,11 +360,118 @@ class VectorStore:
                 for i, doc in enumerate(documents[:top_k])
             ]
     
-    async def search_and_rerank(self, query: str) -> List[Dict[str, Any]]:
+    def rerank_stats(self) -> Dict[str, Any]:
+        counters = self.rerank_counters
+        queries = counters["queries"]
+        per_pair = counters["score_seconds"] / counters["pairs_scored"] if counters["pairs_scored"] else 0.0
+        latencies = np.array(self.rerank_latencies) * 1000
+        return {
+            "adaptive": Config.RERANK_ADAPTIVE,
+            **{name: value for name, value in counters.items() if name != "score_seconds"},
+            "skip_rate": round(counters["skipped"] / queries, 4) if queries else 0.0,
+            "shortlist_rate": round(counters["shortened"] / queries, 4) if queries else 0.0,
+            "avg_pair_ms": round(per_pair * 1000, 3),
+            # Estimated from the average cross-encoder cost per scored pair
+            "adaptive_time_saved_s": round(counters["pairs_avoided"] * per_pair, 3),
+            "cache_time_saved_s": round(counters["pairs_cached"] * per_pair, 3),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2) if len(latencies) else None,
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2) if len(latencies) else None,
+            "cache": self.rerank_cache.stats() if self.rerank_cache else {"enabled": False},
+        }
+    
+    def build_lexical_index(self) -> Dict[str, Any]:
+        """Rebuild the BM25 index from the current contents of the collection"""
+        if not self.backend:
+            self.backend = create_backend(self.client, collection_name=self.collection_name)
+        return LexicalIndex.build_from_collection(self.backend)
+    
+    def get_lexical_index(self):
+        """Current BM25 index, reopened whenever the loader writes a new one"""
+        meta_path = os.path.join(LexicalIndex.default_path(), "meta.json")
+        try:
+            mtime = os.path.getmtime(meta_path)
+        except OSError:
+            self.lexical_index, self.lexical_index_mtime = None, None
+            return None
+        if mtime != self.lexical_index_mtime:
+            self.lexical_index = LexicalIndex.load()
+            self.lexical_index_mtime = mtime
+            logger.info(f"Loaded lexical index: {self.lexical_index.stats()}")
+        return self.lexical_index
+    
+    async def lexical_search(self, query: str, k: int = Config.LEXICAL_TOP_K,
+                             book: Optional[str] = None, chapter: Optional[str] = None) -> List[Document]:
+        """BM25 search; returns an empty list when no lexical index has been built"""
+        try:
+            index = self.get_lexical_index()
+            if index is None:
+                return []
+            # The index can mask by book itself; chapters are filtered afterwards, so over-fetch for them
+            depth = k * Config.LEXICAL_CHAPTER_OVERSAMPLE if chapter else k
+            # Covers the BM25 search and fetching the matching chunks
+            with metrics.span("lexical_search"):
+                hits = await executors.run_inference(index.search, query, depth, book)
+                if not hits:
+                    return []
+            
+                if not self.backend:
+                    await self.initialize_vectorstore()
+                ids = [chunk_id for chunk_id, _ in hits]
+                found = await executors.run_io(
+                    self.backend.get, ids=ids, where=build_where(chapter=chapter), include=["documents", "metadatas"]
+                )
+                by_id = {
+                    chunk_id: Document(page_content=content, metadata=metadata or {})
+                    for chunk_id, content, metadata in zip(found["ids"], found["documents"], found["metadatas"])
+                }
+                # Chunks deleted since the index was built are simply dropped
+                return [by_id[chunk_id] for chunk_id in ids if chunk_id in by_id][:k]
+            
+        except Exception as e:
+            logger.error(f"Error in lexical search: {e}")
+            return []
+    
+    @staticmethod
+    def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = Config.RRF_K) -> List[Document]:
+        """Merge ranked lists by summing 1 / (k + rank); documents are matched by content hash"""
+        scores: Dict[str, float] = {}
+        documents: Dict[str, Document] = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking, start=1):
+                key = DocumentProcessor.chunk_id(doc)
+                scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+                documents.setdefault(key, doc)
+        return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+    
+    async def hybrid_search(self, query: str, book: Optional[str] = None, chapter: Optional[str] = None) -> List[Document]:
+        """Dense and BM25 candidates retrieved concurrently and fused with RRF"""
+        candidates, _ = await self.retrieve_candidates(query, book, chapter, hybrid=True)
+        return candidates
+    
+    async def retrieve_candidates(self, query: str, book: Optional[str] = None, chapter: Optional[str] = None,
+                                  hybrid: Optional[bool] = None) -> Tuple[List[Document], Dict[str, float]]:
+        """Rerank candidates plus the dense similarity of each dense hit, keyed by chunk ID"""
+        hybrid = Config.HYBRID_SEARCH_ENABLED if hybrid is None else hybrid
+        if hybrid:
+            dense, lexical = await asyncio.gather(
+                self.dense_search(query, Config.TOP_K_RETRIEVAL, book, chapter),
+                self.lexical_search(query, Config.LEXICAL_TOP_K, book, chapter)
+            )
+        else:
+            dense, lexical = await self.dense_search(query, Config.TOP_K_RETRIEVAL, book, chapter), []
+        dense_scores = {DocumentProcessor.chunk_id(doc): score for doc, score in dense}
+        dense_docs = [doc for doc, _ in dense]
+        if not lexical:
+            return dense_docs, dense_scores
+        return self.reciprocal_rank_fusion([dense_docs, lexical])[:Config.HYBRID_CANDIDATES], dense_scores
+    
+    async def search_and_rerank(self, query: str, book: Optional[str] = None, chapter: Optional[str] = None) -> List[Dict[str, Any]]:
         """Combined search and rerank pipeline"""
         try:
-            initial_results = await self.similarity_search(query, Config.TOP_K_RETRIEVAL)
-            return self.rerank_documents(query, initial_results, Config.TOP_K_RERANK)
+            candidates, dense_scores = await self.retrieve_candidates(query, book, chapter)
+            return await self.rerank_documents(
+                query, candidates, Config.TOP_K_RERANK, dense_scores if Config.RERANK_ADAPTIVE else None
+            )
         except Exception as e:
             logger.error(f"Error in search and rerank: {e}")
             raise
@@ -133,22 +479,35 @@ class VectorStore:
     def get_collection_stats(self) -> Dict[str, Any]:
         """Get statistics about the vector store"""
         try:
-            if not self.vectorstore:
+            if not self.backend:
                 return {"error": "Vector store not initialized"}
             
-            collection = self.client.get_collection(self.collection_name)
-            count = collection.count()
+            count = self.backend.count()
             
+            lexical_index = self.get_lexical_index()
+            quantized_index = self.get_quantized_index() if Config.VECTOR_BACKEND == "quantized" else None
             return {
                 "collection_name": self.collection_name,
                 "total_documents": count,
                 "embedding_model": Config.EMBEDDING_MODEL,
-                "reranker_model": Config.RERANKER_MODEL
+                "reranker_model": Config.RERANKER_MODEL,
+                "inference_backend": Config.INFERENCE_BACKEND,
+                "inference_mode": Config.INFERENCE_MODE,
+                "hybrid_search": Config.HYBRID_SEARCH_ENABLED,
+                "lexical_index": lexical_index.stats() if lexical_index else None,
+                "partitions": list_partitions(self.client, self.collection_name),
+                "vector_backend": self.backend.stats(),
+                "quantized_index": quantized_index.stats() if quantized_index else None
             }
             
         except Exception as e:
             logger.error(f"Error getting collection stats: {e}")
             return {"error": str(e)}
+    
+    async def aclose(self):
+        """Close the sidecar client's async connections, if inference runs in the sidecar"""
+        if isinstance(self.embedding_model, InferenceClient):
+            await self.embedding_model.aclose()
 
 
     def reset_vectorstore(self):
@@ -157,7 +516,8 @@ class VectorStore:
             if os.path.exists(Config.CHROMA_DB_PATH):
                 shutil.rmtree(Config.CHROMA_DB_PATH)
                 logger.warning("Vector store reset: deleted old ChromaDB folder")
-            self.vectorstore = None
+            self.backend = None
+            self.bump_collection_version()
             self.initialize_vectorstore()
         except Exception as e:
             logger.error(f"Error resetting vector store: {e}")
@@ -0,0 +1,190 @@
+# services/verse_index.py
+
+import os
+import re
+import json
+import time
+import logging
+import unicodedata
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+# Common ways users name books whose metadata spells them differently
+BOOK_ALIASES = {
+    "gita": "bhagavad gita",
+    "bhagavadgita": "bhagavad gita",
+    "bhagwad gita": "bhagavad gita",
+    "bhagavad geeta": "bhagavad gita",
+    "bg": "bhagavad gita",
+    "manu smriti": "manusmriti",
+    "manusmrti": "manusmriti",
+    "laws of manu": "manusmriti",
+    "rigveda": "rig veda",
+    "rg veda": "rig veda",
+    "samaveda": "sama veda",
+    "yajurveda": "yajur veda",
+    "atharvaveda": "atharva veda",
+}
+CHAPTER_PATTERN = re.compile(r"\bch\w*\s+(\d+|[ivxlcdm]+)\b")
+NUMBER_PATTERN = re.compile(r"(\d+)")
+# Leading words that still make a query a plain lookup ("show me gita 2.47")
+LOOKUP_PREFIX = r"(?:(?:show|give|read|quote|recite|print|fetch|what|does|do|is|me|the|text|of|from|in)\s+)*"
+LOOKUP_SUFFIX = r"(?:\s+(?:say|says|said|text))?"
+VERSE_WORDS = r"(?:verse|verses|shloka|sloka|law|rule|mantra|hymn|v)"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip diacritics, and reduce punctuation (other than verse dots) to spaces."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"(?<=\d)[.:](?=\d)", ".", text)
+    text = re.sub(r"[^\w.]+|\.(?!\d)|(?<!\d)\.", " ", text)
+    return " ".join(text.split())
+
+
+def parse_number(token: Any) -> Optional[int]:
+    """'5', 5, 'Verse 16' or a roman numeral like 'XVIII' -> int."""
+    if isinstance(token, int):
+        return token
+    token = normalize(str(token))
+    match = NUMBER_PATTERN.search(token)
+    if match:
+        return int(match.group(1))
+    token = token.split()[-1] if token else ""
+    if not token or any(ch not in ROMAN_VALUES for ch in token):
+        return None
+    total = 0
+    for i, ch in enumerate(token):
+        value = ROMAN_VALUES[ch]
+        total += -value if i + 1 < len(token) and ROMAN_VALUES[token[i + 1]] > value else value
+    return total
+
+
+def parse_chapter(chapter: Any) -> Optional[int]:
+    """'Chapter 1 - Introductory', 'Chapter XVIII' or the 'Chatper VI' typo -> chapter number."""
+    if chapter is None:
+        return None
+    if isinstance(chapter, int):
+        return chapter
+    match = CHAPTER_PATTERN.search(normalize(str(chapter)))
+    return parse_number(match.group(1)) if match else parse_number(chapter)
+
+
+def record_key(metadata: Dict[str, Any]) -> Optional[Tuple[str, Optional[int], int]]:
+    """(book, chapter, verse) for a source record, or None if it has no verse-level number."""
+    book = metadata.get("book_name") or metadata.get("Veda")
+    verse = metadata.get("verse_number", metadata.get("law_number", metadata.get("Verse")))
+    if not book or verse in (None, ""):
+        return None
+    verse = parse_number(verse)
+    if verse is None:
+        return None
+    return normalize(book), parse_chapter(metadata.get("chapter")), verse
+
+
+def key_string(book: str, chapter: Optional[int], verse: int) -> str:
+    return f"{book}|{'' if chapter is None else chapter}|{verse}"
+
+
+class VerseIndex:
+    """
+    Exact (book, chapter, verse) -> source record lookup for reference-style queries.
+
+    Built from the raw JSONL records rather than the chunks, so a lookup returns
+    the whole verse or law. Only records with an explicit verse-level field
+    (`verse_number`, `law_number` or the Vedas' `Verse`) are indexed; books that
+    only carry `chapter` fall through to the normal RAG path.
+    """
+
+    def __init__(self, entries: Dict[str, List[Dict[str, Any]]], books: List[str], meta: Dict[str, Any]):
+        self.entries = entries
+        self.meta = meta
+        aliases = {book: book for book in books}
+        aliases.update({book.replace(" ", ""): book for book in books})
+        aliases.update({alias: book for alias, book in BOOK_ALIASES.items() if book in books})
+        self.aliases = aliases
+        self.query_pattern = self._compile_query_pattern(aliases)
+
+    @staticmethod
+    def default_path() -> str:
+        return os.path.join(Config.CHROMA_DB_PATH, "verse_index.json")
+
+    @staticmethod
+    def _compile_query_pattern(aliases: Dict[str, str]) -> Optional[re.Pattern]:
+        if not aliases:
+            return None
+        books = "|".join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+        number = r"(\d+|[ivxlcdm]+)"
+        reference = (
+            rf"(?:{number}\.(\d+)"                                              # gita 2.47
+            rf"|(?:chapter|ch|adhyaya)\s+{number}\s*(?:,\s*)?{VERSE_WORDS}\s+(\d+)"  # chapter 2 verse 47
+            rf"|{VERSE_WORDS}\s+(\d+))"                                          # rig veda verse 16
+        )
+        return re.compile(rf"^{LOOKUP_PREFIX}(?P<book>{books})\s+{reference}{LOOKUP_SUFFIX}$")
+
+    @staticmethod
+    def build(data_directory: str, path: Optional[str] = None) -> Dict[str, Any]:
+        """Index every verse-numbered record in the data directory and write it to `path`."""
+        from services.document_processor import DocumentProcessor
+
+        path = path or VerseIndex.default_path()
+        start = time.perf_counter()
+        processor = DocumentProcessor()
+        entries: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        books = set()
+        for filename in sorted(os.listdir(data_directory)):
+            jsonl_path = processor.to_jsonl(os.path.join(data_directory, filename))
+            if not jsonl_path:
+                continue
+            for doc in processor.iter_jsonl_documents(jsonl_path):
+                key = record_key(doc.metadata)
+                if key is None:
+                    continue
+                books.add(key[0])
+                entries[key_string(*key)].append({"content": doc.page_content, "metadata": doc.metadata})
+
+        meta = {"records": sum(len(records) for records in entries.values()), "keys": len(entries),
+                "books": sorted(books), "built_at": time.time()}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        meta["build_s"] = round(time.perf_counter() - start, 2)
+        logger.info(f"Built verse index at {path}: {meta['keys']} references from {len(books)} books")
+        return meta
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> Optional["VerseIndex"]:
+        path = path or cls.default_path()
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["entries"], data["meta"]["books"], data["meta"])
+
+    def parse_reference(self, query: str) -> Optional[Tuple[str, Optional[int], int]]:
+        """(book, chapter, verse) if the whole query is a scripture reference, else None."""
+        if self.query_pattern is None:
+            return None
+        match = self.query_pattern.match(normalize(query).rstrip(" ?"))
+        if not match:
+            return None
+        groups = match.groups()[1:]
+        book = self.aliases[match.group("book")]
+        if groups[0] is not None:
+            return book, parse_number(groups[0]), int(groups[1])
+        if groups[2] is not None:
+            return book, parse_number(groups[2]), int(groups[3])
+        return book, None, int(groups[4])
+
+    def lookup(self, book: str, chapter: Optional[int], verse: int) -> List[Dict[str, Any]]:
+        return self.entries.get(key_string(book, chapter, verse), [])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"references": self.meta["keys"], "records": self.meta["records"], "books": self.meta["books"]}